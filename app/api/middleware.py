@@ -0,0 +1,101 @@
+import itertools
+from time import perf_counter
+
+from ..core.metrics import request_latency
+from ..utils.logging import request_context
+
+# Метка маршрута для запросов, не попавших ни в один маршрут (404): путь
+# запроса в метку не попадает, чтобы число рядов не росло от мусорных URL.
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI-middleware: задержка каждого HTTP-запроса в гистограмму по методу,
+    шаблону маршрута и коду ответа.
+
+    Написан на чистом ASGI, а не через `BaseHTTPMiddleware`, чтобы не
+    добавлять на запрос отдельную задачу и потоковую обёртку ответа: на
+    запрос приходятся два вызова `perf_counter` и одно наблюдение.
+    """
+
+    def __init__(self, app) -> None:  # type: ignore[no-untyped-def]
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_latency.observe(
+                perf_counter() - start,
+                (scope["method"], route_template(scope), str(status)),
+            )
+
+
+def route_template(scope: dict) -> str:
+    """
+    Шаблон маршрута запроса вместе с префиксом роутера, например
+    `/api/v1/intersections/{intersection_id}/state`.
+
+    Маршрутизатор кладёт найденный маршрут в `scope["route"]`, но у
+    маршрута из вложенного роутера путь может быть без префикса. Префикс —
+    путь запроса без стольких последних сегментов, сколько их в шаблоне
+    (параметры пути занимают ровно один сегмент).
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = getattr(route, "path_format", None) or route.path
+    if ":path}" in template:
+        return template
+    return scope["path"].rsplit("/", template.count("/"))[0] + template
+
+
+_request_ids = itertools.count(1)
+
+
+class RequestContextMiddleware:
+    """
+    Контекст запроса для логов: `request_id` (заголовок `X-Request-ID`
+    или порядковый номер в процессе), метод и путь. Одно присваивание
+    contextvar на запрос; в запись лога контекст попадает, только если
+    она прошла фильтры.
+    """
+
+    def __init__(self, app) -> None:  # type: ignore[no-untyped-def]
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id: object = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        token = request_context.set(
+            {
+                "request_id": request_id or next(_request_ids),
+                "method": scope["method"],
+                "path": scope["path"],
+            },
+        )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_context.reset(token)
@@ -0,0 +1,101 @@
+import asyncio
+import functools
+import time
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from ..core.profiling import current_sample, profiler
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware профилировщика: пока он выключен — одна проверка
+    флага на запрос; включён — каждый `sample_every`-й запрос помечается
+    (contextvar), а поток цикла событий сэмплируется, пока запрос идёт.
+    """
+
+    def __init__(self, app) -> None:  # type: ignore[no-untyped-def]
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore
+        if not profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sample = profiler.begin_request()
+        if sample is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = current_sample.set(sample)
+        profiler.enter_thread()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.leave_thread()
+            current_sample.reset(token)
+            profiler.finish_request(sample)
+
+
+def _profiled_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Обёртка эндпоинта, отмечающая начало и конец обработчика. Сохраняет
+    сигнатуру (FastAPI строит по ней зависимости) и вид функции: корутина
+    остаётся корутиной, синхронная функция по-прежнему идёт в пул потоков.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def run_async(*args: Any, **kwargs: Any) -> Any:
+            sample = current_sample.get()
+            if sample is None:
+                return await endpoint(*args, **kwargs)
+            sample.endpoint_started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                sample.endpoint_done = time.perf_counter()
+
+        return run_async
+
+    @functools.wraps(endpoint)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        sample = current_sample.get()
+        if sample is None:
+            return endpoint(*args, **kwargs)
+        sample.endpoint_started = time.perf_counter()
+        profiler.enter_thread()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.leave_thread()
+            sample.endpoint_done = time.perf_counter()
+
+    return run
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Маршрут с отметками этапов для профилировщика: до обработчика —
+    разбор и проверка запроса, обработчик, после него — модель ответа и
+    сериализация. Для непрофилируемых запросов — чтение contextvar.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            sample = current_sample.get()
+            if sample is None:
+                return await handler(request)
+            sample.handler_started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                sample.handler_done = time.perf_counter()
+
+        return route_handler
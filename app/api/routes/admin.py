@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Response
+
+from ...core.models import ProfilingStartRequest, ProfilingStatus
+from ...core.profiling import profiler
+from ...utils.logging import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+@router.get(
+    "/profiling",
+    response_model=ProfilingStatus,
+    summary="Profiler state and stage timings of sampled requests",
+    tags=["admin"],
+)
+def profiling_status() -> ProfilingStatus:
+    return ProfilingStatus(**profiler.status())
+
+
+@router.post(
+    "/profiling/start",
+    response_model=ProfilingStatus,
+    summary="Start sampling 1-in-N requests (clears collected data)",
+    tags=["admin"],
+)
+def start_profiling(body: ProfilingStartRequest) -> ProfilingStatus:
+    """
+    Включить профилировщик: каждый `sample_every`-й запрос сэмплируется
+    раз в `interval` секунд, этапы запроса измеряются отдельно.
+    """
+    profiler.start(body.sample_every, body.interval)
+    logger.info(
+        "Profiling started (1 in %d requests, every %.3f s)",
+        body.sample_every,
+        body.interval,
+    )
+    return ProfilingStatus(**profiler.status())
+
+
+@router.post(
+    "/profiling/stop",
+    response_model=ProfilingStatus,
+    summary="Stop profiling, keeping collected data",
+    tags=["admin"],
+)
+def stop_profiling() -> ProfilingStatus:
+    profiler.stop()
+    logger.info("Profiling stopped")
+    return ProfilingStatus(**profiler.status())
+
+
+@router.get(
+    "/profiling/stacks",
+    response_class=Response,
+    summary="Collected stacks in collapsed (flamegraph) format",
+    tags=["admin"],
+)
+def profiling_stacks() -> Response:
+    """
+    Строки `корень;...;лист число` — вход для flamegraph.pl, speedscope,
+    inferno.
+    """
+    return Response(profiler.collapsed(), media_type="text/plain")
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ...config import Settings
+from ...core.exceptions import DomainError, IntersectionNotFound
+from ...core.models import ErrorResponse, GreenWaveRequest, GreenWaveResponse
+from ...core.services import green_wave_service
+from ...utils.logging import get_logger
+from ..deps import get_settings_dep
+from ..profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+logger = get_logger(__name__)
+
+
+@router.post(
+    "/green-wave",
+    response_model=GreenWaveResponse,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    summary="Compute (and optionally apply) green-wave offsets for a corridor",
+    tags=["corridors"],
+)
+def green_wave(
+    body: GreenWaveRequest,
+    settings: Settings = Depends(get_settings_dep),
+) -> GreenWaveResponse:
+    """
+    Подобрать смещения циклов перекрёстков коридора, максимизирующие
+    ширину зелёной ленты в обе стороны при заданной скорости.
+
+    С `apply=true` контроллеры сдвигаются на рассчитанные смещения
+    атомарно для всего коридора.
+    """
+    try:
+        result = green_wave_service(
+            body.intersection_ids,
+            body.segment_lengths,
+            body.speed_kmh,
+            body.direction,
+            body.apply,
+        )
+    except IntersectionNotFound as exc:
+        logger.warning("Corridor intersection not found: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+    except DomainError as exc:
+        logger.error("Domain error on green wave: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    logger.info(
+        "Green wave for %d intersections: bandwidth %d/%d s, applied=%s",
+        len(result["intersection_ids"]),
+        result["bandwidth_outbound"],
+        result["bandwidth_inbound"],
+        body.apply,
+    )
+    return GreenWaveResponse(**result)
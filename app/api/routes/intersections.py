@@ -1,27 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
 from ...config import Settings
+from ...core.events import broker
 from ...core.exceptions import DomainError, IntersectionNotFound
 from ...core.models import (
+    BatchTickRequest,
+    BatchTickResponse,
     ErrorResponse,
+    ImportReport,
     IntersectionConfig,
     IntersectionConfigResponse,
-    IntersectionState,
     IntersectionsListResponse,
+    IntersectionState,
+    IntersectionStatesResponse,
     TickRequest,
+    TimelineTransitionsResponse,
 )
 from ...core.services import (
+    batch_tick_service,
     create_or_update_intersection_service,
     delete_intersection_service,
-    get_intersection_state_service,
+    get_intersection_state_json_service,
+    get_intersection_states_service,
+    get_timeline_states_service,
+    get_timeline_transitions_service,
+    import_intersections_service,
     list_intersections_service,
     reset_intersection_service,
+    tick_all_intersections_service,
     tick_intersection_service,
 )
-from ..deps import get_settings_dep
+from ...core.timeline import MAX_TIMELINE_WINDOW, offset_until
 from ...utils.logging import get_logger
+from ..deps import get_settings_dep
+from ..profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 logger = get_logger(__name__)
 
 
@@ -42,22 +71,268 @@ def list_intersections(
     return IntersectionsListResponse(items=items)
 
 
+@router.get(
+    "/states",
+    response_class=Response,
+    responses={200: {"model": IntersectionStatesResponse}},
+    summary="Get current state of many intersections",
+    tags=["intersections"],
+)
+def get_states(
+    ids: List[str] | None = Query(
+        None,
+        description="Intersection identifiers; all intersections if omitted",
+    ),
+    settings: Settings = Depends(get_settings_dep),
+) -> Response:
+    """
+    Получить состояния всех перекрёстков или только перечисленных в `ids`.
+
+    Снимки сериализуются в JSON одним вызовом, без построения модели
+    IntersectionState на каждый перекрёсток.
+    """
+    snapshots, missing = get_intersection_states_service(ids)
+    logger.debug("Reading states (%d items)", len(snapshots))
+    return _json_response({"items": snapshots, "missing": missing})
+
+
+def _json_response(payload: dict) -> Response:
+    return Response(
+        content=json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    "/timeline/state",
+    response_class=Response,
+    responses={
+        200: {"model": IntersectionStatesResponse},
+        400: {"model": ErrorResponse},
+    },
+    summary="Predict intersection states at a future moment",
+    tags=["timeline"],
+)
+def get_timeline_state(
+    offset: int | None = Query(
+        None,
+        ge=0,
+        description="Seconds from now",
+    ),
+    at: datetime | None = Query(
+        None,
+        description="Absolute moment (ISO 8601); naive values are server local time",
+    ),
+    ids: List[str] | None = Query(
+        None,
+        description="Intersection identifiers; all intersections if omitted",
+    ),
+    settings: Settings = Depends(get_settings_dep),
+) -> Response:
+    """
+    Состояния перекрёстков через `offset` секунд (или в момент `at`)
+    без изменения контроллеров: позиция в цикле считается по модулю
+    длины цикла сразу для всех перекрёстков одного плана.
+    """
+    if (offset is None) == (at is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Exactly one of 'offset' or 'at' is required",
+        )
+    if at is not None:
+        offset = offset_until(at)
+        if offset < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'at' must not be in the past",
+            )
+
+    snapshots, missing = get_timeline_states_service(ids, offset)
+    logger.debug("Timeline states at +%ds (%d items)", offset, len(snapshots))
+    return _json_response({"items": snapshots, "missing": missing})
+
+
+@router.get(
+    "/timeline/transitions",
+    response_class=Response,
+    responses={
+        200: {"model": TimelineTransitionsResponse},
+        400: {"model": ErrorResponse},
+    },
+    summary="List phase transitions in a time window",
+    tags=["timeline"],
+)
+def get_timeline_transitions(
+    start: int = Query(0, ge=0, description="Window start, seconds from now"),
+    end: int = Query(..., ge=0, description="Window end (inclusive), seconds from now"),
+    ids: List[str] | None = Query(
+        None,
+        description="Intersection identifiers; all intersections if omitted",
+    ),
+    settings: Settings = Depends(get_settings_dep),
+) -> Response:
+    """
+    Все переходы между фазами в окне `[start, end]` секунд от текущего
+    момента. Считаются из смещений фаз плана, без пошаговой симуляции
+    и без изменения контроллеров.
+    """
+    if end < start or end - start > MAX_TIMELINE_WINDOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Window must satisfy start <= end and be at most "
+                f"{MAX_TIMELINE_WINDOW} seconds"
+            ),
+        )
+
+    try:
+        items, missing = get_timeline_transitions_service(ids, start, end)
+    except DomainError as exc:
+        logger.warning("Timeline transitions rejected: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    logger.debug("Timeline transitions [%d, %d] (%d items)", start, end, len(items))
+    return _json_response({"items": items, "missing": missing})
+
+
+# Интервал keep-alive комментариев в SSE-потоке, секунды.
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    summary="Stream phase transitions (Server-Sent Events)",
+    tags=["intersections"],
+)
+async def stream_events(
+    request: Request,
+    ids: List[str] | None = Query(
+        None,
+        description="Intersection identifiers; all intersections if omitted",
+    ),
+) -> StreamingResponse:
+    """
+    Поток Server-Sent Events вместо опроса `GET /state`.
+
+    Событие приходит только при смене фазы (tick), сбросе (reset),
+    обновлении конфигурации (config) или удалении перекрёстка (deleted).
+    """
+    subscription = broker.subscribe(ids)
+
+    async def frames() -> AsyncIterator[bytes]:
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(
+                        subscription.get(),
+                        timeout=SSE_KEEPALIVE_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    summary="Bulk import intersection configurations (NDJSON)",
+    tags=["intersections"],
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+            "required": True,
+        },
+    },
+)
+async def import_intersections(
+    request: Request,
+    chunk_size: int | None = Query(
+        None,
+        gt=0,
+        description="Records validated and committed per chunk",
+    ),
+) -> ImportReport:
+    """
+    Массовый импорт: тело — NDJSON, по одной IntersectionConfig на строку.
+
+    Тело читается потоком и обрабатывается пачками, поэтому память не
+    зависит от размера файла. Ошибочные строки не прерывают импорт и
+    перечисляются в отчёте с номерами строк.
+    """
+    report = await import_intersections_service(request.stream(), chunk_size)
+    logger.info(
+        "Bulk import finished: %d imported, %d failed",
+        report["imported"],
+        report["failed"],
+    )
+    return ImportReport(**report)
+
+
+@router.post(
+    "/batch/tick",
+    response_model=BatchTickResponse,
+    responses={400: {"model": ErrorResponse}},
+    summary="Advance simulation time for many intersections",
+    tags=["intersections"],
+)
+def batch_tick(
+    body: BatchTickRequest | None = None,
+    settings: Settings = Depends(get_settings_dep),
+) -> BatchTickResponse:
+    """
+    Пакетный tick: список пар (перекрёсток, секунды) или все перекрёстки
+    на `seconds` секунд. Неизвестные id возвращаются как ошибки элементов,
+    а не как ошибка всего запроса.
+    """
+    if body is None or (body.items is None) == (body.seconds is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Exactly one of 'items' or 'seconds' is required",
+        )
+
+    if body.items is not None:
+        results = batch_tick_service(
+            (item.intersection_id, item.seconds) for item in body.items
+        )
+    else:
+        results = tick_all_intersections_service(body.seconds)
+
+    logger.debug("Batch tick (%d items)", len(results))
+    return BatchTickResponse(items=results)
+
+
 @router.get(
     "/{intersection_id}/state",
-    response_model=IntersectionState,
-    responses={404: {"model": ErrorResponse}},
+    response_class=Response,
+    responses={
+        200: {"model": IntersectionState},
+        404: {"model": ErrorResponse},
+    },
     summary="Get current traffic light state",
     tags=["intersections"],
 )
 def get_state(
     intersection_id: str = Path(..., description="Intersection identifier"),
     settings: Settings = Depends(get_settings_dep),
-) -> IntersectionState:
+) -> Response:
     """
     Получить текущее состояние светофора на перекрёстке.
+
+    Ответ собирается из заранее сериализованных фрагментов фазы,
+    без построения модели IntersectionState на каждый запрос.
     """
     try:
-        snapshot = get_intersection_state_service(intersection_id)
+        content = get_intersection_state_json_service(intersection_id)
     except IntersectionNotFound as exc:
         logger.warning("Intersection not found: %s", intersection_id)
         raise HTTPException(
@@ -65,7 +340,7 @@ def get_state(
             detail=str(exc),
         ) from exc
 
-    return IntersectionState(**snapshot)
+    return Response(content=content, media_type="application/json")
 
 
 @router.post(
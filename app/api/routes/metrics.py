@@ -0,0 +1,52 @@
+import asyncio
+from typing import Iterable
+
+from anyio import to_thread
+from fastapi import APIRouter, Response
+
+from ...core.metrics import Gauge, Sample, registry
+from ...core.repository import repo
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _threadpool() -> Iterable[Sample]:
+    # Синхронные обработчики FastAPI выполняются в пуле потоков anyio,
+    # занятость ограничена его лимитером; вызывается из цикла событий.
+    statistics = to_thread.current_default_thread_limiter().statistics()
+    return [
+        (("busy",), statistics.borrowed_tokens),
+        (("waiting",), statistics.tasks_waiting),
+        (("capacity",), statistics.total_tokens),
+    ]
+
+
+# Задаётся при выгрузке: len() некоторых хранилищ может брать локи или
+# читать общую память, поэтому считается в отдельном потоке, а не в цикле
+# событий.
+repository_size = registry.register(
+    Gauge(
+        "traffic_repository_intersections",
+        "Intersections stored in the repository.",
+    ),
+)
+registry.register(
+    Gauge(
+        "threadpool_tasks",
+        "Worker thread pool for sync handlers: busy threads, queued tasks "
+        "waiting for a thread and the pool capacity.",
+        ("state",),
+        function=_threadpool,
+    ),
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Метрики процесса в текстовом формате Prometheus.
+    """
+    repository_size.set(await asyncio.to_thread(len, repo))
+    return Response(registry.render(), media_type=CONTENT_TYPE)
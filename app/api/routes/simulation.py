@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ...config import Settings
+from ...core.exceptions import DomainError
+from ...core.models import (
+    ErrorResponse,
+    QueueSimulationRequest,
+    QueueSimulationResponse,
+    SimulationRunRequest,
+    SimulationRunResponse,
+)
+from ...core.services import simulate_queues_service, simulation_run_service
+from ...utils.logging import get_logger
+from ..deps import get_settings_dep
+from ..profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+logger = get_logger(__name__)
+
+
+@router.post(
+    "/queues",
+    response_model=QueueSimulationResponse,
+    summary="Simulate vehicle queues for the fleet from its current state",
+    tags=["simulation"],
+)
+def simulate_queues(
+    body: QueueSimulationRequest,
+    settings: Settings = Depends(get_settings_dep),
+) -> QueueSimulationResponse:
+    """
+    Смоделировать очереди автомобилей по направлениям на `duration` секунд
+    вперёд: задержка, пропускная способность и максимальная очередь.
+
+    Состояние контроллеров не меняется; не найденные id перечисляются
+    в `missing`.
+    """
+    result = simulate_queues_service(
+        body.intersection_ids,
+        body.duration,
+        body.arrival_rates,
+        body.saturation_flows,
+        body.include_items,
+    )
+    summary = result["summary"]
+    logger.info(
+        "Queue simulation for %d intersections over %d s: %d steps",
+        summary["intersections"],
+        summary["duration"],
+        summary["steps"],
+    )
+    return QueueSimulationResponse(**result)
+
+
+@router.post(
+    "/run",
+    response_model=SimulationRunResponse,
+    responses={400: {"model": ErrorResponse}},
+    summary="Run a discrete-event what-if simulation with a demand profile",
+    tags=["simulation"],
+)
+def run_simulation(
+    body: SimulationRunRequest,
+    settings: Settings = Depends(get_settings_dep),
+) -> SimulationRunResponse:
+    """
+    Событийный прогон парка на `duration` секунд (до недели) с
+    кусочно-постоянным профилем спроса `demand` и итогами по интервалам
+    `report_interval`.
+
+    Виртуальное время переходит от события к событию, поэтому стоимость
+    зависит от числа переходов фаз, а не от длительности. Состояние
+    контроллеров не меняется.
+    """
+    try:
+        result = simulation_run_service(
+            body.intersection_ids,
+            body.duration,
+            [(change.at, change.arrival_rates) for change in body.demand],
+            body.saturation_flows,
+            body.report_interval,
+            body.include_items,
+        )
+    except DomainError as exc:
+        logger.error("Invalid simulation run: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    summary = result["summary"]
+    logger.info(
+        "Simulation run for %d intersections over %d s: %d transitions, %d events",
+        summary["intersections"],
+        summary["duration"],
+        result["transitions"],
+        summary["steps"],
+    )
+    return SimulationRunResponse(**result)
@@ -0,0 +1,75 @@
+"""
+Командная строка сервиса.
+
+Массовый импорт конфигураций перекрёстков из NDJSON-файла (по одной
+IntersectionConfig на строку) в работающий сервис:
+
+    python -m app.cli import city.ndjson --url http://localhost:8000
+
+Файл отправляется потоком, целиком в память не загружается.
+"""
+
+import argparse
+import json
+import sys
+from typing import Iterator, List, Optional
+
+import httpx
+
+from .config import get_settings
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def _read_blocks(path: str) -> Iterator[bytes]:
+    source = sys.stdin.buffer if path == "-" else open(path, "rb")
+    with source:
+        while block := source.read(READ_BLOCK_SIZE):
+            yield block
+
+
+def import_command(args: argparse.Namespace) -> int:
+    url = (
+        f"{args.url.rstrip('/')}{get_settings().api_v1_prefix}/intersections/import"
+    )
+    params = {"chunk_size": args.chunk_size} if args.chunk_size else {}
+    response = httpx.post(
+        url,
+        params=params,
+        content=_read_blocks(args.file),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=None,
+    )
+    if response.status_code != 200:
+        print(
+            f"Import failed: HTTP {response.status_code}: {response.text}",
+            file=sys.stderr,
+        )
+        return 1
+
+    report = response.json()
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({k: report[k] for k in ("imported", "failed")}))
+    return 0 if report["failed"] == 0 else 2
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser(
+        "import",
+        help="Bulk import intersection configs from an NDJSON file",
+    )
+    importer.add_argument("file", help="NDJSON file path or '-' for stdin")
+    importer.add_argument("--url", default="http://localhost:8000")
+    importer.add_argument("--chunk-size", type=int, default=None)
+    importer.set_defaults(handler=import_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from functools import lru_cache
 
+from pydantic import validator
 from pydantic_settings import BaseSettings
 
 
@@ -13,7 +14,73 @@ class Settings(BaseSettings):
     app_name: str = "Traffic Light Control Service"
     app_env: str = "development"  # development / production
     log_level: str = "INFO"  # DEBUG / INFO / WARNING / ERROR
+    log_format: str = "json"  # json / text
+    log_queue: bool = True  # запись в лог через очередь и отдельный поток
+    # Не больше `log_rate_limit` записей с одним шаблоном сообщения за
+    # `log_rate_window` секунд (0 — без ограничения); сверх лимита —
+    # каждая `log_sample_every`-я (0 — ни одной)
+    log_rate_limit: int = 20
+    log_rate_window: float = 1.0
+    log_sample_every: int = 0
     api_v1_prefix: str = "/api/v1"
+    controller_mode: str = "simulated"  # simulated / wall_clock
+    scheduler_enabled: bool = False  # переходы фаз в реальном времени
+
+    # Хранилище перекрёстков: memory (в процессе) / shared_memory (общее
+    # для всех воркеров uvicorn, mmap файла) / durable (журнал на диске)
+    repository_backend: str = "memory"
+    shm_path: str = "/dev/shm/traffic-light-fleet"
+    shm_capacity: int = 65536  # максимальное число перекрёстков
+    shm_plan_table_bytes: int = 16 * 1024 * 1024
+    durable_log_path: str = "data/intersections.log"
+    durable_durability: str = "batch"  # none / batch / sync
+    durable_flush_interval: float = 0.05  # секунды на сбор группы записей
+
+    # Бинарный снимок парка для быстрого старта (только backend=memory);
+    # пустой путь — снимки отключены
+    snapshot_path: str = ""
+    snapshot_interval: float = 60.0  # секунды между периодическими снимками
+
+    # Массовый импорт NDJSON: процессы для проверки (0 — в потоке)
+    import_workers: int = 0
+    import_chunk_size: int = 1000
+    import_max_line_bytes: int = 1024 * 1024  # длиннее — ошибка строки
+
+    # Метрики Prometheus (`GET /metrics`) и задержка цикла событий
+    metrics_enabled: bool = True
+    metrics_loop_lag_interval: float = 0.5  # секунды между замерами
+
+    # Служебные эндпоинты `/admin` (профилировщик); по умолчанию выключены
+    admin_enabled: bool = False
+    # Профилировщик запросов: SIGUSR2 включает/выключает его, при
+    # выключении свёрнутые стеки пишутся в `profiling_output` ({pid} —
+    # номер процесса)
+    profiling_signal: bool = True
+    profiling_sample_every: int = 100
+    profiling_interval: float = 0.005
+    profiling_output: str = "data/profile-{pid}.folded"
+
+    @validator("repository_backend")
+    def validate_repository_backend(cls, v: str, values: dict) -> str:
+        # Планировщик есть в каждом воркере, а регион общий: каждый из них
+        # применил бы один и тот же переход, пропуская фазы (например,
+        # жёлтую).
+        if v == "shared_memory" and values.get("scheduler_enabled"):
+            raise ValueError(
+                "SCHEDULER_ENABLED is not supported with "
+                "REPOSITORY_BACKEND=shared_memory: every worker would apply "
+                "each transition"
+            )
+        # Журнал и общий регион хранят только симулируемые контроллеры:
+        # иначе запуск упал бы на создании перекрёстка по умолчанию.
+        if v in ("shared_memory", "durable") and (
+            values.get("controller_mode") == "wall_clock"
+        ):
+            raise ValueError(
+                "CONTROLLER_MODE=wall_clock is not supported with "
+                f"REPOSITORY_BACKEND={v}: use CONTROLLER_MODE=simulated"
+            )
+        return v
 
     class Config:
         env_file = ".env"
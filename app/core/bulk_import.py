@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .domain import PhasePlan, plan_registry
+from .events import broker
+from .exceptions import DomainError
+from .models import IntersectionConfig
+from .plain import conflicts_from_plain, phases_from_plain, phases_to_plain
+from .repository import (
+    InMemoryIntersectionRepository,
+    build_controller,
+    repo,
+)
+
+# Результат проверки строки: (номер строки, (id, name, план фаз, матрица
+# конфликтов или None) или None,
+# текст ошибки или None)
+ValidatedLine = Tuple[
+    int,
+    Optional[Tuple[str, str, list, Optional[list]]],
+    Optional[str],
+]
+
+# Сколько ошибок по строкам возвращать в отчёте (остальные только считаются).
+MAX_REPORTED_ERRORS = 1000
+
+# Предел длины строки NDJSON по умолчанию, байты: более длинная строка не
+# буферизуется целиком, а отклоняется как ошибка этой строки.
+MAX_LINE_BYTES = 1024 * 1024
+LINE_TOO_LONG = "line exceeds the maximum length"
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool(workers: int) -> Optional[Executor]:
+    """
+    Общий пул процессов для проверки конфигураций; None при `workers` == 0.
+    """
+    global _process_pool
+    if workers <= 0:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def _error_text(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def validate_config_lines(
+    lines: List[Tuple[int, Optional[bytes]]],
+) -> List[ValidatedLine]:
+    """
+    Проверить пачку строк NDJSON как IntersectionConfig; None вместо
+    строки — строка длиннее предела.
+
+    Возвращает только простые типы, поэтому может выполняться в пуле
+    процессов.
+    """
+    results: List[ValidatedLine] = []
+    for number, line in lines:
+        if line is None:
+            results.append((number, None, LINE_TOO_LONG))
+            continue
+        try:
+            config = IntersectionConfig.model_validate_json(line)
+        except ValidationError as exc:
+            results.append((number, None, _error_text(exc)))
+            continue
+        plan = phases_to_plain(config.phases)
+        conflicts = (
+            None
+            if config.conflicts is None
+            else [[first.value, second.value] for first, second in config.conflicts]
+        )
+        results.append((number, (config.id, config.name, plan, conflicts), None))
+    return results
+
+
+def commit_validated(
+    results: List[ValidatedLine],
+    repository: InMemoryIntersectionRepository,
+) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Сохранить проверенные конфигурации. Ошибки доменной проверки (например,
+    конфликтующие зелёные) возвращаются по строкам.
+    """
+    imported = 0
+    errors: List[Tuple[int, str]] = []
+    # Большинство перекрёстков работает по нескольким типовым планам:
+    # одинаковые планы разбираются и интернируются один раз на пачку.
+    plans: Dict[tuple, PhasePlan] = {}
+    for number, record, error in results:
+        if record is None:
+            errors.append((number, error or "invalid record"))
+            continue
+        intersection_id, name, plan, conflicts = record
+        key = (
+            tuple(
+                (phase_name, duration, tuple(states.items()))
+                for phase_name, duration, states in plan
+            ),
+            None if conflicts is None else tuple(map(tuple, conflicts)),
+        )
+        try:
+            phases = plans.get(key)
+            if phases is None:
+                phases = plans[key] = plan_registry.intern(
+                    phases_from_plain(plan),
+                    conflicts_from_plain(conflicts),
+                )
+            controller = build_controller(intersection_id, name, phases)
+            repository.add(controller)
+        except (DomainError, ValueError) as exc:
+            errors.append((number, str(exc)))
+            continue
+        imported += 1
+        if broker.has_subscribers():
+            with repository.locked(intersection_id) as current:
+                snapshot = current.state_snapshot()
+            broker.publish("config", intersection_id, snapshot)
+    return imported, errors
+
+
+async def _numbered_lines(
+    stream: AsyncIterator[bytes],
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Непустые строки потока с номерами. Строка длиннее `max_line_bytes`
+    отдаётся как None, а её остаток отбрасывается по мере чтения, так что
+    буфер не превышает предела (плюс один блок потока).
+    """
+    buffer = b""
+    number = 0
+    # Текущая строка уже превысила предел: её хвост до \n пропускается.
+    skipping = False
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if skipping or len(line) > max_line_bytes:
+                skipping = False
+                yield number, None
+            elif line.strip():
+                yield number, line
+        if len(buffer) > max_line_bytes:
+            skipping = True
+            buffer = b""
+    if skipping:
+        yield number + 1, None
+    elif buffer.strip():
+        yield number + 1, buffer
+
+
+async def import_ndjson(
+    stream: AsyncIterator[bytes],
+    chunk_size: int = 1000,
+    executor: Optional[Executor] = None,
+    repository: Optional[InMemoryIntersectionRepository] = None,
+    max_in_flight: int = 1,
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> dict:
+    """
+    Потоковый импорт NDJSON с конфигурациями перекрёстков.
+
+    Строки читаются из потока и обрабатываются пачками по `chunk_size`:
+    проверка (в `executor` — пуле процессов — или в потоке), затем
+    сохранение пачки в репозиторий в исходном порядке. Одновременно
+    проверяется не больше `max_in_flight` пачек, а строки длиннее
+    `max_line_bytes` отклоняются, поэтому память ограничена независимо
+    от размера файла.
+    """
+    repository = repo if repository is None else repository
+    loop = asyncio.get_running_loop()
+    report = {"imported": 0, "failed": 0, "errors": []}
+    pending: Deque["asyncio.Future[List[ValidatedLine]]"] = deque()
+
+    async def commit_oldest() -> None:
+        results = await pending.popleft()
+        imported, errors = await asyncio.to_thread(
+            commit_validated,
+            results,
+            repository,
+        )
+        report["imported"] += imported
+        report["failed"] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(report["errors"])
+        report["errors"].extend(
+            {"line": number, "error": error} for number, error in errors[:room]
+        )
+
+    async def submit(chunk: List[Tuple[int, Optional[bytes]]]) -> None:
+        pending.append(loop.run_in_executor(executor, validate_config_lines, chunk))
+        if len(pending) >= max_in_flight:
+            await commit_oldest()
+
+    chunk: List[Tuple[int, Optional[bytes]]] = []
+    async for item in _numbered_lines(stream, max_line_bytes):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            await submit(chunk)
+            chunk = []
+    if chunk:
+        await submit(chunk)
+    while pending:
+        await commit_oldest()
+
+    return report
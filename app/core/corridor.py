@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .domain import Direction, PhasePlan, SignalColor, TrafficController
+from .exceptions import InvalidCorridor
+
+# Число проходов покоординатного улучшения после жадной расстановки.
+OPTIMIZER_SWEEPS = 6
+# Во сколько раз момент цикла весомее, если в него зелёный ещё у одного
+# перекрёстка коридора.
+_MOMENT_WEIGHT = 4.0
+
+
+@dataclass(frozen=True)
+class CorridorPlan:
+    """
+    Результат оптимизации "зелёной волны".
+
+    `offsets[i]` — на сколько секунд позиция в цикле i-го перекрёстка должна
+    опережать позицию первого; `bandwidth_*` — ширина ленты (секунды цикла,
+    в которые можно проехать весь коридор без остановки) в прямом и
+    обратном направлении.
+    """
+
+    intersection_ids: List[str]
+    offsets: List[int]
+    cycle_length: int
+    travel_times: List[int]
+    bandwidth_outbound: int
+    bandwidth_inbound: int
+
+
+def green_profile(plan: PhasePlan, direction: Direction) -> np.ndarray:
+    """
+    Для каждой секунды цикла — горит ли GREEN для `direction`.
+    """
+    green = np.array(
+        [phase.states.get(direction) == SignalColor.GREEN for phase in plan.phases],
+    )
+    return np.repeat(green, np.frombuffer(plan.durations, dtype=np.int64))
+
+
+def travel_times(segment_lengths: Sequence[float], speed_kmh: float) -> np.ndarray:
+    """
+    Время проезда от первого перекрёстка до каждого, секунды (округлено).
+    """
+    distances = np.concatenate(([0.0], np.cumsum(segment_lengths, dtype=float)))
+    return np.rint(distances / (speed_kmh / 3.6)).astype(np.int64)
+
+
+def _bandwidth(aligned: np.ndarray) -> int:
+    return int(np.all(aligned, axis=0).sum())
+
+
+def optimize_offsets(
+    greens: np.ndarray,
+    travel: np.ndarray,
+    sweeps: int = OPTIMIZER_SWEEPS,
+) -> Tuple[np.ndarray, int, int]:
+    """
+    Подобрать смещения перекрёстков, максимизирующие ширину зелёной ленты
+    в обоих направлениях.
+
+    `greens` — (N, C) профили зелёного на общем цикле C, `travel` — время
+    проезда до каждого перекрёстка. Машина, проехавшая первый перекрёсток
+    в момент t, видит на i-м позицию `offset_i + t + travel_i` (в обратном
+    направлении — `offset_i + t - travel_i`). Ширина ленты — число t, при
+    которых зелёный на всех перекрёстках.
+
+    Для перекрёстка сразу оцениваются все C кандидатов: матрица (C, C)
+    "кандидат × момент" строится одной выборкой из профиля со сдвигом и
+    умножается на веса моментов. Вес момента растёт в `_MOMENT_WEIGHT` раз
+    с каждым перекрёстком, у которого в этот момент зелёный: моменты ленты
+    весят больше всего, а там, где общей ленты ещё нет, поиск тянется
+    к моментам, где зелёный у большинства. Сначала перекрёстки
+    расставляются жадно по порядку, затем несколько проходов улучшают
+    каждое смещение при фиксированных остальных. Число зелёных по моментам
+    поддерживается счётчиками, поэтому шаг стоит O(C^2) независимо от
+    длины коридора.
+
+    Возвращает (смещения, где offsets[0] == 0, лента туда, лента обратно).
+    """
+    count, cycle = greens.shape
+    moments = np.arange(cycle)
+    circulant = (moments[:, None] + moments[None, :]) % cycle
+    offsets = np.zeros(count, dtype=np.int64)
+
+    def aligned(i: int, offset: int, sign: int) -> np.ndarray:
+        return greens[i][(offset + moments + sign * travel[i]) % cycle]
+
+    def best(
+        i: int, others: int, without_out: np.ndarray, without_in: np.ndarray
+    ) -> int:
+        # others — сколько перекрёстков, кроме i, учитывается в счётчиках
+        # (строки ещё не расставленных нулевые).
+        score = greens[i][(circulant + travel[i]) % cycle] @ _MOMENT_WEIGHT ** (
+            without_out - others
+        ).astype(float)
+        score += greens[i][(circulant - travel[i]) % cycle] @ _MOMENT_WEIGHT ** (
+            without_in - others
+        ).astype(float)
+        return int(np.argmax(score))
+
+    rows_out = np.zeros((count, cycle), dtype=bool)
+    rows_in = np.zeros((count, cycle), dtype=bool)
+    rows_out[0] = aligned(0, 0, 1)
+    rows_in[0] = aligned(0, 0, -1)
+    placed_out = rows_out[0].astype(np.int64)
+    placed_in = rows_in[0].astype(np.int64)
+
+    for i in range(1, count):
+        offsets[i] = best(i, i, placed_out, placed_in)
+        rows_out[i] = aligned(i, offsets[i], 1)
+        rows_in[i] = aligned(i, offsets[i], -1)
+        placed_out += rows_out[i]
+        placed_in += rows_in[i]
+
+    for _ in range(sweeps):
+        changed = False
+        for i in range(1, count):
+            without_out = placed_out - rows_out[i]
+            without_in = placed_in - rows_in[i]
+            offset = best(i, count - 1, without_out, without_in)
+            if offset != offsets[i]:
+                changed = True
+                offsets[i] = offset
+                rows_out[i] = aligned(i, offset, 1)
+                rows_in[i] = aligned(i, offset, -1)
+                placed_out = without_out + rows_out[i]
+                placed_in = without_in + rows_in[i]
+        if not changed:
+            break
+
+    return offsets, _bandwidth(rows_out), _bandwidth(rows_in)
+
+
+def plan_corridor(
+    controllers: Sequence[TrafficController],
+    segment_lengths: Sequence[float],
+    speed_kmh: float,
+    direction: Direction = Direction.NS,
+) -> CorridorPlan:
+    """
+    Рассчитать смещения для коридора (перекрёстки в порядке следования).
+
+    Все перекрёстки должны иметь общую длину цикла. Результат не зависит
+    от текущего состояния контроллеров.
+    """
+    if len(controllers) < 2:
+        raise InvalidCorridor("Corridor needs at least two intersections")
+    ids = [c.id for c in controllers]
+    if len(set(ids)) != len(ids):
+        raise InvalidCorridor("Corridor intersections must be distinct")
+    if len(segment_lengths) != len(controllers) - 1:
+        raise InvalidCorridor(
+            "segment_lengths must have one value per pair of adjacent intersections",
+        )
+    if any(length <= 0 for length in segment_lengths) or speed_kmh <= 0:
+        raise InvalidCorridor("Segment lengths and speed must be positive")
+
+    cycles = {c.cycle_length for c in controllers}
+    if len(cycles) != 1:
+        raise InvalidCorridor(
+            f"Corridor intersections must share one cycle length, got {sorted(cycles)}",
+        )
+
+    profiles: Dict[PhasePlan, np.ndarray] = {}
+    for controller in controllers:
+        if controller.plan not in profiles:
+            profiles[controller.plan] = green_profile(controller.plan, direction)
+    greens = np.stack([profiles[c.plan] for c in controllers])
+    if not greens.any(axis=1).all():
+        raise InvalidCorridor(
+            f"Every corridor intersection needs a GREEN phase for {direction.value}",
+        )
+
+    travel = travel_times(segment_lengths, speed_kmh)
+    offsets, outbound, inbound = optimize_offsets(greens, travel)
+    return CorridorPlan(
+        intersection_ids=ids,
+        offsets=offsets.tolist(),
+        cycle_length=cycles.pop(),
+        travel_times=travel.tolist(),
+        bandwidth_outbound=outbound,
+        bandwidth_inbound=inbound,
+    )
+
+
+def cycle_position(controller: TrafficController) -> int:
+    index, elapsed = controller.locate()
+    return controller.plan.offsets[index] + elapsed
+
+
+def apply_offsets(
+    controllers: Sequence[TrafficController],
+    plan: CorridorPlan,
+) -> List[int]:
+    """
+    Сдвинуть контроллеры так, чтобы их позиции в цикле опережали позицию
+    первого на `plan.offsets`. Вызывать, держа локи всех перекрёстков
+    коридора. Сдвиг выполняется через tick (вперёд по циклу); возвращает
+    сдвиги в секундах.
+    """
+    reference = cycle_position(controllers[0])
+    shifts: List[int] = []
+    for controller, offset in zip(controllers, plan.offsets):
+        target = (reference + offset) % plan.cycle_length
+        shift = (target - cycle_position(controller)) % plan.cycle_length
+        if shift:
+            controller.tick(shift)
+        shifts.append(shift)
+    return shifts
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .exceptions import InvalidSimulation
+from .fleet import FleetEngine
+from .traffic import FleetQueues, QueueSimulationResult
+
+# Максимальная длительность прогона, секунды (неделя).
+MAX_SIMULATION_DURATION = 7 * 24 * 3600
+
+# Виды событий в порядке обработки при совпадении времени: сначала
+# переходы фаз (очереди досчитываются со старой фазой), затем смена спроса
+# и отчёт за интервал.
+_PHASE, _DEMAND, _REPORT = range(3)
+
+
+@dataclass
+class DiscreteEventResult:
+    """
+    Итоги прогона: очереди по перекрёсткам, число переходов фаз и
+    обработанных событий, показатели по интервалам отчёта.
+    """
+
+    queues: QueueSimulationResult
+    transitions: int
+    events: int
+    intervals: List[dict] = field(default_factory=list)
+
+
+class DiscreteEventSimulation:
+    """
+    Событийное моделирование парка: виртуальное время сразу переходит к
+    ближайшему событию из очереди с приоритетом (heapq).
+
+    События — переходы фаз перекрёстков, смены интенсивности прибытия
+    (`schedule_demand`) и отчёты за интервал. Переходы, совпадающие по
+    времени, хранятся одной пачкой строк и обрабатываются векторно, поэтому
+    стоимость прогона пропорциональна числу переходов (и числу различных
+    моментов), а не числу смоделированных секунд. Между событиями у
+    перекрёстка ничего не меняется, и его очереди досчитываются в закрытом
+    виде (`FleetQueues`) только в момент его следующего события.
+
+    Исходный `engine` не продвигается до конца `run`; контроллеры не
+    меняются.
+    """
+
+    def __init__(
+        self,
+        engine: FleetEngine,
+        saturation_flows: Optional[np.ndarray] = None,
+    ) -> None:
+        self._engine = engine
+        self._queues = FleetQueues(engine, saturation_flows)
+        self._demand: List[Tuple[int, np.ndarray]] = []
+
+    def schedule_demand(self, at: int, arrival_rates: np.ndarray) -> None:
+        """
+        С момента `at` (секунды от начала) интенсивности прибытия равны
+        `arrival_rates` (авт/с, (D,) или (N, D)). До первой смены — ноль.
+        """
+        if at < 0:
+            raise InvalidSimulation("Demand change time must be non-negative")
+        self._demand.append((at, arrival_rates))
+
+    def run(
+        self,
+        duration: int,
+        report_interval: Optional[int] = None,
+    ) -> DiscreteEventResult:
+        if not 0 < duration <= MAX_SIMULATION_DURATION:
+            raise InvalidSimulation(
+                f"duration must be within 1..{MAX_SIMULATION_DURATION} seconds",
+            )
+        if report_interval is not None and report_interval <= 0:
+            raise InvalidSimulation("report_interval must be positive")
+        if any(at >= duration for at, _ in self._demand):
+            raise InvalidSimulation("Demand changes must happen before the end")
+
+        queues = self._queues
+        heap: List[tuple] = []
+        order = itertools.count()
+        # Момент -> когорты, у которых в этот момент переход; в куче каждый
+        # момент один раз.
+        batches: Dict[float, List[_Cohort]] = {}
+
+        def schedule(cohort: _Cohort, moment: float) -> None:
+            if moment > duration:
+                return
+            due = batches.get(moment)
+            if due is None:
+                due = batches[moment] = []
+                heapq.heappush(heap, (moment, _PHASE, next(order), None))
+            due.append(cohort)
+
+        for at, rates in self._demand:
+            heapq.heappush(heap, (float(at), _DEMAND, next(order), rates))
+        if report_interval is not None:
+            heapq.heappush(
+                heap,
+                (float(min(report_interval, duration)), _REPORT, next(order), None),
+            )
+
+        current = queues.current.copy()
+        last = np.zeros(len(queues))
+        for cohort, elapsed in _cohorts(self._engine):
+            schedule(cohort, float(cohort.lengths[cohort.phase] - elapsed))
+
+        arrived = np.zeros(len(queues))
+        demand_since = 0.0
+        transitions = events = 0
+        intervals: List[dict] = []
+        report = {"start": 0, "arrivals": 0.0, "queued": 0.0, "delay": 0.0}
+
+        def sync(moment: float) -> None:
+            # Досчитать очереди всех перекрёстков до `moment`.
+            queues.advance(current, (moment - last)[:, None])
+            last[:] = moment
+
+        def arrived_by(moment: float) -> np.ndarray:
+            return arrived + queues.arrivals.sum(axis=1) * (moment - demand_since)
+
+        def totals(moment: float) -> Tuple[float, float, float]:
+            return (
+                float(arrived_by(moment).sum()),
+                float(queues.queue.sum()),
+                float(queues.delay.sum()),
+            )
+
+        while heap:
+            moment, kind, _, payload = heapq.heappop(heap)
+            events += 1
+            if kind == _PHASE:
+                due = batches.pop(moment)
+                batch = (
+                    due[0].rows
+                    if len(due) == 1
+                    else np.concatenate([cohort.rows for cohort in due])
+                )
+                queues.advance(current[batch], (moment - last[batch])[:, None], batch)
+                last[batch] = moment
+                current[batch] = queues.following[current[batch]]
+                transitions += len(batch)
+                for cohort in due:
+                    cohort.phase = (cohort.phase + 1) % len(cohort.lengths)
+                    schedule(cohort, moment + cohort.lengths[cohort.phase])
+            elif kind == _DEMAND:
+                sync(moment)
+                arrived = arrived_by(moment)
+                demand_since = moment
+                queues.set_arrivals(payload)
+            else:
+                sync(moment)
+                arrivals, queued, delay = totals(moment)
+                intervals.append(
+                    _interval(report, int(moment), arrivals, queued, delay),
+                )
+                report = {
+                    "start": int(moment),
+                    "arrivals": arrivals,
+                    "queued": queued,
+                    "delay": delay,
+                }
+                if moment < duration:
+                    following = min(moment + report_interval, duration)
+                    heapq.heappush(heap, (following, _REPORT, next(order), None))
+
+        sync(float(duration))
+        self._engine.advance(duration)
+        result = queues.result(
+            self._engine.ids, duration, arrived_by(float(duration)), events
+        )
+        return DiscreteEventResult(result, transitions, events, intervals)
+
+
+class _Cohort:
+    """
+    Перекрёстки с одинаковыми длительностями фаз и одинаковой позицией в
+    цикле: их переходы всегда совпадают по времени, поэтому в очереди
+    событий они — одно событие на переход, без разбиения строк.
+    """
+
+    __slots__ = ("rows", "lengths", "phase")
+
+    def __init__(self, rows: np.ndarray, lengths: Tuple[int, ...], phase: int):
+        self.rows = rows
+        self.lengths = lengths
+        self.phase = phase
+
+
+def _cohorts(engine: FleetEngine) -> List[Tuple[_Cohort, int]]:
+    """
+    Сгруппировать строки движка в когорты; возвращает (когорта, сколько
+    секунд уже прошло в текущей фазе).
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for row, (durations, index, elapsed) in enumerate(
+        zip(
+            engine.durations.tolist(),
+            engine.current_index.tolist(),
+            engine.elapsed_in_phase.tolist(),
+        ),
+    ):
+        lengths = tuple(d for d in durations if d > 0)
+        groups.setdefault((lengths, index, elapsed), []).append(row)
+    return [
+        (_Cohort(np.array(rows), lengths, index), elapsed)
+        for (lengths, index, elapsed), rows in groups.items()
+    ]
+
+
+def _interval(
+    report: dict,
+    end: int,
+    arrivals: float,
+    queued: float,
+    delay: float,
+) -> dict:
+    """
+    Показатели парка за интервал отчёта: прибывшие, проехавшие (баланс
+    с изменением очередей), задержка и очередь на конец интервала.
+    """
+    arrived = arrivals - report["arrivals"]
+    return {
+        "start": report["start"],
+        "end": end,
+        "arrivals": round(arrived, 3),
+        "throughput": round(arrived - (queued - report["queued"]), 3),
+        "total_delay": round(delay - report["delay"], 3),
+        "queued": round(queued, 3),
+    }
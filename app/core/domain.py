@@ -1,22 +1,43 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from .exceptions import InvalidPhaseConfiguration
 
 
 class Direction(str, Enum):
     """
-    Направления движения на перекрёстке.
+    Направления (движения) на перекрёстке.
 
-    Для упрощения — две оси:
-    - NS (North–South)
-    - EW (East–West)
+    - NS, EW — прямое движение по осям North–South и East–West;
+    - NS_LEFT, EW_LEFT — левые повороты с этих осей;
+    - NS_PED, EW_PED — пешеходы, идущие вдоль оси (пересекают другую дорогу).
+
+    NS и EW обязательны в каждой фазе, остальные движения — по необходимости.
     """
     NS = "NS"
     EW = "EW"
+    NS_LEFT = "NS_LEFT"
+    EW_LEFT = "EW_LEFT"
+    NS_PED = "NS_PED"
+    EW_PED = "EW_PED"
 
 
 class SignalColor(str, Enum):
@@ -29,7 +50,7 @@ class SignalColor(str, Enum):
     GREEN = "GREEN"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Phase:
     """
     Описание одной фазы цикла светофора.
@@ -40,36 +61,189 @@ class Phase:
     states: Dict[Direction, SignalColor]
 
 
-class TrafficController:
+# Компактное кодирование сигналов: 2 бита на направление
+# (0 — сигнал не задан, далее RED/YELLOW/GREEN).
+SIGNAL_BITS = 2
+_DIRECTIONS: Tuple[Direction, ...] = tuple(Direction)
+_BITS: Dict[Direction, int] = {
+    direction: bit for bit, direction in enumerate(_DIRECTIONS)
+}
+_COLORS: Tuple[Optional[SignalColor], ...] = (
+    None,
+    SignalColor.RED,
+    SignalColor.YELLOW,
+    SignalColor.GREEN,
+)
+_COLOR_CODES: Dict[SignalColor, int] = {
+    color: code for code, color in enumerate(_COLORS) if color is not None
+}
+
+
+def encode_signals(states: Dict[Direction, SignalColor]) -> int:
     """
-    Управляет фазами светофора на одном перекрёстке.
+    Упаковать состояния сигналов в битовую маску (2 бита на направление,
+    в порядке объявления `Direction`).
+    """
+    mask = 0
+    for position, direction in enumerate(_DIRECTIONS):
+        color = states.get(direction)
+        if color is not None:
+            mask |= _COLOR_CODES[color] << (position * SIGNAL_BITS)
+    return mask
 
-    Основные обязанности:
-    - хранит набор фаз;
-    - обеспечивает переход между фазами;
-    - проверяет, что конфигурация безопасна (нет конфликтующих зелёных);
-    - предоставляет "снимок" текущего состояния.
+
+def decode_signals(mask: int) -> Dict[str, str]:
+    """
+    Обратное преобразование маски в словарь `{направление: цвет}` для API.
     """
+    signals: Dict[str, str] = {}
+    for position, direction in enumerate(_DIRECTIONS):
+        color = _COLORS[(mask >> (position * SIGNAL_BITS)) & 0b11]
+        if color is not None:
+            signals[direction.value] = color.value
+    return signals
 
-    def __init__(self, intersection_id: str, name: str, phases: List[Phase]):
-        if not phases:
-            raise ValueError("At least one phase is required")
 
-        self.id = intersection_id
-        self.name = name
-        self.phases = phases
-        self.current_index = 0
-        self.elapsed_in_phase = 0
+class ConflictMatrix:
+    """
+    Матрица конфликтов движений: какие движения не могут одновременно
+    получить GREEN.
+
+    Компилируется в битовые множества: для каждого движения — маска
+    конфликтующих с ним движений. Память линейна по числу движений, а
+    проверка фазы — по одному AND с маской зелёных на каждое зелёное
+    движение, без перебора пар.
+    """
 
-        self._validate_phases()
+    __slots__ = ("pairs", "_conflicts")
 
-    def _validate_phases(self) -> None:
+    def __init__(self, pairs: Iterable[Tuple[Direction, Direction]]):
+        normalized = set()
+        for first, second in pairs:
+            first, second = Direction(first), Direction(second)
+            if first == second:
+                raise InvalidPhaseConfiguration(
+                    f"Movement {first.value} cannot conflict with itself",
+                )
+            normalized.add(tuple(sorted((first, second), key=_DIRECTIONS.index)))
+        self.pairs: Tuple[Tuple[Direction, Direction], ...] = tuple(
+            sorted(normalized, key=lambda p: (_BITS[p[0]], _BITS[p[1]])),
+        )
+
+        # _conflicts[бит движения] = маска конфликтующих с ним движений
+        conflicts = [0] * len(_DIRECTIONS)
+        for first, second in self.pairs:
+            conflicts[_BITS[first]] |= 1 << _BITS[second]
+            conflicts[_BITS[second]] |= 1 << _BITS[first]
+        self._conflicts: Tuple[int, ...] = tuple(conflicts)
+
+    def conflicting(self, green_mask: int) -> int:
         """
-        Простейшее правило безопасности:
-        NS и EW не могут одновременно быть GREEN в одной фазе.
+        Движения из `green_mask`, конфликтующие с другими зелёными
+        (0 — фаза безопасна).
+        """
+        result = 0
+        remaining = green_mask
+        while remaining:
+            lowest = remaining & -remaining
+            if self._conflicts[lowest.bit_length() - 1] & green_mask:
+                result |= lowest
+            remaining ^= lowest
+        return result
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ConflictMatrix) and self.pairs == other.pairs
 
-        Здесь можно было бы добавить более сложную матрицу конфликтов,
-        но для учебного проекта достаточно такого правила.
+    def __hash__(self) -> int:
+        return hash(self.pairs)
+
+
+# Матрица по умолчанию: прямые потоки пересекающихся осей, левые повороты
+# с прямым встречным и поперечным движением, пешеходы с поперечным потоком
+# и левыми поворотами, пересекающими их переход.
+DEFAULT_CONFLICTS = ConflictMatrix(
+    [
+        (Direction.NS, Direction.EW),
+        (Direction.NS, Direction.NS_LEFT),
+        (Direction.NS, Direction.EW_LEFT),
+        (Direction.NS, Direction.EW_PED),
+        (Direction.EW, Direction.EW_LEFT),
+        (Direction.EW, Direction.NS_LEFT),
+        (Direction.EW, Direction.NS_PED),
+        (Direction.NS_LEFT, Direction.EW_LEFT),
+        (Direction.NS_LEFT, Direction.NS_PED),
+        (Direction.EW_LEFT, Direction.EW_PED),
+    ],
+)
+
+
+def green_mask(states: Dict[Direction, SignalColor]) -> int:
+    """
+    Битовое множество движений с GREEN (бит на движение).
+    """
+    mask = 0
+    for direction, color in states.items():
+        if color == SignalColor.GREEN:
+            mask |= 1 << _BITS[direction]
+    return mask
+
+
+class PhasePlan:
+    """
+    Неизменяемый план фаз, общий для всех перекрёстков с одинаковой
+    конфигурацией.
+
+    Хранит фазы и их колонки: имена, длительности, маски сигналов
+    (`array`, 2 бита на направление), смещения начала каждой фазы от начала
+    цикла и длину цикла. Проверка безопасности по матрице конфликтов
+    выполняется один раз при создании плана, а не для каждого перекрёстка.
+    Экземпляры выдаёт `PhasePlanRegistry.intern()`.
+    """
+
+    __slots__ = (
+        "phases",
+        "names",
+        "durations",
+        "masks",
+        "offsets",
+        "cycle_length",
+        "conflicts",
+        "key",
+        "_fragments",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        phases: Sequence[Phase],
+        conflicts: Optional[ConflictMatrix] = None,
+        key: Optional[tuple] = None,
+    ):
+        self.phases: Tuple[Phase, ...] = tuple(phases)
+        self.conflicts = DEFAULT_CONFLICTS if conflicts is None else conflicts
+        self._validate()
+
+        self.names: Tuple[str, ...] = tuple(phase.name for phase in self.phases)
+        self.durations = array("q", (phase.duration for phase in self.phases))
+        self.masks = array("I", (encode_signals(p.states) for p in self.phases))
+        self.offsets = array("q")
+        cycle = 0
+        for duration in self.durations:
+            self.offsets.append(cycle)
+            cycle += duration
+        self.cycle_length = cycle
+        self.key = plan_key(self.phases, self.conflicts) if key is None else key
+        self._fragments: Optional[List[Tuple[bytes, bytes]]] = None
+
+    def _validate(self) -> None:
+        """
+        Правила безопасности:
+        - у каждой фазы положительная длительность и заданы NS и EW;
+        - движения, конфликтующие по матрице, не бывают GREEN одновременно.
+
+        Проверка фазы по матрице — одно AND на каждое зелёное движение
+        фазы (`ConflictMatrix.conflicting`), без перебора пар: стоимость
+        линейна по числу фаз и по числу зелёных движений в фазе.
         """
         if not self.phases:
             raise InvalidPhaseConfiguration("No phases configured")
@@ -80,50 +254,216 @@ class TrafficController:
                     f"Phase {phase.name} must have positive duration",
                 )
 
-            ns = phase.states.get(Direction.NS)
-            ew = phase.states.get(Direction.EW)
-
-            if ns is None or ew is None:
+            if Direction.NS not in phase.states or Direction.EW not in phase.states:
                 raise InvalidPhaseConfiguration(
                     f"Phase {phase.name} must define NS and EW states",
                 )
 
-            if ns == SignalColor.GREEN and ew == SignalColor.GREEN:
+            conflicting = self.conflicts.conflicting(green_mask(phase.states))
+            if conflicting:
+                movements = "/".join(
+                    d.value for d in _DIRECTIONS if conflicting & (1 << _BITS[d])
+                )
                 raise InvalidPhaseConfiguration(
-                    f"Conflicting GREEN signals in phase {phase.name}",
+                    f"Conflicting GREEN signals in phase {phase.name}: {movements}",
                 )
 
+    def __len__(self) -> int:
+        return len(self.phases)
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """
+        (индекс фазы, время в фазе) для позиции внутри цикла.
+        """
+        index = bisect_right(self.offsets, position) - 1
+        return index, position - self.offsets[index]
+
+    def transitions(self, index: int, elapsed: int, seconds: int) -> int:
+        """
+        Сколько переходов между фазами происходит за `seconds` секунд,
+        начиная с фазы `index`, в которой прошло `elapsed` секунд.
+        """
+        cycles, position = divmod(
+            self.offsets[index] + elapsed + seconds, self.cycle_length
+        )
+        return cycles * len(self.durations) + self.locate(position)[0] - index
+
+    def signals(self, index: int) -> Dict[str, str]:
+        """
+        Сигналы фазы `index` в виде словаря для API.
+        """
+        return decode_signals(self.masks[index])
+
+    def state_fragments(self) -> List[Tuple[bytes, bytes]]:
+        """
+        Сериализованные неизменные части JSON-ответа для каждой фазы
+        (без полей перекрёстка): фрагмент до `elapsed_in_phase` и после.
+
+        Строится при первом запросе состояния и разделяется всеми
+        перекрёстками с этим планом.
+        """
+        if self._fragments is None:
+            fragments: List[Tuple[bytes, bytes]] = []
+            for index, name in enumerate(self.names):
+                head = f'"phase_name":{_encode_json(name)},"elapsed_in_phase":'
+                tail = (
+                    f',"phase_duration":{self.durations[index]},'
+                    f'"signals":{_encode_json(self.signals(index))}}}'
+                )
+                fragments.append((head.encode(), tail.encode()))
+            self._fragments = fragments
+        return self._fragments
+
+
+def plan_key(
+    phases: Sequence[Phase],
+    conflicts: Optional[ConflictMatrix] = None,
+) -> tuple:
+    """
+    Нормализованный ключ плана: фазы с состояниями, отсортированными
+    по направлению, и матрица конфликтов. Два плана с одинаковым ключом
+    взаимозаменяемы.
+    """
+    return (
+        tuple(
+            (
+                phase.name,
+                phase.duration,
+                tuple(sorted((d.value, c.value) for d, c in phase.states.items())),
+            )
+            for phase in phases
+        ),
+        DEFAULT_CONFLICTS if conflicts is None else conflicts,
+    )
+
+
+class PhasePlanRegistry:
+    """
+    Реестр планов фаз ("интернирование").
+
+    Перекрёстки с одинаковой конфигурацией получают один и тот же объект
+    `PhasePlan`, поэтому фазы, смещения и JSON-фрагменты хранятся в памяти
+    один раз на план, а не на перекрёсток. Планы, на которые больше никто
+    не ссылается, удаляются из реестра автоматически (слабые ссылки).
+    """
+
+    def __init__(self) -> None:
+        self._plans: "weakref.WeakValueDictionary[tuple, PhasePlan]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def intern(
+        self,
+        phases: Union[Sequence[Phase], PhasePlan],
+        conflicts: Optional[ConflictMatrix] = None,
+    ) -> PhasePlan:
+        """
+        Вернуть общий план для данного набора фаз и матрицы конфликтов
+        (по умолчанию `DEFAULT_CONFLICTS`), создав его при необходимости.
+        Некорректная конфигурация даёт `InvalidPhaseConfiguration`.
+        """
+        if isinstance(phases, PhasePlan):
+            if conflicts is None or conflicts == phases.conflicts:
+                return phases
+            phases = phases.phases
+        key = plan_key(phases, conflicts)
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                plan = PhasePlan(phases, conflicts, key)
+                self._plans[key] = plan
+            return plan
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+plan_registry = PhasePlanRegistry()
+
+
+def _encode_json(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class TrafficController:
+    """
+    Управляет фазами светофора на одном перекрёстке.
+
+    Основные обязанности:
+    - хранит ссылку на общий план фаз и своё состояние (фаза, время в ней);
+    - обеспечивает переход между фазами;
+    - проверяет, что конфигурация безопасна (нет конфликтующих зелёных);
+    - предоставляет "снимок" текущего состояния.
+    """
+
+    # Перекрёстков могут быть сотни тысяч: без __dict__ на каждый.
+    __slots__ = (
+        "id",
+        "name",
+        "plan",
+        "current_index",
+        "elapsed_in_phase",
+        "_state_prefix",
+    )
+
+    def __init__(
+        self,
+        intersection_id: str,
+        name: str,
+        phases: Union[Sequence[Phase], PhasePlan],
+    ):
+        if not phases:
+            raise ValueError("At least one phase is required")
+
+        self.id = intersection_id
+        self.name = name
+        self.plan = plan_registry.intern(phases)
+
+        self._state_prefix: Optional[bytes] = None
+        self.reset()
+
+    @property
+    def phases(self) -> Tuple[Phase, ...]:
+        return self.plan.phases
+
+    @property
+    def cycle_length(self) -> int:
+        return self.plan.cycle_length
+
+    # Следует ли контроллер реальному времени сам (без вызовов tick).
+    follows_clock = False
+
     @property
     def current_phase(self) -> Phase:
         return self.phases[self.current_index]
 
-    def _next_phase(self) -> None:
+    def seconds_to_next_transition(self) -> int:
         """
-        Перейти к следующей фазе цикла по кругу.
+        Сколько секунд осталось до конца текущей фазы.
         """
-        self.current_index = (self.current_index + 1) % len(self.phases)
-        self.elapsed_in_phase = 0
+        index, elapsed = self.locate()
+        return self.plan.durations[index] - elapsed
 
     def tick(self, seconds: int) -> None:
         """
         Продвинуть симуляцию на указанное число секунд.
 
-        Может произойти несколько переходов между фазами.
+        Может произойти несколько переходов между фазами. Стоимость не
+        зависит от `seconds`: позиция в цикле берётся по модулю длины
+        цикла, а фаза находится бинарным поиском по смещениям фаз.
         """
         if seconds < 0:
             raise ValueError("seconds must be non-negative")
 
-        remaining = seconds
-        while remaining > 0:
-            phase = self.current_phase
-            time_left = phase.duration - self.elapsed_in_phase
-
-            if remaining < time_left:
-                self.elapsed_in_phase += remaining
-                remaining = 0
-            else:
-                remaining -= time_left
-                self._next_phase()
+        plan = self.plan
+        position = (
+            plan.offsets[self.current_index] + self.elapsed_in_phase + seconds
+        ) % plan.cycle_length
+        self.current_index, self.elapsed_in_phase = plan.locate(position)
 
     def reset(self) -> None:
         """
@@ -132,20 +472,106 @@ class TrafficController:
         self.current_index = 0
         self.elapsed_in_phase = 0
 
+    def locate(self) -> Tuple[int, int]:
+        """
+        Текущая пара (индекс фазы, время в фазе), прочитанная согласованно.
+        """
+        return self.current_index, self.elapsed_in_phase
+
+    def state_json(self) -> bytes:
+        """
+        Готовый JSON снимка состояния (то же, что `state_snapshot()`),
+        без построения промежуточного dict и Pydantic-моделей.
+
+        Неизменные части ответа готовятся заранее: фрагменты фаз общие для
+        плана, префикс с id и именем — свой у перекрёстка. Между запросами
+        меняется только `elapsed_in_phase`. Формат совпадает с
+        JSON-сериализацией `state_snapshot()` в FastAPI.
+        """
+        if self._state_prefix is None:
+            self._state_prefix = (
+                f'{{"intersection_id":{_encode_json(self.id)},'
+                f'"intersection_name":{_encode_json(self.name)},'
+            ).encode()
+        index, elapsed = self.locate()
+        head, tail = self.plan.state_fragments()[index]
+        return b"%s%s%d%s" % (self._state_prefix, head, elapsed, tail)
+
     def state_snapshot(self) -> dict:
         """
         Получить "снимок" текущего состояния перекрёстка.
         Используется для сериализации в REST API.
+
+        Словарь сигналов восстанавливается из битовой маски фазы только здесь,
+        на границе API.
         """
-        phase = self.current_phase
+        index, elapsed = self.locate()
+        plan = self.plan
         return {
             "intersection_id": self.id,
             "intersection_name": self.name,
-            "phase_name": phase.name,
-            "elapsed_in_phase": self.elapsed_in_phase,
-            "phase_duration": phase.duration,
-            "signals": {
-                direction.value: color.value
-                for direction, color in phase.states.items()
-            },
+            "phase_name": plan.names[index],
+            "elapsed_in_phase": elapsed,
+            "phase_duration": plan.durations[index],
+            "signals": plan.signals(index),
         }
+
+
+class WallClockTrafficController(TrafficController):
+    """
+    Контроллер, следующий реальному времени ("ленивый" режим).
+
+    Хранит только момент привязки (epoch) и смещение; текущая фаза и время
+    в ней вычисляются из часов в момент чтения. Поэтому простаивающие
+    перекрёстки не требуют фонового цикла с tick(1).
+
+    - `tick(seconds)` сдвигает контроллер вперёд относительно часов;
+    - `reset()` заново привязывает начало первой фазы к текущему моменту.
+    """
+
+    __slots__ = ("_clock", "_epoch", "_offset")
+
+    follows_clock = True
+
+    def __init__(
+        self,
+        intersection_id: str,
+        name: str,
+        phases: List[Phase],
+        clock: Callable[[], float] = time.time,
+    ):
+        self._clock = clock
+        super().__init__(intersection_id, name, phases)
+
+    def _position(self) -> int:
+        """
+        Позиция внутри цикла (секунды от начала первой фазы).
+        """
+        return (int(self._clock() - self._epoch) + self._offset) % self.cycle_length
+
+    def locate(self) -> Tuple[int, int]:
+        return self.plan.locate(self._position())
+
+    @property
+    def current_index(self) -> int:  # type: ignore[override]
+        return self.locate()[0]
+
+    @property
+    def elapsed_in_phase(self) -> int:  # type: ignore[override]
+        return self.locate()[1]
+
+    def tick(self, seconds: int) -> None:
+        """
+        Сдвинуть контроллер вперёд на `seconds` относительно часов.
+        """
+        if seconds < 0:
+            raise ValueError("seconds must be non-negative")
+
+        self._offset = (self._offset + seconds) % self.cycle_length
+
+    def reset(self) -> None:
+        """
+        Привязать начало первой фазы к текущему моменту.
+        """
+        self._epoch = self._clock()
+        self._offset = 0
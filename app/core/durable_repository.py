@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..utils.logging import get_logger
+from .domain import TrafficController, plan_registry
+from .exceptions import IntersectionNotFound, StorageError
+from .plain import (
+    conflicts_from_plain,
+    conflicts_to_plain,
+    phases_from_plain,
+    phases_to_plain,
+)
+from .repository import InMemoryIntersectionRepository
+
+logger = get_logger(__name__)
+
+# Уровни надёжности записи:
+# - none  — только write() в ОС, без fsync: при падении процесса теряются
+#   записи, ещё стоящие в очереди писателя, при отключении питания — и
+#   записанные, но не сброшенные ОС на диск;
+# - batch — fsync на каждую группу записей в фоне, запрос не ждёт: при
+#   падении процесса или питания теряется очередь и несброшенная группа;
+# - sync  — запрос ждёт fsync группы, в которую попала его запись.
+DURABILITY_LEVELS = ("none", "batch", "sync")
+
+
+class _Waiter:
+    """
+    Ожидание записи группы: событие и ошибка писателя, если она была.
+    """
+
+    __slots__ = ("event", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> None:
+        self.event.wait()
+        if self.error is not None:
+            raise StorageError(
+                f"Durable log write failed: {self.error}"
+            ) from self.error
+
+
+# Элемент очереди писателя: (id для схлопывания состояний, строка журнала,
+# ожидающий запрос); None — сигнал остановки.
+_LogItem = Tuple[Optional[str], bytes, Optional[_Waiter]]
+
+
+def _encode(record: dict) -> bytes:
+    return (
+        json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    ).encode()
+
+
+class DurableIntersectionRepository(InMemoryIntersectionRepository):
+    """
+    In-memory репозиторий с журналом изменений (append-only log) на диске.
+
+    Все операции выполняются в памяти, как в InMemoryIntersectionRepository;
+    изменения конфигурации (`add`), состояния (выход из `locked`),
+    удаления и очистки ставятся в очередь фоновому писателю. Писатель
+    собирает записи в группы (group commit), схлопывает повторные записи
+    состояния одного перекрёстка и пишет группу одним вызовом.
+
+    При открытии журнал проигрывается, после чего переписывается в
+    компактном виде (одна запись конфигурации на перекрёсток).
+
+    Если запись в журнал не удалась, ошибка передаётся всем ожидающим
+    запросам, а все последующие изменения сразу завершаются StorageError:
+    состояние в памяти уже расходится с журналом.
+
+    Поддерживаются только симулируемые контроллеры (не wall_clock).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        durability: str = "batch",
+        flush_interval: float = 0.05,
+        batch_size: int = 4096,
+        lock_stripes: int = 64,
+    ) -> None:
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        super().__init__(lock_stripes=lock_stripes)
+
+        self.path = path
+        self.durability = durability
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._queue: "queue.Queue[Optional[_LogItem]]" = queue.Queue()
+        # Первая ошибка записи журнала; после неё журнал не пишется.
+        self._error: Optional[BaseException] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self.compact()
+
+        self._file = open(path, "ab")
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            name="durable-repository-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    # --- Журнал ---
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        configs: Dict[str, dict] = {}
+        states: Dict[str, Tuple[int, int]] = {}
+        with open(self.path, "rb") as log:
+            for number, line in enumerate(log, start=1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Оборванная последняя строка после аварийного завершения.
+                    logger.warning(
+                        "Skipping corrupt log line %d in %s", number, self.path
+                    )
+                    continue
+                op = record["op"]
+                if op == "config":
+                    configs[record["id"]] = record
+                    states[record["id"]] = (record["index"], record["elapsed"])
+                elif op == "state":
+                    states[record["id"]] = (record["index"], record["elapsed"])
+                elif op == "delete":
+                    configs.pop(record["id"], None)
+                    states.pop(record["id"], None)
+                elif op == "clear":
+                    configs.clear()
+                    states.clear()
+
+        for intersection_id, record in configs.items():
+            controller = TrafficController(
+                intersection_id,
+                record["name"],
+                plan_registry.intern(
+                    phases_from_plain(record["phases"]),
+                    conflicts_from_plain(record.get("conflicts")),
+                ),
+            )
+            controller.current_index, controller.elapsed_in_phase = states[
+                intersection_id
+            ]
+            self._items[intersection_id] = controller
+        logger.info("Restored %d intersections from %s", len(configs), self.path)
+
+    def _config_record(self, controller: TrafficController) -> dict:
+        record = {
+            "op": "config",
+            "id": controller.id,
+            "name": controller.name,
+            "phases": phases_to_plain(controller.phases),
+            "index": controller.current_index,
+            "elapsed": controller.elapsed_in_phase,
+        }
+        conflicts = conflicts_to_plain(controller.plan.conflicts)
+        if conflicts is not None:
+            record["conflicts"] = conflicts
+        return record
+
+    def compact(self) -> None:
+        """
+        Переписать журнал: по одной записи конфигурации на перекрёсток.
+
+        Вызывается при открытии, до запуска писателя.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as tmp:
+            for controller in self.list():
+                with self.lock_for(controller.id):
+                    tmp.write(_encode(self._config_record(controller)))
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, key: Optional[str], line: bytes) -> None:
+        """
+        Поставить строку журнала в очередь писателя. `key` — id перекрёстка
+        для схлопывания записей состояния (None для остальных записей).
+        """
+        if self.durability != "sync":
+            self._queue.put((key, line, None))
+            return
+
+        waiter = _Waiter()
+        self._queue.put((key, line, waiter))
+        waiter.wait()
+
+    def _check_writer(self) -> None:
+        if self._error is not None:
+            raise StorageError(
+                f"Durable log is unavailable after a write failure: {self._error}"
+            ) from self._error
+
+    def _collect_batch(self) -> Tuple[List[bytes], List[_Waiter], bool]:
+        """
+        Дождаться первой записи и добрать группу: до `batch_size` записей
+        или пока не истечёт `flush_interval`.
+        """
+        lines: List[Optional[bytes]] = []
+        waiters: List[_Waiter] = []
+        last_state: Dict[str, int] = {}
+        stop = False
+
+        item = self._queue.get()
+        deadline = time.monotonic() + self._flush_interval
+        while True:
+            if item is None:
+                stop = True
+                break
+            key, line, done = item
+            if key is not None:
+                if key in last_state:
+                    lines[last_state[key]] = None
+                last_state[key] = len(lines)
+            lines.append(line)
+            if done is not None:
+                waiters.append(done)
+
+            if len(lines) >= self._batch_size:
+                break
+            timeout = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+
+        return [line for line in lines if line is not None], waiters, stop
+
+    def _write_loop(self) -> None:
+        # После ошибки поток продолжает разбирать очередь (без записи),
+        # чтобы ни один ожидающий запрос не завис.
+        while True:
+            lines, waiters, stop = self._collect_batch()
+            if lines and self._error is None:
+                try:
+                    self._file.write(b"".join(lines))
+                    self._file.flush()
+                    if self.durability != "none":
+                        os.fsync(self._file.fileno())
+                except Exception as exc:  # noqa: BLE001 - передаётся ожидающим
+                    logger.exception("Durable log write failed: %s", self.path)
+                    self._error = exc
+            for waiter in waiters:
+                waiter.error = self._error
+                waiter.event.set()
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """
+        Дождаться записи (и fsync) всего, что уже поставлено в очередь.
+        """
+        self._check_writer()
+        waiter = _Waiter()
+        self._queue.put((None, b"", waiter))
+        waiter.wait()
+
+    def close(self) -> None:
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join()
+        try:
+            self._file.close()
+        except OSError:
+            if self._error is None:
+                raise
+
+    # --- Операции репозитория ---
+
+    def add(self, controller: TrafficController) -> None:
+        if controller.follows_clock:
+            raise StorageError("Durable backend supports simulated mode only")
+        self._check_writer()
+        with self.lock_for(controller.id):
+            with self._items_lock:
+                self._items[controller.id] = controller
+            self._append(None, _encode(self._config_record(controller)))
+            self._notify(controller.id, controller)
+
+    @contextmanager
+    def locked(self, intersection_id: str) -> Iterator[TrafficController]:
+        self._check_writer()
+        with super().locked(intersection_id) as controller:
+            before = (controller.current_index, controller.elapsed_in_phase)
+            yield controller
+            after = (controller.current_index, controller.elapsed_in_phase)
+            if after != before:
+                # Самая частая запись — формируется без json.dumps.
+                line = b'{"op":"state","id":%s,"index":%d,"elapsed":%d}\n' % (
+                    json.dumps(intersection_id, ensure_ascii=False).encode(),
+                    after[0],
+                    after[1],
+                )
+                self._append(intersection_id, line)
+
+    def delete(self, intersection_id: str) -> None:
+        self._check_writer()
+        with self.lock_for(intersection_id):
+            with self._items_lock:
+                if intersection_id not in self._items:
+                    raise IntersectionNotFound(
+                        f"Intersection {intersection_id} not found",
+                    )
+                del self._items[intersection_id]
+            self._append(None, _encode({"op": "delete", "id": intersection_id}))
+            self._notify(intersection_id, None)
+
+    def clear(self) -> None:
+        self._check_writer()
+        super().clear()
+        self._append(None, _encode({"op": "clear"}))
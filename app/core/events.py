@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Dict, Iterable, Optional, Set
+
+# Ключ подписки "на все перекрёстки".
+ALL_INTERSECTIONS = "*"
+
+
+class Subscription:
+    """
+    Подписка одного клиента на события по набору перекрёстков.
+
+    События кладутся в ограниченную очередь уже закодированными в формат
+    Server-Sent Events. Если клиент не успевает читать, самые старые
+    события отбрасываются — медленный подписчик не тормозит остальных.
+    """
+
+    def __init__(self, intersection_ids: Optional[Iterable[str]], maxsize: int):
+        self.keys: Set[str] = (
+            {ALL_INTERSECTIONS} if intersection_ids is None else set(intersection_ids)
+        )
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, frame: bytes) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+
+class PhaseEventBroker:
+    """
+    Fan-out событий о смене фаз для потоковых подписчиков.
+
+    Публикация может происходить из любого потока (роуты синхронные и
+    выполняются в thread pool), доставка — в event loop, к которому
+    привязан брокер. Каждое событие кодируется один раз и раздаётся всем
+    подписчикам соответствующего перекрёстка.
+    """
+
+    def __init__(self, queue_size: int = 64) -> None:
+        self._queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(
+        self, intersection_ids: Optional[Iterable[str]] = None
+    ) -> Subscription:
+        """
+        Подписаться на события; без `intersection_ids` — на все перекрёстки.
+
+        Должен вызываться из event loop, в котором будут читаться события.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(intersection_ids, self._queue_size)
+        for key in subscription.keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+
+    def publish(self, event: str, intersection_id: str, state: Optional[dict]) -> None:
+        """
+        Опубликовать событие по перекрёстку. Без подписчиков почти бесплатно.
+        """
+        loop = self._loop
+        if not self._subscribers or loop is None or loop.is_closed():
+            return
+
+        payload = {"event": event, "intersection_id": intersection_id, "state": state}
+        frame = (
+            f"event: {event}\n"
+            f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+        ).encode()
+        loop.call_soon_threadsafe(self._dispatch, intersection_id, frame)
+
+    def _dispatch(self, intersection_id: str, frame: bytes) -> None:
+        for key in (intersection_id, ALL_INTERSECTIONS):
+            for subscription in tuple(self._subscribers.get(key, ())):
+                subscription.push(frame)
+
+
+broker = PhaseEventBroker()
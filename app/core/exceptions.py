@@ -14,3 +14,27 @@ class InvalidPhaseConfiguration(DomainError):
     """
     Ошибка в конфигурации фаз светофора (конфликтующие сигналы и т.п.).
     """
+
+
+class StorageError(DomainError):
+    """
+    Ошибка хранилища: исчерпана ёмкость, слишком длинный id и т.п.
+    """
+
+
+class InvalidCorridor(DomainError):
+    """
+    Некорректное описание коридора "зелёной волны".
+    """
+
+
+class InvalidSimulation(DomainError):
+    """
+    Некорректные параметры прогона моделирования.
+    """
+
+
+class TimelineTooLarge(DomainError):
+    """
+    Запрос переходов дал бы слишком много переходов (перекрёстки × окно).
+    """
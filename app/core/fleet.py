@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .domain import Phase, TrafficController
+from .exceptions import IntersectionNotFound
+
+# Смещение-заглушка для несуществующих фаз в выровненных таблицах:
+# больше любой позиции в цикле, поэтому никогда не попадает в поиск.
+_PAD_OFFSET = np.iinfo(np.int64).max
+
+
+class FleetIntersectionView:
+    """
+    Лёгкое представление одного перекрёстка внутри FleetEngine.
+
+    Повторяет read-only часть интерфейса TrafficController, но читает
+    состояние напрямую из массивов движка.
+    """
+
+    __slots__ = ("_engine", "id")
+
+    def __init__(self, engine: "FleetEngine", intersection_id: str) -> None:
+        self._engine = engine
+        self.id = intersection_id
+
+    @property
+    def _row(self) -> int:
+        return self._engine._row(self.id)
+
+    @property
+    def name(self) -> str:
+        return self._engine._names[self._row]
+
+    @property
+    def phases(self) -> List[Phase]:
+        return self._engine._phases[self._row]
+
+    @property
+    def current_index(self) -> int:
+        return int(self._engine.current_index[self._row])
+
+    @property
+    def elapsed_in_phase(self) -> int:
+        return int(self._engine.elapsed_in_phase[self._row])
+
+    @property
+    def current_phase(self) -> Phase:
+        return self.phases[self.current_index]
+
+    def state_snapshot(self) -> dict:
+        return self._engine.state_snapshot(self.id)
+
+
+class FleetEngine:
+    """
+    Движок для массового продвижения симуляции по всем перекрёсткам.
+
+    Хранит состояние парка в виде struct-of-arrays:
+    - `current_index`, `elapsed_in_phase` — по одному значению на перекрёсток;
+    - `durations`, `offsets` — таблицы длительностей и смещений фаз,
+      выровненные по максимальному числу фаз;
+    - `cycle_length` — длина цикла каждого перекрёстка.
+
+    Продвижение всего парка (или подмножества по маске) выполняется одной
+    векторной операцией, так же как TrafficController.tick: позиция в цикле
+    по модулю длины цикла и поиск фазы по смещениям.
+    """
+
+    def __init__(self, capacity: int = 64, max_phases: int = 4) -> None:
+        self._size = 0
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._phases: List[Sequence[Phase]] = []
+        self._rows: Dict[str, int] = {}
+
+        self._current_index = np.zeros(capacity, dtype=np.int64)
+        self._elapsed = np.zeros(capacity, dtype=np.int64)
+        self._cycle = np.ones(capacity, dtype=np.int64)
+        # Позиция в цикле на момент add/write_back: из неё продвижение
+        # пересчитывается в сдвиг для контроллеров, идущих по часам.
+        self._origin = np.zeros(capacity, dtype=np.int64)
+        self._durations = np.zeros((capacity, max_phases), dtype=np.int64)
+        self._offsets = np.full((capacity, max_phases), _PAD_OFFSET, dtype=np.int64)
+
+    @classmethod
+    def from_controllers(
+        cls,
+        controllers: Iterable[TrafficController],
+    ) -> "FleetEngine":
+        controllers = list(controllers)
+        max_phases = max((len(c.phases) for c in controllers), default=1)
+        engine = cls(capacity=max(len(controllers), 1), max_phases=max_phases)
+        for controller in controllers:
+            engine.add(controller)
+        return engine
+
+    # --- Представления массивов (только активные строки) ---
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def phases(self) -> List[Sequence[Phase]]:
+        return list(self._phases)
+
+    @property
+    def current_index(self) -> np.ndarray:
+        return self._current_index[: self._size]
+
+    @property
+    def elapsed_in_phase(self) -> np.ndarray:
+        return self._elapsed[: self._size]
+
+    @property
+    def cycle_length(self) -> np.ndarray:
+        return self._cycle[: self._size]
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self._durations[: self._size]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, intersection_id: object) -> bool:
+        return intersection_id in self._rows
+
+    # --- Управление составом парка ---
+
+    def _grow(self, capacity: int, max_phases: int) -> None:
+        old_capacity, old_phases = self._durations.shape
+        capacity = max(capacity, old_capacity)
+        max_phases = max(max_phases, old_phases)
+        if (capacity, max_phases) == (old_capacity, old_phases):
+            return
+
+        def resized(array: np.ndarray, fill: int) -> np.ndarray:
+            shape = (capacity,) + ((max_phases,) if array.ndim == 2 else ())
+            result = np.full(shape, fill, dtype=np.int64)
+            if array.ndim == 2:
+                result[:old_capacity, :old_phases] = array
+            else:
+                result[:old_capacity] = array
+            return result
+
+        self._current_index = resized(self._current_index, 0)
+        self._elapsed = resized(self._elapsed, 0)
+        self._cycle = resized(self._cycle, 1)
+        self._origin = resized(self._origin, 0)
+        self._durations = resized(self._durations, 0)
+        self._offsets = resized(self._offsets, _PAD_OFFSET)
+
+    def add(self, controller: TrafficController) -> None:
+        """
+        Добавить (или заменить) перекрёсток, скопировав его текущее состояние.
+
+        Длительности, смещения фаз и длина цикла берутся из общего плана
+        контроллера (`PhasePlan`), а не пересчитываются. Фаза и время в ней
+        читаются одним вызовом `locate()`: у контроллера, идущего по часам,
+        отдельные свойства читали бы часы дважды.
+        """
+        plan = controller.plan
+        if controller.id in self._rows:
+            row = self._rows[controller.id]
+        else:
+            row = self._size
+            capacity = self._durations.shape[0]
+            self._grow(max(capacity * 2, 1) if row >= capacity else capacity, 0)
+            self._rows[controller.id] = row
+            self._ids.append(controller.id)
+            self._names.append(controller.name)
+            self._phases.append(plan.phases)
+            self._size += 1
+
+        count = len(plan)
+        self._grow(0, count)
+
+        self._names[row] = controller.name
+        self._phases[row] = plan.phases
+        self._durations[row, :] = 0
+        self._offsets[row, :] = _PAD_OFFSET
+        self._durations[row, :count] = plan.durations
+        self._offsets[row, :count] = plan.offsets
+        self._cycle[row] = plan.cycle_length
+        index, elapsed = controller.locate()
+        self._current_index[row] = index
+        self._elapsed[row] = elapsed
+        self._origin[row] = plan.offsets[index] + elapsed
+
+    def remove(self, intersection_id: str) -> None:
+        """
+        Удалить перекрёсток; последняя строка переносится на его место.
+        """
+        row = self._row(intersection_id)
+        last = self._size - 1
+        if row != last:
+            for array in (
+                self._current_index,
+                self._elapsed,
+                self._cycle,
+                self._origin,
+                self._durations,
+                self._offsets,
+            ):
+                array[row] = array[last]
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._names[row] = self._names[last]
+            self._phases[row] = self._phases[last]
+            self._rows[moved_id] = row
+
+        self._ids.pop()
+        self._names.pop()
+        self._phases.pop()
+        del self._rows[intersection_id]
+        self._size -= 1
+
+    def _row(self, intersection_id: str) -> int:
+        try:
+            return self._rows[intersection_id]
+        except KeyError as exc:
+            raise IntersectionNotFound(
+                f"Intersection {intersection_id} not found",
+            ) from exc
+
+    def _position(self, row: int) -> int:
+        index = int(self._current_index[row])
+        return int(self._offsets[row, index] + self._elapsed[row])
+
+    def mask_for(self, intersection_ids: Iterable[str]) -> np.ndarray:
+        """
+        Построить булеву маску строк по списку идентификаторов.
+        """
+        mask = np.zeros(self._size, dtype=bool)
+        mask[[self._row(i) for i in intersection_ids]] = True
+        return mask
+
+    # --- Симуляция ---
+
+    def advance(
+        self,
+        seconds: Union[int, Sequence[int], np.ndarray],
+        mask: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Продвинуть симуляцию всего парка (или строк, выбранных маской).
+
+        `seconds` — одно число для всех или массив длиной по числу
+        выбранных строк.
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if np.any(seconds < 0):
+            raise ValueError("seconds must be non-negative")
+
+        rows = slice(0, self._size) if mask is None else np.flatnonzero(mask)
+        offsets = self._offsets[rows]
+        current = self._current_index[rows]
+
+        position = (
+            np.take_along_axis(offsets, current[:, None], axis=1)[:, 0]
+            + self._elapsed[rows]
+            + seconds
+        ) % self._cycle[rows]
+        index = (offsets <= position[:, None]).sum(axis=1) - 1
+
+        self._current_index[rows] = index
+        self._elapsed[rows] = (
+            position - np.take_along_axis(offsets, index[:, None], axis=1)[:, 0]
+        )
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        rows = slice(0, self._size) if mask is None else np.flatnonzero(mask)
+        self._current_index[rows] = 0
+        self._elapsed[rows] = 0
+
+    # --- Чтение состояния ---
+
+    def view(self, intersection_id: str) -> FleetIntersectionView:
+        self._row(intersection_id)
+        return FleetIntersectionView(self, intersection_id)
+
+    def state_snapshot(self, intersection_id: str) -> dict:
+        """
+        Снимок состояния в том же формате, что TrafficController.state_snapshot.
+        """
+        row = self._row(intersection_id)
+        phase = self._phases[row][int(self._current_index[row])]
+        return {
+            "intersection_id": intersection_id,
+            "intersection_name": self._names[row],
+            "phase_name": phase.name,
+            "elapsed_in_phase": int(self._elapsed[row]),
+            "phase_duration": phase.duration,
+            "signals": {
+                direction.value: color.value
+                for direction, color in phase.states.items()
+            },
+        }
+
+    def write_back(self, controllers: Iterable[TrafficController]) -> None:
+        """
+        Скопировать состояние из массивов обратно в объекты контроллеров.
+
+        Позицию контроллера, идущего по часам, присвоить нельзя: ему
+        передаётся продвижение с момента add (или прошлого write_back)
+        через tick, а ход часов за это время сохраняется.
+        """
+        for controller in controllers:
+            row = self._row(controller.id)
+            if controller.follows_clock:
+                position = self._position(row)
+                controller.tick(
+                    (position - int(self._origin[row])) % int(self._cycle[row])
+                )
+            else:
+                controller.current_index = int(self._current_index[row])
+                controller.elapsed_in_phase = int(self._elapsed[row])
+            self._origin[row] = self._position(row)
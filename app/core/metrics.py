@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from bisect import bisect_left
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Labels, float]
+
+# Границы корзин гистограммы задержки запросов, секунды.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Границы корзин задержки цикла событий, секунды.
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class _Sharded:
+    """
+    Основа счётчиков без блокировок на горячем пути: у каждого потока свой
+    словарь значений (шард), в который пишет только он сам. Блокировка
+    берётся один раз на поток — при создании шарда; при выгрузке шарды
+    суммируются. Шарды завершившихся потоков остаются, чтобы значения не
+    убывали.
+    """
+
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _values(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # Копия словаря под GIL атомарна; значения дописываются на месте.
+        return [dict(shard) for shard in shards]
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[str, ...], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Sharded):
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: Labels = ()) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return sum(shard.get(labels, 0) for shard in self._values())
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[str, ...], float]]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._values():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        if not self.labelnames:
+            # Метрика без меток видна с нуля, до первого события.
+            totals.setdefault((), 0)
+        for labels in sorted(totals):
+            yield self.name, labels, (), totals[labels]
+
+
+class Histogram(_Sharded):
+    """
+    Гистограмма с фиксированными корзинами. В шарде на набор меток —
+    список: счётчики по корзинам (последняя — `+Inf`) и сумма значений.
+    Наблюдение — бинарный поиск корзины и два сложения.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[str, ...], float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._values():
+            for labels, counts in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(counts)
+                else:
+                    for index, count in enumerate(counts):
+                        total[index] += count
+        if not self.labelnames:
+            totals.setdefault((), [0] * (len(self.buckets) + 1) + [0.0])
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels in sorted(totals):
+            counts = totals[labels]
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", labels, (bound,), cumulative
+            yield f"{self.name}_sum", labels, (), counts[-1]
+            # count = сумма корзин: согласован с `+Inf` даже при записи
+            # из другого потока во время выгрузки.
+            yield f"{self.name}_count", labels, (), cumulative
+
+
+class Gauge:
+    """
+    Мгновенное значение: задаётся `set` или вычисляется функцией при
+    выгрузке (`function` возвращает пары (метки, значение)).
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Iterable[Sample]]] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[str, ...], float]]:
+        values = self.function() if self.function else list(self._values.items())
+        for labels, value in values:
+            yield self.name, labels, (), value
+
+
+Metric = TypeVar("Metric", Counter, Histogram, Gauge)
+
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса и выгрузка в текстовом формате Prometheus 0.0.4.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[Union[Counter, Histogram, Gauge]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            names = metric.labelnames
+            for name, labels, le, value in metric.samples():
+                pairs = [
+                    f'{label}="{_escape(str(v))}"' for label, v in zip(names, labels)
+                ]
+                if le:
+                    pairs.append(f'le="{le[0]}"')
+                suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+                lines.append(f"{name}{suffix} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+registry = MetricsRegistry()
+
+request_latency = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by method, route template and status code.",
+        ("method", "route", "status"),
+    ),
+)
+ticks = registry.register(
+    Counter(
+        "traffic_ticks_total",
+        "Controller ticks (API, batch tick and scheduler).",
+    ),
+)
+simulated_seconds = registry.register(
+    Counter(
+        "traffic_simulated_seconds_total",
+        "Simulated seconds advanced by controller ticks.",
+    ),
+)
+phase_transitions = registry.register(
+    Counter(
+        "traffic_phase_transitions_total",
+        "Phase transitions made by ticks and the scheduler; "
+        "rate() gives transitions per second.",
+    ),
+)
+event_loop_lag = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Delay of event loop wake-ups beyond the requested sleep.",
+        buckets=LOOP_LAG_BUCKETS,
+    ),
+)
+
+
+def record_tick(seconds: int, transitions: int) -> None:
+    ticks.inc()
+    simulated_seconds.inc(seconds)
+    if transitions:
+        phase_transitions.inc(transitions)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """
+    Фоновая задача: раз в `interval` секунд засыпает и измеряет, насколько
+    позже заказанного цикл событий её разбудил. Рост задержки означает,
+    что цикл занят синхронной работой и запросы ждут в очереди.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(loop.time() - start - interval, 0.0))
@@ -1,9 +1,16 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field, validator
 
 from .domain import Direction, SignalColor
 
+# Сегменты путей коллекции (`/intersections/batch/tick`,
+# `/intersections/timeline/state`, ...): перекрёсток с таким id
+# перехватывался бы этими маршрутами, поэтому такие id запрещены.
+RESERVED_INTERSECTION_IDS = frozenset(
+    {"batch", "events", "import", "states", "timeline"},
+)
+
 
 class ErrorResponse(BaseModel):
     """
@@ -27,6 +34,32 @@ class IntersectionState(BaseModel):
     signals: Dict[str, str]
 
 
+class IntersectionStatesResponse(BaseModel):
+    """
+    Состояния нескольких перекрёстков; `missing` — запрошенные, но
+    не найденные id.
+    """
+
+    items: List[IntersectionState]
+    missing: List[str] = []
+
+
+class IntersectionTransitions(BaseModel):
+    """
+    Переходы одного перекрёстка: `at[i]` — момент (секунды от текущего),
+    когда начинается фаза `phase_name[i]`.
+    """
+
+    intersection_id: str
+    at: List[int]
+    phase_name: List[str]
+
+
+class TimelineTransitionsResponse(BaseModel):
+    items: List[IntersectionTransitions]
+    missing: List[str] = []
+
+
 class PhaseConfig(BaseModel):
     """
     Конфигурация фазы, получаемая/отдаваемая через API.
@@ -52,6 +85,17 @@ class IntersectionConfig(BaseModel):
     id: str = Field(..., example="main-crossroad")
     name: str = Field(..., example="Main intersection")
     phases: List[PhaseConfig]
+    conflicts: Optional[List[Tuple[Direction, Direction]]] = Field(
+        None,
+        description="Pairs of movements that must never be GREEN together "
+        "(default conflict matrix if omitted)",
+    )
+
+    @validator("id")
+    def validate_id(cls, v: str) -> str:
+        if v in RESERVED_INTERSECTION_IDS:
+            raise ValueError(f"id '{v}' is reserved")
+        return v
 
 
 class IntersectionCreateRequest(BaseModel):
@@ -61,6 +105,7 @@ class IntersectionCreateRequest(BaseModel):
 
     name: str
     phases: List[PhaseConfig]
+    conflicts: Optional[List[Tuple[Direction, Direction]]] = None
 
 
 class IntersectionConfigResponse(BaseModel):
@@ -71,6 +116,7 @@ class IntersectionConfigResponse(BaseModel):
     id: str
     name: str
     phases: List[PhaseConfig]
+    conflicts: Optional[List[Tuple[Direction, Direction]]] = None
 
 
 class IntersectionsListResponse(BaseModel):
@@ -83,3 +129,256 @@ class TickRequest(BaseModel):
         gt=0,
         description="How many seconds to advance in the simulation",
     )
+
+
+class BatchTickItem(BaseModel):
+    intersection_id: str
+    seconds: int = Field(..., gt=0)
+
+
+class BatchTickRequest(BaseModel):
+    """
+    Тело запроса пакетного tick.
+
+    Нужно указать либо `items` — список пар (перекрёсток, секунды),
+    либо `seconds` — продвинуть все перекрёстки на одно и то же время.
+    """
+
+    items: Optional[List[BatchTickItem]] = None
+    seconds: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Advance all intersections by this many seconds",
+    )
+
+
+class BatchTickResult(BaseModel):
+    """
+    Результат tick для одного перекрёстка: состояние или текст ошибки.
+    """
+
+    intersection_id: str
+    state: Optional[IntersectionState] = None
+    error: Optional[str] = None
+
+
+class BatchTickResponse(BaseModel):
+    items: List[BatchTickResult]
+
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    """
+    Итог массового импорта: число сохранённых и отклонённых записей и
+    ошибки по строкам (не более первых 1000).
+    """
+
+    imported: int
+    failed: int
+    errors: List[ImportLineError]
+
+
+class GreenWaveRequest(BaseModel):
+    """
+    Коридор "зелёной волны": перекрёстки в порядке следования, длины
+    участков между соседними (метры) и расчётная скорость.
+    """
+
+    intersection_ids: List[str] = Field(..., min_length=2)
+    segment_lengths: List[float] = Field(
+        ...,
+        description="Distances between adjacent intersections, meters",
+    )
+    speed_kmh: float = Field(..., gt=0, example=50)
+    direction: Direction = Field(
+        Direction.NS,
+        description="Movement whose GREEN forms the wave",
+    )
+    apply: bool = Field(
+        False,
+        description="Shift controllers to the computed offsets atomically",
+    )
+
+
+class GreenWaveResponse(BaseModel):
+    """
+    Смещения перекрёстков относительно первого (секунды цикла), ширина
+    зелёной ленты в обе стороны и, если план применён, сдвиги контроллеров.
+    """
+
+    intersection_ids: List[str]
+    offsets: List[int]
+    cycle_length: int
+    travel_times: List[int]
+    bandwidth_outbound: int
+    bandwidth_inbound: int
+    applied: bool
+    shifts: Optional[List[int]] = None
+
+
+def _check_arrival_rates(v: Dict[Direction, float]) -> Dict[Direction, float]:
+    if any(rate < 0 for rate in v.values()):
+        raise ValueError("arrival rates must be non-negative")
+    return v
+
+
+class SimulationParameters(BaseModel):
+    """
+    Общие параметры моделирования: длительность (секунды), потоки насыщения
+    по направлениям (авт/ч) и набор перекрёстков.
+    """
+
+    duration: int = Field(3600, gt=0, le=7 * 24 * 3600, example=86400)
+    saturation_flows: Dict[Direction, float] = Field(
+        {},
+        description="Discharge rate on GREEN/YELLOW, vehicles per hour "
+        "(1800 if omitted)",
+    )
+    intersection_ids: Optional[List[str]] = None
+    include_items: bool = Field(
+        True,
+        description="Return per-intersection results, not only totals",
+    )
+
+    @validator("saturation_flows")
+    def validate_saturation_flows(
+        cls, v: Dict[Direction, float]
+    ) -> Dict[Direction, float]:
+        if any(flow <= 0 for flow in v.values()):
+            raise ValueError("saturation flows must be positive")
+        return v
+
+
+class QueueSimulationRequest(SimulationParameters):
+    """
+    Моделирование очередей при постоянных интенсивностях прибытия (авт/ч).
+    """
+
+    arrival_rates: Dict[Direction, float] = Field(
+        ...,
+        description="Arrivals per movement, vehicles per hour",
+        example={"NS": 600, "EW": 400},
+    )
+
+    validate_arrival_rates = validator("arrival_rates", allow_reuse=True)(
+        _check_arrival_rates
+    )
+
+
+class DemandChange(BaseModel):
+    """
+    С момента `at` (секунды от начала прогона) интенсивности прибытия
+    равны `arrival_rates` (авт/ч).
+    """
+
+    at: int = Field(..., ge=0, example=0)
+    arrival_rates: Dict[Direction, float] = Field(
+        ...,
+        example={"NS": 600, "EW": 400},
+    )
+
+    validate_arrival_rates = validator("arrival_rates", allow_reuse=True)(
+        _check_arrival_rates
+    )
+
+
+class SimulationRunRequest(SimulationParameters):
+    """
+    Событийный прогон с профилем спроса (кусочно-постоянные интенсивности)
+    и отчётами по интервалам.
+    """
+
+    demand: List[DemandChange] = Field(..., min_length=1)
+    report_interval: Optional[int] = Field(
+        3600,
+        gt=0,
+        description="Length of aggregated report intervals, seconds",
+    )
+
+
+class IntersectionQueueResult(BaseModel):
+    intersection_id: str
+    arrivals: float
+    departures: float
+    average_delay: float
+    max_queue: float
+    final_queue: float
+
+
+class QueueSimulationSummary(BaseModel):
+    """
+    Итоги по всему парку: задержки в секундах на автомобиль (average) и
+    авт·с (total), очереди — в автомобилях.
+    """
+
+    intersections: int
+    duration: int
+    arrivals: float
+    throughput: float
+    total_delay: float
+    average_delay: float
+    max_queue: float
+    steps: int
+
+
+class QueueSimulationResponse(BaseModel):
+    summary: QueueSimulationSummary
+    items: List[IntersectionQueueResult] = []
+    missing: List[str] = []
+
+
+class SimulationInterval(BaseModel):
+    """
+    Показатели парка за интервал отчёта `[start, end)`; `queued` — очередь
+    на конец интервала.
+    """
+
+    start: int
+    end: int
+    arrivals: float
+    throughput: float
+    total_delay: float
+    queued: float
+
+
+class SimulationRunResponse(BaseModel):
+    summary: QueueSimulationSummary
+    transitions: int
+    intervals: List[SimulationInterval] = []
+    items: List[IntersectionQueueResult] = []
+    missing: List[str] = []
+
+
+class ProfilingStartRequest(BaseModel):
+    """
+    Включение профилировщика: каждый `sample_every`-й запрос, стеки —
+    раз в `interval` секунд.
+    """
+
+    sample_every: int = Field(100, ge=1, example=100)
+    interval: float = Field(0.005, gt=0, le=1, example=0.005)
+
+
+class ProfilingStage(BaseModel):
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+
+
+class ProfilingStatus(BaseModel):
+    """
+    Состояние профилировщика и время этапов выбранных запросов.
+    """
+
+    enabled: bool
+    sample_every: int
+    interval: float
+    requests: int
+    sampled_requests: int
+    stack_samples: int
+    stages: Dict[str, ProfilingStage]
@@ -0,0 +1,57 @@
+"""
+JSON-совместимое представление планов фаз и матриц конфликтов.
+
+Используется хранилищами, которые сериализуют контроллеры (журнал,
+общая память, снимок). Модуль не зависит от `repository`, чтобы бэкенды,
+которые `create_repository` импортирует при загрузке `repository`, не
+попадали в циклический импорт.
+"""
+
+from typing import List, Optional
+
+from .domain import DEFAULT_CONFLICTS, ConflictMatrix, Direction, Phase, SignalColor
+
+
+def phases_to_plain(phases: List[Phase]) -> list:
+    """
+    Компактное JSON-совместимое представление плана фаз:
+    `[[name, duration, {direction: color}], ...]`.
+    """
+    return [
+        [
+            phase.name,
+            phase.duration,
+            {direction.value: color.value for direction, color in phase.states.items()},
+        ]
+        for phase in phases
+    ]
+
+
+def phases_from_plain(data: list) -> List[Phase]:
+    return [
+        Phase(
+            name=name,
+            duration=duration,
+            states={
+                Direction(direction): SignalColor(color)
+                for direction, color in states.items()
+            },
+        )
+        for name, duration, states in data
+    ]
+
+
+def conflicts_to_plain(conflicts: ConflictMatrix) -> Optional[list]:
+    """
+    JSON-совместимое представление матрицы конфликтов: `[[a, b], ...]`,
+    либо None для матрицы по умолчанию (её хранилища не записывают).
+    """
+    if conflicts == DEFAULT_CONFLICTS:
+        return None
+    return [[first.value, second.value] for first, second in conflicts.pairs]
+
+
+def conflicts_from_plain(data: Optional[list]) -> Optional[ConflictMatrix]:
+    if data is None:
+        return None
+    return ConflictMatrix((first, second) for first, second in data)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Этапы обработки запроса в отчёте, в порядке выполнения.
+STAGES = ("validation", "service", "domain", "serialization", "request")
+
+# Листовые функции простаивающего потока (цикл событий ждёт сокеты):
+# такие сэмплы не несут информации о запросе и отбрасываются.
+_IDLE_FRAMES = {("selectors", "EpollSelector.select"), ("selectors", "select")}
+
+
+class RequestSample:
+    """
+    Выбранный для профилирования запрос: отметки времени этапов,
+    которые ставят обёртки маршрута и эндпоинта.
+    """
+
+    __slots__ = (
+        "started",
+        "handler_started",
+        "endpoint_started",
+        "endpoint_done",
+        "handler_done",
+    )
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.handler_started = 0.0
+        self.endpoint_started = 0.0
+        self.endpoint_done = 0.0
+        self.handler_done = 0.0
+
+
+# Текущий выбранный запрос; None — запрос не профилируется. Контекст
+# копируется в поток пула для синхронных обработчиков, поэтому отметки
+# из потока попадают в тот же объект.
+current_sample: ContextVar[Optional[RequestSample]] = ContextVar(
+    "current_sample", default=None
+)
+
+
+class _NoStage:
+    """
+    Пустой таймер этапа: возвращается, когда запрос не профилируется.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "SamplingProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.profiler.record_stage(self.name, time.perf_counter() - self.start)
+
+
+class SamplingProfiler:
+    """
+    Профилировщик "живых" запросов, включаемый во время работы.
+
+    Профилируется каждый `sample_every`-й запрос. Пока такой запрос
+    выполняется, фоновый поток раз в `interval` секунд снимает стеки
+    потоков, в которых он работает (`sys._current_frames`), и копит их в
+    свёрнутом виде (`a;b;c N`) — формат flamegraph.pl и speedscope. На
+    потоке цикла событий в сэмпл могут попасть и параллельные запросы:
+    это статистическая картина, а не трассировка.
+
+    Для выбранных запросов отдельно измеряются этапы: `validation` (чтение
+    тела, проверка параметров и ожидание потока пула), `service`
+    (обработчик), `domain` (работа с контроллерами внутри сервиса),
+    `serialization` (модель ответа и JSON) и `request` целиком.
+
+    Пока профилировщик выключен, на запрос приходится одна проверка
+    флага, а на таймер этапа — чтение contextvar.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sample_every = 100
+        self.interval = 0.005
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._sampled = 0
+        self._samples = 0
+        self._stacks: Dict[str, int] = {}
+        self._stages: Dict[str, List[float]] = {}
+        # Потоки, в которых сейчас выполняются выбранные запросы: ident ->
+        # число таких запросов.
+        self._active: Dict[int, int] = {}
+        self._labels: Dict[object, str] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- Управление ---
+
+    def start(self, sample_every: int = 100, interval: float = 0.005) -> None:
+        """
+        Включить профилирование (накопленные данные сбрасываются).
+        """
+        if sample_every < 1 or interval <= 0:
+            raise ValueError("sample_every must be >= 1 and interval positive")
+        self.stop()
+        with self._lock:
+            self.clear()
+            self.sample_every = sample_every
+            self.interval = interval
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._sampler.start()
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def toggle(self, output: Optional[str] = None) -> None:
+        """
+        Переключить профилирование (обработчик сигнала). При выключении
+        свёрнутые стеки пишутся в `output`, если путь задан.
+        """
+        if not self.enabled:
+            self.start(self.sample_every, self.interval)
+            return
+        self.stop()
+        if output:
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, "w", encoding="utf-8") as fh:
+                fh.write(self.collapsed())
+
+    def clear(self) -> None:
+        self._requests = self._sampled = self._samples = 0
+        self._stacks = {}
+        self._stages = {}
+
+    # --- Запросы и этапы ---
+
+    def begin_request(self) -> Optional[RequestSample]:
+        """
+        Решить, профилировать ли очередной запрос; вызывать, только когда
+        профилировщик включён.
+        """
+        self._requests += 1
+        if self._requests % self.sample_every:
+            return None
+        self._sampled += 1
+        return RequestSample()
+
+    def enter_thread(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = self._active.get(ident, 0) + 1
+
+    def leave_thread(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            count = self._active.pop(ident, 1) - 1
+            if count:
+                self._active[ident] = count
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self._stages.get(name)
+            if totals is None:
+                totals = self._stages[name] = [0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def stage(self, name: str) -> "_StageTimer | _NoStage":
+        """
+        Таймер этапа для `with`; пустой, если запрос не профилируется.
+        """
+        if current_sample.get() is None:
+            return _NO_STAGE
+        return _StageTimer(self, name)
+
+    def finish_request(self, sample: RequestSample) -> None:
+        """
+        Разложить время выбранного запроса по этапам маршрута.
+        """
+        done = time.perf_counter()
+        self.record_stage("request", done - sample.started)
+        if sample.endpoint_started and sample.handler_done:
+            self.record_stage(
+                "validation", sample.endpoint_started - sample.handler_started
+            )
+            self.record_stage("service", sample.endpoint_done - sample.endpoint_started)
+            self.record_stage(
+                "serialization", sample.handler_done - sample.endpoint_done
+            )
+
+    # --- Отчёты ---
+
+    def status(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 3),
+                    "mean_ms": round(total / count * 1000, 3),
+                    "max_ms": round(longest * 1000, 3),
+                }
+                for name in STAGES
+                if name in self._stages
+                for count, total, longest in [self._stages[name]]
+            }
+            return {
+                "enabled": self.enabled,
+                "sample_every": self.sample_every,
+                "interval": self.interval,
+                "requests": self._requests,
+                "sampled_requests": self._sampled,
+                "stack_samples": self._samples,
+                "stages": stages,
+            }
+
+    def collapsed(self) -> str:
+        """
+        Стеки в свёрнутом формате: `корень;...;лист число` по строке.
+        """
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    # --- Сэмплирование ---
+
+    def _run(self) -> None:
+        sampler = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = [ident for ident in self._active if ident != sampler]
+            if not active:
+                continue
+            frames = sys._current_frames()
+            stacks: List[str] = []
+            for ident in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = self._collapse(frame)
+                    if stack:
+                        stacks.append(stack)
+            del frames
+            with self._lock:
+                for stack in stacks:
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                    self._samples += 1
+
+    def _collapse(self, frame) -> Optional[str]:  # type: ignore[no-untyped-def]
+        labels: List[str] = []
+        leaf: Optional[Tuple[str, str]] = None
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                module = frame.f_globals.get("__name__", "?")
+                label = self._labels[code] = f"{module}:{code.co_qualname}"
+            if leaf is None:
+                leaf = (frame.f_globals.get("__name__", "?"), code.co_qualname)
+            labels.append(label)
+            frame = frame.f_back
+        if leaf in _IDLE_FRAMES:
+            return None
+        labels.reverse()
+        return ";".join(labels)
+
+
+profiler = SamplingProfiler()
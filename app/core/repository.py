@@ -1,8 +1,39 @@
-from typing import Dict, List
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
-from .domain import Direction, Phase, SignalColor, TrafficController
+from ..config import Settings, get_settings
+from .domain import (
+    ConflictMatrix,
+    Direction,
+    Phase,
+    PhasePlan,
+    SignalColor,
+    TrafficController,
+    WallClockTrafficController,
+    plan_registry,
+)
 from .exceptions import IntersectionNotFound
 from .models import IntersectionConfig, PhaseConfig
+from .plain import conflicts_from_plain
+
+if TYPE_CHECKING:
+    from .snapshot import FleetSnapshot
+
+# Подписчик на изменения состава репозитория: вызывается с (id, controller)
+# при добавлении/замене и с (id, None) при удалении.
+RepositoryListener = Callable[[str, Optional[TrafficController]], None]
 
 
 class InMemoryIntersectionRepository:
@@ -10,37 +41,204 @@ class InMemoryIntersectionRepository:
     Простое in-memory хранилище.
 
     Можно заменить на работу с БД, не меняя интерфейс.
+
+    Потокобезопасно: роуты синхронные и выполняются в thread pool.
+    - изменения состава (`add`/`delete`/`clear`) защищены общим локом;
+    - чтение и изменение состояния конкретного перекрёстка выполняются
+      внутри `locked(id)` под одним из `lock_stripes` локов, выбранным по
+      хешу id. Запросы к разным перекрёсткам почти никогда не конкурируют.
+
+    К репозиторию можно подключить снимок парка (`attach_snapshot`):
+    контроллеры из него собираются при первом обращении, поэтому запуск
+    не зависит от размера парка.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, lock_stripes: int = 64) -> None:
         self._items: Dict[str, TrafficController] = {}
+        self._listeners: List[RepositoryListener] = []
+        self._items_lock = threading.Lock()
+        # RLock: групповые операции (`locked_many`) заранее берут все нужные
+        # полосы, а затем повторно входят в них через `locked`.
+        self._stripes = [threading.RLock() for _ in range(lock_stripes)]
+        self._snapshot: Optional["FleetSnapshot"] = None
+        # id из снимка, уже собранные, перезаписанные или удалённые
+        self._shadowed: Set[str] = set()
+        self._snapshot_remaining = 0
+
+    def __len__(self) -> int:
+        return len(self._items) + self._snapshot_remaining
+
+    def attach_snapshot(self, snapshot: "FleetSnapshot") -> None:
+        """
+        Подключить снимок парка. Перекрёстки, уже добавленные в репозиторий,
+        имеют приоритет над одноимёнными из снимка.
+        """
+        with self._items_lock:
+            self._detach_snapshot()
+            self._snapshot = snapshot
+            self._shadowed = set()
+            self._snapshot_remaining = len(snapshot)
+            for intersection_id in self._items:
+                self._shadow(intersection_id)
+
+    def _detach_snapshot(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._shadowed = set()
+        self._snapshot_remaining = 0
+
+    def _shadow(self, intersection_id: str) -> Optional[int]:
+        """
+        Исключить id из снимка (он собран, перезаписан или удалён).
+        Возвращает номер строки в снимке, если id там был. Под `_items_lock`.
+        """
+        if self._snapshot is None or intersection_id in self._shadowed:
+            return None
+        row = self._snapshot.find(intersection_id)
+        if row is not None:
+            self._shadowed.add(intersection_id)
+            self._snapshot_remaining -= 1
+        return row
+
+    def _stripe_index(self, intersection_id: str) -> int:
+        return hash(intersection_id) % len(self._stripes)
+
+    def lock_for(self, intersection_id: str) -> ContextManager[bool]:
+        return self._stripes[self._stripe_index(intersection_id)]
+
+    @contextmanager
+    def locked(self, intersection_id: str) -> Iterator[TrafficController]:
+        """
+        Получить контроллер под локом его перекрёстка.
+
+        Всё, что читает или меняет состояние контроллера (tick, reset,
+        снимок), должно выполняться внутри этого контекста.
+        """
+        with self.lock_for(intersection_id):
+            yield self.get(intersection_id)
+
+    @contextmanager
+    def locked_many(
+        self,
+        intersection_ids: Iterable[str],
+    ) -> Iterator[Dict[str, TrafficController]]:
+        """
+        Несколько контроллеров сразу под локами их перекрёстков — для
+        атомарных групповых изменений.
+
+        Полосы локов берутся по возрастанию номера (одинаковый порядок
+        во всех потоках — без взаимных блокировок), затем перекрёстки
+        входят в `locked` по порядку id, так что наследники с собственной
+        логикой `locked` (запись состояния, межпроцессные локи) работают
+        как обычно.
+        """
+        ids = sorted(set(intersection_ids))
+        with ExitStack() as stack:
+            for stripe in sorted({self._stripe_index(i) for i in ids}):
+                stack.enter_context(self._stripes[stripe])
+            yield {i: stack.enter_context(self.locked(i)) for i in ids}
+
+    def add_listener(self, listener: RepositoryListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: RepositoryListener) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(
+        self,
+        intersection_id: str,
+        controller: Optional[TrafficController],
+    ) -> None:
+        for listener in self._listeners:
+            listener(intersection_id, controller)
 
     def add(self, controller: TrafficController) -> None:
-        self._items[controller.id] = controller
+        with self.lock_for(controller.id):
+            with self._items_lock:
+                self._shadow(controller.id)
+                self._items[controller.id] = controller
+            self._notify(controller.id, controller)
 
     def get(self, intersection_id: str) -> TrafficController:
         try:
             return self._items[intersection_id]
         except KeyError as exc:
+            if self._snapshot is not None:
+                with self._items_lock:
+                    if intersection_id in self._items:
+                        return self._items[intersection_id]
+                    row = self._shadow(intersection_id)
+                    if row is not None:
+                        controller = self._snapshot.controller(row)
+                        self._items[intersection_id] = controller
+                        return controller
             raise IntersectionNotFound(
                 f"Intersection {intersection_id} not found",
             ) from exc
 
     def list(self) -> List[TrafficController]:
-        return list(self._items.values())
+        with self._items_lock:
+            if self._snapshot is not None:
+                # Полный обход: собираем всё, что осталось в снимке.
+                for row, intersection_id in enumerate(self._snapshot.ids()):
+                    if intersection_id not in self._shadowed:
+                        self._items[intersection_id] = self._snapshot.controller(row)
+                self._detach_snapshot()
+            return list(self._items.values())
 
     def delete(self, intersection_id: str) -> None:
-        if intersection_id not in self._items:
-            raise IntersectionNotFound(
-                f"Intersection {intersection_id} not found",
-            )
-        del self._items[intersection_id]
+        with self.lock_for(intersection_id):
+            with self._items_lock:
+                if intersection_id in self._items:
+                    del self._items[intersection_id]
+                    self._shadow(intersection_id)
+                elif self._shadow(intersection_id) is None:
+                    raise IntersectionNotFound(
+                        f"Intersection {intersection_id} not found",
+                    )
+            self._notify(intersection_id, None)
 
     def clear(self) -> None:
-        self._items.clear()
+        with self._items_lock:
+            ids = list(self._items)
+            self._items.clear()
+            self._detach_snapshot()
+        for intersection_id in ids:
+            self._notify(intersection_id, None)
+
+    def close(self) -> None:
+        """
+        Освободить ресурсы хранилища (для in-memory — ничего).
+        """
+
 
+def create_repository(settings: Settings) -> InMemoryIntersectionRepository:
+    """
+    Создать репозиторий по настройке `repository_backend`.
+    """
+    if settings.repository_backend == "memory":
+        return InMemoryIntersectionRepository()
+    if settings.repository_backend == "shared_memory":
+        from .shm_repository import SharedMemoryIntersectionRepository
+
+        return SharedMemoryIntersectionRepository(
+            settings.shm_path,
+            capacity=settings.shm_capacity,
+            plan_table_bytes=settings.shm_plan_table_bytes,
+        )
+    if settings.repository_backend == "durable":
+        from .durable_repository import DurableIntersectionRepository
+
+        return DurableIntersectionRepository(
+            settings.durable_log_path,
+            durability=settings.durable_durability,
+            flush_interval=settings.durable_flush_interval,
+        )
+    raise ValueError(f"Unknown repository backend: {settings.repository_backend}")
 
-repo = InMemoryIntersectionRepository()
+
+repo = create_repository(get_settings())
 
 
 def _phases_from_config(phases_config: List[PhaseConfig]) -> List[Phase]:
@@ -56,6 +254,30 @@ def _phases_from_config(phases_config: List[PhaseConfig]) -> List[Phase]:
     return phases
 
 
+def build_controller(
+    intersection_id: str,
+    name: str,
+    phases: Union[List[Phase], PhasePlan],
+    mode: Optional[str] = None,
+    conflicts: Optional[ConflictMatrix] = None,
+) -> TrafficController:
+    """
+    Создать контроллер в режиме из настроек (`controller_mode`):
+    - simulated — время идёт только через tick;
+    - wall_clock — состояние вычисляется из реального времени при чтении.
+
+    `conflicts` — матрица конфликтов перекрёстка (по умолчанию
+    `DEFAULT_CONFLICTS`).
+    """
+    phases = plan_registry.intern(phases, conflicts)
+    mode = mode or get_settings().controller_mode
+    if mode == "wall_clock":
+        return WallClockTrafficController(intersection_id, name, phases)
+    if mode == "simulated":
+        return TrafficController(intersection_id, name, phases)
+    raise ValueError(f"Unknown controller mode: {mode}")
+
+
 def create_default_intersection() -> None:
     """
     Создаёт один дефолтный перекрёсток, если репозиторий пуст.
@@ -66,7 +288,7 @@ def create_default_intersection() -> None:
     - EW_GREEN (30 c)
     - EW_YELLOW (5 c)
     """
-    if repo.list():
+    if len(repo):
         return
 
     phases_config = [
@@ -105,7 +327,7 @@ def create_default_intersection() -> None:
     ]
 
     phases = _phases_from_config(phases_config)
-    controller = TrafficController(
+    controller = build_controller(
         intersection_id="default",
         name="Main intersection",
         phases=phases,
@@ -113,15 +335,21 @@ def create_default_intersection() -> None:
     repo.add(controller)
 
 
-def save_from_config(config: IntersectionConfig) -> TrafficController:
+def save_from_config(
+    config: IntersectionConfig,
+    repository: Optional[InMemoryIntersectionRepository] = None,
+) -> TrafficController:
     """
     Создаёт или перезаписывает перекрёсток из полной конфигурации.
+
+    По умолчанию сохраняет в глобальный репозиторий `repo`.
     """
     phases = _phases_from_config(config.phases)
-    controller = TrafficController(
+    controller = build_controller(
         intersection_id=config.id,
         name=config.name,
         phases=phases,
+        conflicts=conflicts_from_plain(config.conflicts),
     )
-    repo.add(controller)
+    (repo if repository is None else repository).add(controller)
     return controller
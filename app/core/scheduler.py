@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .domain import TrafficController
+from .events import broker
+from .exceptions import IntersectionNotFound
+from .metrics import phase_transitions, record_tick
+from .repository import InMemoryIntersectionRepository, repo
+
+
+class TransitionScheduler:
+    """
+    Планировщик переходов фаз для работы в реальном времени.
+
+    Вместо ежесекундного обхода всех перекрёстков хранит min-heap моментов
+    следующего перехода каждого контроллера (по `Phase.duration` и
+    `elapsed_in_phase`), спит до ближайшего и обрабатывает все наступившие
+    переходы одной пачкой.
+
+    Устаревшие записи кучи не удаляются сразу, а отбрасываются при
+    извлечении: актуальной считается только запись с последним номером
+    поколения для данного перекрёстка.
+
+    Наступившие переходы обрабатываются в потоке пула, а не в цикле
+    событий.
+
+    Добавление/замена и удаление перекрёстков в репозитории обновляют
+    расписание инкрементально (через подписку на репозиторий); tick и
+    reset из API — через `schedule()`.
+    """
+
+    def __init__(
+        self,
+        repository: InMemoryIntersectionRepository = repo,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._repo = repository
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generations: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enabled = False
+
+    def __len__(self) -> int:
+        return len(self._generations)
+
+    # --- Управление расписанием ---
+
+    def _push(self, intersection_id: str, deadline: float) -> None:
+        generation = next(self._counter)
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            self._generations[intersection_id] = generation
+            heapq.heappush(self._heap, (deadline, generation, intersection_id))
+
+        if earliest is None or deadline < earliest:
+            self._wake()
+
+    def schedule(
+        self,
+        controller: TrafficController,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        (Пере)запланировать следующий переход контроллера.
+        """
+        if not self.enabled:
+            return
+        now = self._clock() if now is None else now
+        self._push(controller.id, now + controller.seconds_to_next_transition())
+
+    def unschedule(self, intersection_id: str) -> None:
+        with self._lock:
+            self._generations.pop(intersection_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            _, generation, intersection_id = self._heap[0]
+            if self._generations.get(intersection_id) == generation:
+                return
+            heapq.heappop(self._heap)
+
+    def _on_repository_change(
+        self,
+        intersection_id: str,
+        controller: Optional[TrafficController],
+    ) -> None:
+        if controller is None:
+            self.unschedule(intersection_id)
+        else:
+            self.schedule(controller)
+
+    # --- Обработка переходов ---
+
+    def _pop_due(self, now: float) -> List[Tuple[float, str]]:
+        due: List[Tuple[float, str]] = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, generation, intersection_id = heapq.heappop(self._heap)
+                if self._generations.get(intersection_id) == generation:
+                    due.append((deadline, intersection_id))
+                self._drop_stale()
+        return due
+
+    def fire_due(self, now: Optional[float] = None) -> int:
+        """
+        Выполнить все переходы, срок которых наступил. Возвращает их число.
+
+        Симулируемые контроллеры продвигаются ровно до конца фазы; контроллеры
+        в режиме wall_clock уже следуют часам — для них только публикуется
+        событие. Следующий срок отсчитывается от предыдущего, а не от `now`,
+        чтобы задержки пробуждения не накапливались.
+        """
+        now = self._clock() if now is None else now
+        fired = 0
+        for deadline, intersection_id in self._pop_due(now):
+            try:
+                with self._repo.locked(intersection_id) as controller:
+                    seconds = 0
+                    if not controller.follows_clock:
+                        seconds = controller.seconds_to_next_transition()
+                        controller.tick(seconds)
+                    snapshot = controller.state_snapshot()
+                    self._push(
+                        intersection_id,
+                        deadline + controller.seconds_to_next_transition(),
+                    )
+            except IntersectionNotFound:
+                self.unschedule(intersection_id)
+                continue
+
+            if seconds:
+                record_tick(seconds, 1)
+            else:
+                phase_transitions.inc()
+            broker.publish("phase", intersection_id, snapshot)
+            fired += 1
+        return fired
+
+    # --- Жизненный цикл ---
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def start(self) -> None:
+        """
+        Запустить фоновую задачу в текущем event loop и построить расписание
+        по всем перекрёсткам репозитория.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._repo.add_listener(self._on_repository_change)
+
+        now = self._clock()
+        for controller in self._repo.list():
+            self.schedule(controller, now)
+
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._repo.remove_listener(self._on_repository_change)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        with self._lock:
+            self._heap.clear()
+            self._generations.clear()
+        self._task = self._loop = self._wakeup = None
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline - self._clock(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            # Переходы берут локи репозитория (а durable-бэкенд в режиме sync
+            # ещё и ждёт fsync): в потоке пула они не задерживают цикл событий.
+            await asyncio.to_thread(self.fire_due)
+
+
+scheduler = TransitionScheduler()
@@ -1,12 +1,30 @@
-from typing import List
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-from .domain import TrafficController
+from ..config import get_settings
+from .bulk_import import get_process_pool, import_ndjson
+from .corridor import apply_offsets, plan_corridor
+from .discrete_event import DiscreteEventSimulation
+from .domain import Direction, TrafficController
+from .events import broker
+from .exceptions import DomainError, IntersectionNotFound
+from .fleet import FleetEngine
+from .metrics import record_tick
 from .models import (
     IntersectionConfig,
     IntersectionConfigResponse,
     IntersectionSummary,
 )
+from .plain import conflicts_to_plain
+from .profiling import profiler
 from .repository import repo, save_from_config
+from .scheduler import scheduler
+from .timeline import (
+    TimelineEntry,
+    states_at,
+    timeline_entry,
+    transitions_between,
+)
+from .traffic import DEFAULT_SATURATION_FLOW, per_direction, simulate_queues
 
 
 def list_intersections_service() -> List[IntersectionSummary]:
@@ -21,30 +39,146 @@ def list_intersections_service() -> List[IntersectionSummary]:
 
 
 def get_intersection_state_service(intersection_id: str) -> dict:
-    controller = repo.get(intersection_id)
-    return controller.state_snapshot()
+    with repo.locked(intersection_id) as controller:
+        return controller.state_snapshot()
+
+
+def get_intersection_state_json_service(intersection_id: str) -> bytes:
+    with repo.locked(intersection_id) as controller, profiler.stage("domain"):
+        return controller.state_json()
+
+
+def get_intersection_states_service(
+    intersection_ids: Optional[List[str]] = None,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Снимки состояния всех перекрёстков или только указанных.
+
+    Возвращает (снимки, список не найденных id).
+    """
+    if intersection_ids is None:
+        intersection_ids = [c.id for c in repo.list()]
+
+    snapshots: List[dict] = []
+    missing: List[str] = []
+    for intersection_id in intersection_ids:
+        try:
+            with repo.locked(intersection_id) as controller:
+                snapshots.append(controller.state_snapshot())
+        except IntersectionNotFound:
+            missing.append(intersection_id)
+    return snapshots, missing
+
+
+def _timeline_entries(
+    intersection_ids: Optional[List[str]],
+) -> Tuple[List[TimelineEntry], List[str]]:
+    if intersection_ids is None:
+        intersection_ids = [c.id for c in repo.list()]
+
+    entries: List[TimelineEntry] = []
+    missing: List[str] = []
+    for intersection_id in intersection_ids:
+        try:
+            with repo.locked(intersection_id) as controller:
+                entries.append(timeline_entry(controller))
+        except IntersectionNotFound:
+            missing.append(intersection_id)
+    return entries, missing
+
+
+def get_timeline_states_service(
+    intersection_ids: Optional[List[str]],
+    offset: int,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Состояния через `offset` секунд, без изменения контроллеров.
+
+    Возвращает (снимки, список не найденных id).
+    """
+    entries, missing = _timeline_entries(intersection_ids)
+    return states_at(entries, offset), missing
+
+
+def get_timeline_transitions_service(
+    intersection_ids: Optional[List[str]],
+    start: int,
+    end: int,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Переходы между фазами в окне `[start, end]` секунд от текущего момента.
+
+    Возвращает (переходы по перекрёсткам, список не найденных id).
+    """
+    entries, missing = _timeline_entries(intersection_ids)
+    return transitions_between(entries, start, end), missing
 
 
 def tick_intersection_service(intersection_id: str, seconds: int) -> dict:
-    controller = repo.get(intersection_id)
-    controller.tick(seconds)
-    return controller.state_snapshot()
+    with repo.locked(intersection_id) as controller, profiler.stage("domain"):
+        index, elapsed = controller.locate()
+        controller.tick(seconds)
+        scheduler.schedule(controller)
+        snapshot = controller.state_snapshot()
+
+    transitions = controller.plan.transitions(index, elapsed, seconds)
+    record_tick(seconds, transitions)
+    # Событие только при пересечении границы фазы.
+    if transitions:
+        broker.publish("phase", intersection_id, snapshot)
+    return snapshot
+
+
+def batch_tick_service(items: Iterable[Tuple[str, int]]) -> List[dict]:
+    """
+    Продвинуть несколько перекрёстков за один проход.
+
+    Ошибка по одному перекрёстку (например, неизвестный id) не прерывает
+    обработку остальных — она возвращается в поле `error` элемента.
+    """
+    results: List[dict] = []
+    for intersection_id, seconds in items:
+        try:
+            snapshot = tick_intersection_service(intersection_id, seconds)
+        except DomainError as exc:
+            results.append(
+                {"intersection_id": intersection_id, "state": None, "error": str(exc)},
+            )
+        else:
+            results.append(
+                {"intersection_id": intersection_id, "state": snapshot, "error": None},
+            )
+    return results
+
+
+def tick_all_intersections_service(seconds: int) -> List[dict]:
+    return batch_tick_service((c.id, seconds) for c in repo.list())
 
 
 def reset_intersection_service(intersection_id: str) -> dict:
-    controller = repo.get(intersection_id)
-    controller.reset()
-    return controller.state_snapshot()
+    with repo.locked(intersection_id) as controller:
+        before = controller.locate()
+        controller.reset()
+        scheduler.schedule(controller)
+        snapshot = controller.state_snapshot()
+
+    if before != (0, 0):
+        broker.publish("reset", intersection_id, snapshot)
+    return snapshot
 
 
 def delete_intersection_service(intersection_id: str) -> None:
     repo.delete(intersection_id)
+    broker.publish("deleted", intersection_id, None)
 
 
 def create_or_update_intersection_service(
     config: IntersectionConfig,
 ) -> IntersectionConfigResponse:
     controller = save_from_config(config)
+    with repo.lock_for(controller.id):
+        snapshot = controller.state_snapshot()
+    broker.publish("config", controller.id, snapshot)
     phases = []
     for phase in controller.phases:
         phases.append(
@@ -59,4 +193,135 @@ def create_or_update_intersection_service(
         id=controller.id,
         name=controller.name,
         phases=phases,
+        conflicts=conflicts_to_plain(controller.plan.conflicts),
+    )
+
+
+async def import_intersections_service(
+    stream: AsyncIterator[bytes],
+    chunk_size: Optional[int] = None,
+) -> dict:
+    settings = get_settings()
+    return await import_ndjson(
+        stream,
+        chunk_size=chunk_size or settings.import_chunk_size,
+        executor=get_process_pool(settings.import_workers),
+        max_in_flight=max(settings.import_workers, 1) + 1,
+        max_line_bytes=settings.import_max_line_bytes,
+    )
+
+
+def green_wave_service(
+    intersection_ids: List[str],
+    segment_lengths: List[float],
+    speed_kmh: float,
+    direction: Direction,
+    apply: bool,
+) -> dict:
+    """
+    Рассчитать (и при `apply` применить) смещения "зелёной волны".
+
+    Весь коридор обрабатывается под локами всех его перекрёстков, поэтому
+    смещения применяются атомарно: параллельные tick/reset видят либо
+    старое, либо новое состояние всего коридора.
+    """
+    changed: List[Tuple[str, dict]] = []
+    with repo.locked_many(intersection_ids) as controllers:
+        corridor = [controllers[i] for i in intersection_ids]
+        plan = plan_corridor(corridor, segment_lengths, speed_kmh, direction)
+        shifts = None
+        if apply:
+            before = [c.locate()[0] for c in corridor]
+            shifts = apply_offsets(corridor, plan)
+            for controller, index in zip(corridor, before):
+                scheduler.schedule(controller)
+                if controller.locate()[0] != index:
+                    changed.append((controller.id, controller.state_snapshot()))
+
+    for intersection_id, snapshot in changed:
+        broker.publish("phase", intersection_id, snapshot)
+    return {
+        "intersection_ids": plan.intersection_ids,
+        "offsets": plan.offsets,
+        "cycle_length": plan.cycle_length,
+        "travel_times": plan.travel_times,
+        "bandwidth_outbound": plan.bandwidth_outbound,
+        "bandwidth_inbound": plan.bandwidth_inbound,
+        "applied": apply,
+        "shifts": shifts,
+    }
+
+
+def _simulation_engine(
+    intersection_ids: Optional[List[str]],
+) -> Tuple[FleetEngine, List[str]]:
+    """
+    Скопировать позиции контроллеров в FleetEngine (под локом каждого
+    перекрёстка); сами контроллеры дальше не используются.
+    """
+    if intersection_ids is None:
+        intersection_ids = [c.id for c in repo.list()]
+
+    engine = FleetEngine()
+    missing: List[str] = []
+    for intersection_id in intersection_ids:
+        try:
+            with repo.locked(intersection_id) as controller:
+                engine.add(controller)
+        except IntersectionNotFound:
+            missing.append(intersection_id)
+    return engine, missing
+
+
+def simulate_queues_service(
+    intersection_ids: Optional[List[str]],
+    duration: int,
+    arrival_rates: Dict[Direction, float],
+    saturation_flows: Dict[Direction, float],
+    include_items: bool = True,
+) -> dict:
+    """
+    Смоделировать очереди на `duration` секунд вперёд от текущего состояния.
+    Контроллеры не изменяются.
+    """
+    engine, missing = _simulation_engine(intersection_ids)
+    result = simulate_queues(
+        engine,
+        duration,
+        per_direction(arrival_rates),
+        per_direction(saturation_flows, DEFAULT_SATURATION_FLOW),
+    )
+    return {
+        "summary": result.summary(),
+        "items": result.items() if include_items else [],
+        "missing": missing,
+    }
+
+
+def simulation_run_service(
+    intersection_ids: Optional[List[str]],
+    duration: int,
+    demand: List[Tuple[int, Dict[Direction, float]]],
+    saturation_flows: Dict[Direction, float],
+    report_interval: Optional[int],
+    include_items: bool = True,
+) -> dict:
+    """
+    Событийный прогон от текущего состояния с профилем спроса `demand`
+    (момент, интенсивности в авт/ч). Контроллеры не изменяются.
+    """
+    engine, missing = _simulation_engine(intersection_ids)
+    simulation = DiscreteEventSimulation(
+        engine,
+        per_direction(saturation_flows, DEFAULT_SATURATION_FLOW),
     )
+    for at, arrival_rates in demand:
+        simulation.schedule_demand(at, per_direction(arrival_rates))
+    result = simulation.run(duration, report_interval)
+    return {
+        "summary": result.queues.summary(),
+        "transitions": result.transitions,
+        "intervals": result.intervals,
+        "items": result.queues.items() if include_items else [],
+        "missing": missing,
+    }
@@ -0,0 +1,618 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .domain import PhasePlan, TrafficController, plan_registry
+from .exceptions import IntersectionNotFound, StorageError
+from .plain import (
+    conflicts_from_plain,
+    conflicts_to_plain,
+    phases_from_plain,
+    phases_to_plain,
+)
+from .repository import InMemoryIntersectionRepository
+
+MAGIC = b"TLCF"
+FORMAT_VERSION = 3
+
+# magic, версия формата, ёмкость (записей), размер таблицы планов,
+# занято байт в таблице планов, последняя выданная версия конфигурации,
+# число занятых слотов, число удалённых слотов, поколение таблицы записей
+# (нечётное — идёт перестройка), число планов в индексе планов
+_HEADER = struct.Struct("<4sHxxIIIIIIII")
+_HEADER_SIZE = 64
+
+# seqlock-счётчик, статус, индекс фазы, время в фазе, версия конфигурации,
+# смещение и длина плана фаз, id, название. Счётчик стоит первым: читатель
+# берёт его до и после остальных полей.
+_RECORD = struct.Struct("<IBxHIIII64s128s")
+_RECORD_SIZE = 224
+_SEQ = struct.Struct("<I")
+_MAX_ID_BYTES = 64
+_MAX_NAME_BYTES = 128
+
+# Индекс занятых слотов: плотный массив номеров слотов длиной "число
+# занятых" (чтобы len() и list() не обходили всю ёмкость) и обратный
+# массив "слот -> позиция в индексе" для удаления за O(1). Оба меняются
+# только под глобальным локом.
+_SLOT = struct.Struct("<I")
+
+_PLAN_LENGTH = struct.Struct("<I")
+
+# Индекс таблицы планов: хеш-таблица с открытой адресацией из пар
+# (crc32 плана, смещение + 1; 0 — пустой слот), по слоту на
+# `_PLAN_BYTES_PER_SLOT` байт таблицы. Заполняется не больше чем на 3/4.
+_PLAN_SLOT = struct.Struct("<II")
+_PLAN_BYTES_PER_SLOT = 32
+
+_EMPTY, _USED, _DELETED = 0, 1, 2
+
+Result = TypeVar("Result")
+
+# Таблица записей перестраивается, когда удалённые слоты занимают
+# четверть ёмкости: иначе поиск отсутствующего id проходит их все.
+_REHASH_DELETED_FRACTION = 4
+
+# Поля заголовка, которые меняются во время работы
+_PLANS_USED, _LAST_VERSION, _USED_SLOTS, _DELETED_SLOTS, _GENERATION, _PLAN_COUNT = (
+    range(4, 10)
+)
+
+
+def _plan_index_slots(plan_table_bytes: int) -> int:
+    return max(plan_table_bytes // _PLAN_BYTES_PER_SLOT, 1)
+
+
+def _encode_plan(plan: PhasePlan) -> bytes:
+    """
+    План в таблице планов: список фаз, а при нестандартной матрице
+    конфликтов — объект `{"phases": ..., "conflicts": ...}`.
+    """
+    data: object = phases_to_plain(plan.phases)
+    conflicts = conflicts_to_plain(plan.conflicts)
+    if conflicts is not None:
+        data = {"phases": data, "conflicts": conflicts}
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _decode_plan(raw: bytes) -> PhasePlan:
+    data = json.loads(raw)
+    if isinstance(data, dict):
+        return plan_registry.intern(
+            phases_from_plain(data["phases"]),
+            conflicts_from_plain(data["conflicts"]),
+        )
+    return plan_registry.intern(phases_from_plain(data))
+
+
+class SharedMemoryIntersectionRepository(InMemoryIntersectionRepository):
+    """
+    Репозиторий поверх общей памяти (mmap файла, по умолчанию в /dev/shm).
+
+    Позволяет нескольким процессам uvicorn (`--workers N`) работать с одним
+    парком перекрёстков:
+    - состояние каждого контроллера — запись фиксированного размера в
+      хеш-таблице с открытой адресацией (ключ — crc32 от id);
+    - планы фаз хранятся один раз в append-only таблице и разделяются
+      записями с одинаковым планом;
+    - изменения записи атомарны: внутри процесса — полосатые thread-локи,
+      между процессами — `fcntl.lockf` на байт записи; чтение без лока
+      защищено seqlock-счётчиком;
+    - число занятых слотов и их плотный индекс хранятся в регионе и
+      меняются под глобальным локом, поэтому `len()` и `list()` не зависят
+      от ёмкости;
+    - планы ищутся по хеш-индексу в регионе, без обхода таблицы планов;
+    - когда удалённых слотов становится много, таблица записей
+      перестраивается; записи при этом меняют слоты, поэтому поиск
+      проверяет поколение таблицы, а `locked()` — id записи под её локом.
+
+    Поддерживаются только симулируемые контроллеры (не wall_clock).
+    Локальный словарь `_items` служит кешем собранных TrafficController
+    для `locked()`: он пересобирается при изменении версии конфигурации
+    записи и меняется только под локом записи. `get()` и `list()` отдают
+    новые объекты, собранные из записи.
+    Подписчики (`add_listener`) получают только изменения своего процесса.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 65536,
+        plan_table_bytes: int = 16 * 1024 * 1024,
+        lock_stripes: int = 64,
+    ) -> None:
+        super().__init__(lock_stripes=lock_stripes)
+        self._global_thread_lock = threading.Lock()
+        self._cache_versions: Dict[str, int] = {}
+        self._plan_offsets: Dict[bytes, int] = {}
+        self._plans: Dict[int, PhasePlan] = {}
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                size = (
+                    _HEADER_SIZE
+                    + capacity * (_RECORD_SIZE + 2 * _SLOT.size)
+                    + _plan_index_slots(plan_table_bytes) * _PLAN_SLOT.size
+                    + plan_table_bytes
+                )
+                os.ftruncate(self._fd, size)
+                self._mm = mmap.mmap(self._fd, size)
+                _HEADER.pack_into(
+                    self._mm,
+                    0,
+                    MAGIC,
+                    FORMAT_VERSION,
+                    capacity,
+                    plan_table_bytes,
+                    0,
+                    0,
+                    0,
+                    0,
+                    0,
+                    0,
+                )
+            else:
+                self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+            magic, version, capacity, plan_table_bytes, *_ = _HEADER.unpack_from(
+                self._mm,
+                0,
+            )
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise StorageError(f"Incompatible shared memory region: {path}")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+        self.capacity = capacity
+        self._index_base = _HEADER_SIZE + capacity * _RECORD_SIZE
+        self._positions_base = self._index_base + capacity * _SLOT.size
+        self._plan_slots = _plan_index_slots(plan_table_bytes)
+        self._plan_index_base = self._positions_base + capacity * _SLOT.size
+        self._plan_base = self._plan_index_base + self._plan_slots * _PLAN_SLOT.size
+        self._plan_capacity = plan_table_bytes
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    # --- Блокировки ---
+
+    def _record_offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * _RECORD_SIZE
+
+    @contextmanager
+    def _global_lock(self) -> Iterator[None]:
+        with self._global_thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    @contextmanager
+    def _record_lock(self, slot: int) -> Iterator[None]:
+        offset = self._record_offset(slot)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    def _acquire_record(self, intersection_id: str) -> int:
+        """
+        Слот перекрёстка с взятым локом записи. Если между поиском и локом
+        таблицу перестроили и в слоте уже другая запись, поиск повторяется.
+        """
+        key = intersection_id.encode()
+        while True:
+            slot = self._slot_for(intersection_id)
+            offset = self._record_offset(slot)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+            _, status, *_, id_, _ = self._read_record(slot)
+            if status == _USED and id_.rstrip(b"\0") == key:
+                return slot
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    # --- Заголовок ---
+
+    def _header(self, field: int) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[field]
+
+    def _set_header(self, field: int, value: int) -> None:
+        """
+        Изменить поле заголовка. Вызывается под глобальным локом.
+        """
+        header = list(_HEADER.unpack_from(self._mm, 0))
+        header[field] = value
+        _HEADER.pack_into(self._mm, 0, *header)
+
+    # --- Записи ---
+
+    def _read_record(self, slot: int) -> Tuple:
+        """
+        Согласованное чтение записи без лока (seqlock): счётчик, поля, снова
+        счётчик; повтор, пока запись меняется (нечётный или другой счётчик).
+        """
+        offset = self._record_offset(slot)
+        while True:
+            (seq,) = _SEQ.unpack_from(self._mm, offset)
+            if seq % 2:
+                continue
+            record = _RECORD.unpack_from(self._mm, offset)
+            if record[0] == seq and _SEQ.unpack_from(self._mm, offset)[0] == seq:
+                return record
+
+    def _write_record(self, slot: int, *fields) -> None:
+        """
+        Запись под локом записи: seq нечётный на время изменения. Поля — в
+        порядке `_RECORD`; переданное значение seq не используется.
+        """
+        offset = self._record_offset(slot)
+        (seq,) = _SEQ.unpack_from(self._mm, offset)
+        _SEQ.pack_into(self._mm, offset, seq + 1)
+        _RECORD.pack_into(self._mm, offset, seq + 1, *fields[1:])
+        _SEQ.pack_into(self._mm, offset, seq + 2)
+
+    def _write_state(self, slot: int, index: int, elapsed: int) -> None:
+        record = list(self._read_record(slot))
+        record[2], record[3] = index, elapsed
+        self._write_record(slot, *record)
+
+    # --- Индекс занятых слотов (под глобальным локом) ---
+
+    def _index_slot(self, slot: int) -> None:
+        position = self._header(_USED_SLOTS)
+        _SLOT.pack_into(self._mm, self._index_base + position * _SLOT.size, slot)
+        _SLOT.pack_into(self._mm, self._positions_base + slot * _SLOT.size, position)
+        self._set_header(_USED_SLOTS, position + 1)
+
+    def _unindex_slot(self, slot: int) -> None:
+        """
+        Убрать слот из индекса: на его место переносится последний.
+        """
+        (position,) = _SLOT.unpack_from(
+            self._mm,
+            self._positions_base + slot * _SLOT.size,
+        )
+        last = self._header(_USED_SLOTS) - 1
+        (moved,) = _SLOT.unpack_from(self._mm, self._index_base + last * _SLOT.size)
+        _SLOT.pack_into(self._mm, self._index_base + position * _SLOT.size, moved)
+        _SLOT.pack_into(self._mm, self._positions_base + moved * _SLOT.size, position)
+        self._set_header(_USED_SLOTS, last)
+
+    def _indexed_slots(self) -> Tuple[int, ...]:
+        used = self._header(_USED_SLOTS)
+        return struct.unpack_from(f"<{used}I", self._mm, self._index_base)
+
+    def _used_slots(self) -> Tuple[int, ...]:
+        with self._global_lock():
+            return self._indexed_slots()
+
+    # --- Поиск записей ---
+
+    def _find_slot(self, key: bytes, for_insert: bool = False) -> Optional[int]:
+        """
+        Линейное пробирование: слот с данным id или (для вставки) первый
+        свободный / удалённый слот по пути.
+        """
+        start = zlib.crc32(key) % self.capacity
+        free: Optional[int] = None
+        for step in range(self.capacity):
+            slot = (start + step) % self.capacity
+            _, status, *_, id_, _ = self._read_record(slot)
+            if status == _EMPTY:
+                return free if free is not None else (slot if for_insert else None)
+            if status == _DELETED:
+                if free is None and for_insert:
+                    free = slot
+                continue
+            if id_.rstrip(b"\0") == key:
+                return slot
+        return free
+
+    def _stable(self, read: Callable[[], Result]) -> Result:
+        """
+        Результат чтения таблицы записей без лока, не пересекающегося с её
+        перестройкой: повтор, пока поколение нечётное или изменилось.
+        """
+        while True:
+            generation = self._header(_GENERATION)
+            if generation % 2:
+                time.sleep(0)
+                continue
+            result = read()
+            if self._header(_GENERATION) == generation:
+                return result
+
+    def _slot_for(self, intersection_id: str) -> int:
+        key = intersection_id.encode()
+        slot = self._stable(lambda: self._find_slot(key))
+        if slot is None:
+            raise IntersectionNotFound(f"Intersection {intersection_id} not found")
+        return slot
+
+    def _maybe_rehash(self) -> None:
+        """
+        Перестроить таблицу записей, если удалённые слоты заняли
+        `1 / _REHASH_DELETED_FRACTION` ёмкости.
+
+        Берёт все полосы локов (по возрастанию, как `locked_many`) и
+        глобальный лок, поэтому в этом процессе никто не держит запись;
+        лок всего диапазона записей дожидается, пока из `locked()` выйдут
+        и другие процессы.
+        """
+        if self._header(_DELETED_SLOTS) * _REHASH_DELETED_FRACTION < self.capacity:
+            return
+        with ExitStack() as stack:
+            for stripe in self._stripes:
+                stack.enter_context(stripe)
+            stack.enter_context(self._global_lock())
+            deleted = self._header(_DELETED_SLOTS)
+            if deleted * _REHASH_DELETED_FRACTION < self.capacity:
+                return
+            size = self.capacity * _RECORD_SIZE
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, size, _HEADER_SIZE)
+            try:
+                self._rehash()
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, size, _HEADER_SIZE)
+
+    def _rehash(self) -> None:
+        """
+        Вставить занятые записи заново в очищенную таблицу. На это время
+        поколение таблицы нечётное.
+        """
+        generation = self._header(_GENERATION)
+        self._set_header(_GENERATION, generation + 1)
+        records = [self._read_record(slot) for slot in self._indexed_slots()]
+        for slot in range(self.capacity):
+            record = list(self._read_record(slot))
+            if record[1] != _EMPTY:
+                record[1] = _EMPTY
+                self._write_record(slot, *record)
+        self._set_header(_USED_SLOTS, 0)
+        self._set_header(_DELETED_SLOTS, 0)
+        for record in records:
+            slot = self._find_slot(record[7].rstrip(b"\0"), for_insert=True)
+            self._write_record(slot, *record)
+            self._index_slot(slot)
+        self._set_header(_GENERATION, generation + 2)
+
+    # --- Таблица планов фаз ---
+
+    def _plans_used(self) -> int:
+        return self._header(_PLANS_USED)
+
+    def _next_version(self) -> int:
+        """
+        Уникальная (в пределах региона) версия конфигурации записи.
+        Вызывается под глобальным локом.
+        """
+        version = self._header(_LAST_VERSION) + 1
+        self._set_header(_LAST_VERSION, version)
+        return version
+
+    def _plan_bytes(self, offset: int) -> bytes:
+        (length,) = _PLAN_LENGTH.unpack_from(self._mm, self._plan_base + offset)
+        start = self._plan_base + offset + _PLAN_LENGTH.size
+        return self._mm[start : start + length]
+
+    def _intern_plan(self, raw: bytes) -> int:
+        """
+        Смещение плана в общей таблице; добавляет план, если его ещё нет.
+        Поиск — по хеш-индексу планов в регионе (линейное пробирование),
+        найденные смещения кешируются в процессе. Вызывается под
+        глобальным локом.
+        """
+        if raw in self._plan_offsets:
+            return self._plan_offsets[raw]
+
+        digest = zlib.crc32(raw)
+        slot = digest % self._plan_slots
+        while True:
+            position = self._plan_index_base + slot * _PLAN_SLOT.size
+            stored_digest, stored = _PLAN_SLOT.unpack_from(self._mm, position)
+            if not stored:
+                break
+            if stored_digest == digest and self._plan_bytes(stored - 1) == raw:
+                self._plan_offsets[raw] = stored - 1
+                return stored - 1
+            slot = (slot + 1) % self._plan_slots
+
+        used = self._plans_used()
+        count = self._header(_PLAN_COUNT)
+        if (count + 1) * 4 > self._plan_slots * 3 or used + _PLAN_LENGTH.size + len(
+            raw
+        ) > self._plan_capacity:
+            raise StorageError("Shared memory plan table is full")
+        _PLAN_LENGTH.pack_into(self._mm, self._plan_base + used, len(raw))
+        start = self._plan_base + used + _PLAN_LENGTH.size
+        self._mm[start : start + len(raw)] = raw
+        _PLAN_SLOT.pack_into(self._mm, position, digest, used + 1)
+        self._set_header(_PLANS_USED, used + _PLAN_LENGTH.size + len(raw))
+        self._set_header(_PLAN_COUNT, count + 1)
+        self._plan_offsets[raw] = used
+        return used
+
+    def _plan(self, offset: int, length: int) -> PhasePlan:
+        plan = self._plans.get(offset)
+        if plan is None:
+            start = self._plan_base + offset + _PLAN_LENGTH.size
+            plan = _decode_plan(self._mm[start : start + length])
+            self._plans[offset] = plan
+        return plan
+
+    # --- Контроллеры ---
+
+    def _build(self, record: Tuple) -> TrafficController:
+        """
+        Новый контроллер по записи: конфигурация и состояние.
+        """
+        _, _, index, elapsed, _, plan_offset, plan_length, id_, name = record
+        controller = TrafficController(
+            id_.rstrip(b"\0").decode(),
+            name.rstrip(b"\0").decode(),
+            self._plan(plan_offset, plan_length),
+        )
+        controller.current_index = index
+        controller.elapsed_in_phase = elapsed
+        return controller
+
+    def _controller(self, slot: int) -> TrafficController:
+        """
+        Контроллер из записи для `locked()`, под локом записи: из локального
+        кеша, если версия конфигурации не менялась, иначе собирается заново.
+        Состояние всегда из записи.
+        """
+        record = self._read_record(slot)
+        _, _, index, elapsed, version, *_, id_, _ = record
+        intersection_id = id_.rstrip(b"\0").decode()
+        controller = self._items.get(intersection_id)
+        if controller is None or self._cache_versions.get(intersection_id) != version:
+            controller = self._build(record)
+            with self._items_lock:
+                self._items[intersection_id] = controller
+                self._cache_versions[intersection_id] = version
+        controller.current_index = index
+        controller.elapsed_in_phase = elapsed
+        return controller
+
+    def add(self, controller: TrafficController) -> None:
+        if controller.follows_clock:
+            raise StorageError("Shared memory backend supports simulated mode only")
+        key = controller.id.encode()
+        name = controller.name.encode()
+        if len(key) > _MAX_ID_BYTES or len(name) > _MAX_NAME_BYTES:
+            raise StorageError(
+                f"Intersection id/name too long for shared memory: {controller.id}",
+            )
+
+        raw = _encode_plan(controller.plan)
+        with self.lock_for(controller.id), self._global_lock():
+            plan_offset = self._intern_plan(raw)
+            slot = self._find_slot(key, for_insert=True)
+            if slot is None:
+                raise StorageError("Shared memory repository is full")
+            version = self._next_version()
+            with self._record_lock(slot):
+                status = self._read_record(slot)[1]
+                if status == _DELETED:
+                    self._set_header(
+                        _DELETED_SLOTS,
+                        self._header(_DELETED_SLOTS) - 1,
+                    )
+                if status != _USED:
+                    self._index_slot(slot)
+                self._write_record(
+                    slot,
+                    0,
+                    _USED,
+                    controller.current_index,
+                    controller.elapsed_in_phase,
+                    version,
+                    plan_offset,
+                    len(raw),
+                    key,
+                    name,
+                )
+            with self._items_lock:
+                self._items[controller.id] = controller
+                self._cache_versions[controller.id] = version
+            self._notify(controller.id, controller)
+
+    def get(self, intersection_id: str) -> TrafficController:
+        """
+        Копия контроллера на момент чтения; изменять состояние — через
+        `locked()`.
+        """
+        key = intersection_id.encode()
+
+        def read() -> Optional[Tuple]:
+            slot = self._find_slot(key)
+            return None if slot is None else self._read_record(slot)
+
+        record = self._stable(read)
+        if record is None:
+            raise IntersectionNotFound(f"Intersection {intersection_id} not found")
+        return self._build(record)
+
+    @contextmanager
+    def locked(self, intersection_id: str) -> Iterator[TrafficController]:
+        """
+        Контроллер под локом записи (в процессе и между процессами);
+        изменённое состояние записывается обратно при выходе.
+        """
+        with self.lock_for(intersection_id):
+            slot = self._acquire_record(intersection_id)
+            try:
+                controller = self._controller(slot)
+                yield controller
+                self._write_state(
+                    slot,
+                    controller.current_index,
+                    controller.elapsed_in_phase,
+                )
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._record_offset(slot))
+
+    def __len__(self) -> int:
+        return self._header(_USED_SLOTS)
+
+    def list(self) -> List[TrafficController]:
+        """
+        Копии контроллеров по индексу занятых слотов.
+        """
+
+        def read() -> List[Tuple]:
+            records = (self._read_record(slot) for slot in self._used_slots())
+            return [record for record in records if record[1] == _USED]
+
+        return [self._build(record) for record in self._stable(read)]
+
+    def delete(self, intersection_id: str) -> None:
+        with self.lock_for(intersection_id), self._global_lock():
+            slot = self._slot_for(intersection_id)
+            with self._record_lock(slot):
+                record = list(self._read_record(slot))
+                record[1] = _DELETED
+                self._write_record(slot, *record)
+            self._unindex_slot(slot)
+            self._set_header(_DELETED_SLOTS, self._header(_DELETED_SLOTS) + 1)
+            with self._items_lock:
+                self._items.pop(intersection_id, None)
+                self._cache_versions.pop(intersection_id, None)
+            self._notify(intersection_id, None)
+        self._maybe_rehash()
+
+    def clear(self) -> None:
+        """
+        Удалить все перекрёстки. Таблица планов (append-only) сохраняется.
+        """
+        ids: List[str] = []
+        with self._global_lock():
+            for slot in range(self.capacity):
+                record = list(self._read_record(slot))
+                if record[1] == _EMPTY:
+                    continue
+                if record[1] == _USED:
+                    ids.append(record[7].rstrip(b"\0").decode())
+                with self._record_lock(slot):
+                    record[1] = _EMPTY
+                    self._write_record(slot, *record)
+            self._set_header(_USED_SLOTS, 0)
+            self._set_header(_DELETED_SLOTS, 0)
+            with self._items_lock:
+                self._items.clear()
+                self._cache_versions.clear()
+        for intersection_id in ids:
+            self._notify(intersection_id, None)
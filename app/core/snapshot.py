@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .domain import PhasePlan, TrafficController, plan_registry
+from .exceptions import StorageError
+from .plain import (
+    conflicts_from_plain,
+    conflicts_to_plain,
+    phases_from_plain,
+    phases_to_plain,
+)
+from .repository import (
+    InMemoryIntersectionRepository,
+    build_controller,
+)
+
+logger = get_logger(__name__)
+
+MAGIC = b"TLCS"
+FORMAT_VERSION = 2
+
+# magic, версия, число планов, фаз, контроллеров, размер таблицы строк
+_HEADER = struct.Struct("<4sHxxIIII")
+_HEADER_SIZE = 64
+
+# Ссылка на строку — (смещение, длина) в таблице строк UTF-8.
+# Матрица конфликтов плана — JSON-строка; длина 0 — матрица по умолчанию.
+_PLAN_DTYPE = np.dtype(
+    [
+        ("first_phase", "<u4"),
+        ("count", "<u4"),
+        ("conflicts_off", "<u4"),
+        ("conflicts_len", "<u4"),
+    ],
+)
+_PHASE_DTYPE = np.dtype(
+    [
+        ("name_off", "<u4"),
+        ("name_len", "<u4"),
+        ("duration", "<u4"),
+        ("states_off", "<u4"),
+        ("states_len", "<u4"),
+    ],
+)
+_CONTROLLER_DTYPE = np.dtype(
+    [
+        ("id_off", "<u4"),
+        ("id_len", "<u4"),
+        ("name_off", "<u4"),
+        ("name_len", "<u4"),
+        ("plan", "<u4"),
+        ("index", "<u4"),
+        ("elapsed", "<u4"),
+    ],
+)
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._size = 0
+
+    def add(self, value: str) -> Tuple[int, int]:
+        raw = value.encode()
+        offset = self._size
+        self._chunks.append(raw)
+        self._size += len(raw)
+        return offset, len(raw)
+
+    def tobytes(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+def write_snapshot(
+    controllers: Iterable[TrafficController],
+    path: str,
+    lock_for: Optional[Callable[[str], threading.Lock]] = None,
+) -> int:
+    """
+    Записать снимок парка в бинарный файл (атомарно, через rename).
+
+    Формат (little-endian, секции выровнены по 8 байт):
+    - заголовок: magic, версия, размеры секций;
+    - таблица планов (первая фаза, число фаз, матрица конфликтов) —
+      одинаковые планы записываются один раз;
+    - таблица фаз (имя, длительность, состояния сигналов в JSON);
+    - таблица контроллеров фиксированного размера, отсортированная по id
+      (для бинарного поиска без построения индекса при загрузке);
+    - таблица строк UTF-8.
+
+    `lock_for` — лок перекрёстка из репозитория, чтобы состояние каждого
+    контроллера читалось согласованно. Возвращает число записанных
+    контроллеров.
+    """
+    strings = _StringTable()
+    # Планы интернированы, поэтому одинаковые конфигурации — это один
+    # и тот же объект PhasePlan; сериализуем каждый план один раз.
+    plan_ids: Dict[PhasePlan, int] = {}
+    plans: List[Tuple[int, int, int, int]] = []
+    phases: List[Tuple[int, int, int, int, int]] = []
+    rows: List[Tuple[bytes, Tuple[int, ...]]] = []
+
+    for controller in controllers:
+        plan = plan_ids.get(controller.plan)
+        if plan is None:
+            plan = plan_ids[controller.plan] = len(plans)
+            plain = phases_to_plain(controller.phases)
+            conflicts = conflicts_to_plain(controller.plan.conflicts)
+            plans.append(
+                (len(phases), len(plain))
+                + (
+                    (0, 0)
+                    if conflicts is None
+                    else strings.add(json.dumps(conflicts, separators=(",", ":")))
+                ),
+            )
+            for name, duration, states in plain:
+                phases.append(
+                    strings.add(name)
+                    + (duration,)
+                    + strings.add(json.dumps(states, separators=(",", ":"))),
+                )
+        if lock_for is None:
+            index, elapsed = controller.locate()
+        else:
+            with lock_for(controller.id):
+                index, elapsed = controller.locate()
+        rows.append(
+            (
+                controller.id.encode(),
+                strings.add(controller.id)
+                + strings.add(controller.name)
+                + (plan, index, elapsed),
+            ),
+        )
+
+    rows.sort(key=lambda row: row[0])
+    sections = [
+        np.array(plans, dtype=_PLAN_DTYPE).tobytes(),
+        np.array(phases, dtype=_PHASE_DTYPE).tobytes(),
+        np.array([row for _, row in rows], dtype=_CONTROLLER_DTYPE).tobytes(),
+        strings.tobytes(),
+    ]
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(plans),
+        len(phases),
+        len(rows),
+        len(sections[-1]),
+    )
+
+    tmp_path = path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, "wb") as snapshot:
+        snapshot.write(header.ljust(_HEADER_SIZE, b"\0"))
+        for section in sections:
+            snapshot.write(section.ljust(_align(len(section)), b"\0"))
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+class _SortedIds:
+    """
+    Последовательность id контроллеров (bytes) поверх mmap — для bisect.
+    """
+
+    def __init__(self, snapshot: "FleetSnapshot") -> None:
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __getitem__(self, row: int) -> bytes:
+        return self._snapshot._id_bytes(row)
+
+
+class FleetSnapshot:
+    """
+    Открытый (mmap) снимок парка.
+
+    Открытие стоит O(1): читается только заголовок, таблицы — это
+    представления numpy над mmap. Контроллеры собираются по требованию
+    (`find` + `controller`) без Pydantic-валидации; фазы каждого плана
+    разбираются один раз и разделяются контроллерами.
+    """
+
+    def __init__(self, path: str, mode: Optional[str] = None) -> None:
+        # Режим собираемых контроллеров (`controller_mode`); None — из настроек.
+        self._mode = mode
+        with open(path, "rb") as snapshot:
+            self._mm = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, plans, phases, controllers, strings = _HEADER.unpack_from(
+            self._mm,
+            0,
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StorageError(f"Unsupported snapshot format: {path}")
+
+        offset = _HEADER_SIZE
+        self._plans = np.frombuffer(self._mm, _PLAN_DTYPE, plans, offset)
+        offset += _align(self._plans.nbytes)
+        self._phases = np.frombuffer(self._mm, _PHASE_DTYPE, phases, offset)
+        offset += _align(self._phases.nbytes)
+        self._controllers = np.frombuffer(
+            self._mm,
+            _CONTROLLER_DTYPE,
+            controllers,
+            offset,
+        )
+        offset += _align(self._controllers.nbytes)
+        self._strings_offset = offset
+        self._strings_size = strings
+        self._plan_cache: Dict[int, PhasePlan] = {}
+
+    def __len__(self) -> int:
+        return len(self._controllers)
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_offset + offset
+        return self._mm[start : start + length]
+
+    def _id_bytes(self, row: int) -> bytes:
+        record = self._controllers[row]
+        return self._string(int(record["id_off"]), int(record["id_len"]))
+
+    def find(self, intersection_id: str) -> Optional[int]:
+        """
+        Номер строки контроллера по id (бинарный поиск) или None.
+        """
+        key = intersection_id.encode()
+        row = bisect_left(_SortedIds(self), key)
+        if row < len(self) and self._id_bytes(row) == key:
+            return row
+        return None
+
+    def ids(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self._id_bytes(row).decode()
+
+    def _plan(self, plan: int) -> PhasePlan:
+        phases = self._plan_cache.get(plan)
+        if phases is None:
+            first, count, conflicts_off, conflicts_len = self._plans[plan]
+            phases = phases_from_plain(
+                [
+                    [
+                        self._string(int(p["name_off"]), int(p["name_len"])).decode(),
+                        int(p["duration"]),
+                        json.loads(
+                            self._string(int(p["states_off"]), int(p["states_len"])),
+                        ),
+                    ]
+                    for p in self._phases[first : first + count]
+                ],
+            )
+            conflicts = None
+            if conflicts_len:
+                conflicts = conflicts_from_plain(
+                    json.loads(self._string(int(conflicts_off), int(conflicts_len))),
+                )
+            phases = self._plan_cache[plan] = plan_registry.intern(phases, conflicts)
+        return phases
+
+    def controller(self, row: int) -> TrafficController:
+        """
+        Контроллер строки `row` в режиме снимка. Контроллер, идущий по
+        часам, продолжает с сохранённой позиции в цикле.
+        """
+        record = self._controllers[row]
+        controller = build_controller(
+            self._id_bytes(row).decode(),
+            self._string(int(record["name_off"]), int(record["name_len"])).decode(),
+            self._plan(int(record["plan"])),
+            self._mode,
+        )
+        index, elapsed = int(record["index"]), int(record["elapsed"])
+        if controller.follows_clock:
+            controller.tick(controller.plan.offsets[index] + elapsed)
+        else:
+            controller.current_index = index
+            controller.elapsed_in_phase = elapsed
+        return controller
+
+    def close(self) -> None:
+        # Представления numpy держат буфер mmap; сначала отпускаем их.
+        self._plans = self._phases = self._controllers = None  # type: ignore
+        self._mm.close()
+
+
+def save_fleet_snapshot(repository: InMemoryIntersectionRepository, path: str) -> int:
+    start = time.perf_counter()
+    count = write_snapshot(repository.list(), path, lock_for=repository.lock_for)
+    logger.info(
+        "Fleet snapshot written: %d intersections in %.3f s",
+        count,
+        time.perf_counter() - start,
+    )
+    return count
+
+
+def load_fleet_snapshot(
+    repository: InMemoryIntersectionRepository,
+    path: str,
+    mode: Optional[str] = None,
+) -> bool:
+    """
+    Подключить снимок к репозиторию, если файл есть. Контроллеры будут
+    собираться по мере обращения к ним, в режиме `mode` (по умолчанию —
+    `controller_mode` из настроек).
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        snapshot = FleetSnapshot(path, mode)
+    except (StorageError, ValueError, struct.error) as exc:
+        logger.error("Ignoring unreadable fleet snapshot %s: %s", path, exc)
+        return False
+    repository.attach_snapshot(snapshot)
+    logger.info("Fleet snapshot attached: %d intersections", len(snapshot))
+    return True
+
+
+async def run_periodic_snapshots(
+    repository: InMemoryIntersectionRepository,
+    path: str,
+    interval: float,
+) -> None:
+    """
+    Фоновая задача: периодически записывать снимок в отдельном потоке.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(save_fleet_snapshot, repository, path)
+        except Exception:  # noqa: BLE001 - задача не должна падать
+            logger.exception("Failed to write fleet snapshot")
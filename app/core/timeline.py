@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .domain import PhasePlan, TrafficController
+from .exceptions import TimelineTooLarge
+
+# Максимальная длина окна запроса переходов, секунды (неделя): ограничивает
+# размер ответа.
+MAX_TIMELINE_WINDOW = 7 * 24 * 3600
+
+# Максимум переходов в одном ответе (по оценке сверху): ограничивает память
+# на матрицы моментов, когда запрошено много перекрёстков.
+MAX_TIMELINE_TRANSITIONS = 1_000_000
+
+
+class TimelineEntry(NamedTuple):
+    """
+    Неизменяемая копия того, что нужно для расчёта будущего состояния:
+    план перекрёстка и текущая позиция внутри цикла.
+    """
+
+    intersection_id: str
+    name: str
+    plan: PhasePlan
+    position: int
+
+
+def timeline_entry(controller: TrafficController) -> TimelineEntry:
+    """
+    Снять позицию контроллера (вызывать под локом перекрёстка).
+    Сам контроллер дальше не используется и не изменяется.
+    """
+    index, elapsed = controller.locate()
+    return TimelineEntry(
+        controller.id,
+        controller.name,
+        controller.plan,
+        controller.plan.offsets[index] + elapsed,
+    )
+
+
+def offset_until(moment: datetime, now: Optional[float] = None) -> int:
+    """
+    Число секунд от текущего момента до `moment` (наивное время — местное).
+    """
+    now = time.time() if now is None else now
+    return int(moment.timestamp() - now)
+
+
+def _groups(
+    entries: Sequence[TimelineEntry],
+) -> List[Tuple[PhasePlan, np.ndarray, np.ndarray]]:
+    """
+    Разбить записи по планам: (план, номера записей, позиции в цикле).
+
+    Планы интернированы, поэтому групп столько, сколько различных
+    конфигураций, а расчёт внутри группы — векторные операции numpy.
+    """
+    rows: Dict[PhasePlan, List[int]] = {}
+    for row, entry in enumerate(entries):
+        rows.setdefault(entry.plan, []).append(row)
+
+    groups = []
+    for plan, plan_rows in rows.items():
+        positions = np.fromiter(
+            (entries[row].position for row in plan_rows),
+            dtype=np.int64,
+            count=len(plan_rows),
+        )
+        groups.append((plan, np.asarray(plan_rows), positions))
+    return groups
+
+
+def states_at(entries: Sequence[TimelineEntry], offset: int) -> List[dict]:
+    """
+    Состояния перекрёстков через `offset` секунд (в формате
+    `TrafficController.state_snapshot()`), в порядке `entries`.
+    """
+    snapshots: List[dict] = [{}] * len(entries)
+    for plan, rows, positions in _groups(entries):
+        offsets = np.frombuffer(plan.offsets, dtype=np.int64)
+        position = (positions + offset) % plan.cycle_length
+        index = np.searchsorted(offsets, position, side="right") - 1
+        elapsed = position - offsets[index]
+
+        signals = [plan.signals(i) for i in range(len(plan))]
+        for row, phase, seconds in zip(rows.tolist(), index.tolist(), elapsed.tolist()):
+            entry = entries[row]
+            snapshots[row] = {
+                "intersection_id": entry.intersection_id,
+                "intersection_name": entry.name,
+                "phase_name": plan.names[phase],
+                "elapsed_in_phase": seconds,
+                "phase_duration": plan.durations[phase],
+                "signals": signals[phase],
+            }
+    return snapshots
+
+
+def transitions_between(
+    entries: Sequence[TimelineEntry],
+    start: int,
+    end: int,
+    max_transitions: int = MAX_TIMELINE_TRANSITIONS,
+) -> List[dict]:
+    """
+    Все переходы между фазами в окне `[start, end]` (секунды от текущего
+    момента) для каждого перекрёстка, в порядке `entries`.
+
+    Переход в фазу k случается, когда позиция в цикле равна её смещению,
+    то есть в моменты `offsets[k] - position + m * cycle`. Для всех
+    перекрёстков группы сразу считаются первый переход в окне и число
+    переходов; дальше фазы идут по кругу, поэтому j-й переход — это первый
+    плюс расстояние между смещениями фаз, без сортировки и пошагового
+    перебора.
+
+    Для перекрёстка возвращается `{"intersection_id", "at", "phase_name"}`,
+    где `at` — моменты переходов по возрастанию, `phase_name` — фаза,
+    которая начинается в этот момент.
+
+    Если переходов может оказаться больше `max_transitions` (оценка сверху:
+    полных циклов в окне плюс один на перекрёсток), бросает
+    `TimelineTooLarge` до выделения памяти под матрицы.
+    """
+    groups = _groups(entries)
+    estimate = sum(
+        len(rows) * len(plan) * ((end - start) // plan.cycle_length + 1)
+        for plan, rows, _ in groups
+    )
+    if estimate > max_transitions:
+        raise TimelineTooLarge(
+            f"Request would return up to {estimate} transitions, the limit is "
+            f"{max_transitions}: narrow the window or pass fewer ids",
+        )
+
+    result: List[dict] = [{}] * len(entries)
+    for plan, rows, positions in groups:
+        offsets = np.frombuffer(plan.offsets, dtype=np.int64)
+        cycle = plan.cycle_length
+        phases = len(offsets)
+
+        first = start + (offsets[None, :] - positions[:, None] - start) % cycle
+        counts = np.where(first <= end, (end - first) // cycle + 1, 0).sum(axis=1)
+        first_phase = first.argmin(axis=1)
+
+        # Номер фазы j-го перехода "без свёртки": first_phase + j.
+        unrolled = first_phase[:, None] + np.arange(int(counts.max(initial=0)))
+        moments = (
+            first.min(axis=1)[:, None]
+            - offsets[first_phase][:, None]
+            + offsets[unrolled % phases]
+            + (unrolled // phases) * cycle
+        )
+        # Имена фаз тоже идут по кругу: срез повторённого списка имён.
+        names = list(plan.names) * (moments.shape[1] // phases + 2)
+
+        for local, (row, count, k) in enumerate(
+            zip(rows.tolist(), counts.tolist(), first_phase.tolist()),
+        ):
+            result[row] = {
+                "intersection_id": entries[row].intersection_id,
+                "at": moments[local, :count].tolist(),
+                "phase_name": names[k : k + count],
+            }
+    return result
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from .domain import Direction, Phase, SignalColor
+from .fleet import FleetEngine
+
+# Поток насыщения по умолчанию, авт/ч зелёного на движение.
+DEFAULT_SATURATION_FLOW = 1800.0
+
+_DIRECTIONS = list(Direction)
+# Сигналы, при которых очередь разъезжается.
+_DISCHARGING = (SignalColor.GREEN, SignalColor.YELLOW)
+
+
+def per_direction(
+    values: Mapping[Direction, float],
+    default: float = 0.0,
+) -> np.ndarray:
+    """
+    Значения по направлениям (авт/ч) -> вектор авт/с в порядке `Direction`.
+    """
+    return np.array([values.get(d, default) for d in _DIRECTIONS]) / 3600.0
+
+
+@dataclass
+class QueueSimulationResult:
+    """
+    Итоги моделирования очередей по перекрёсткам (суммарно по направлениям).
+
+    - `arrivals`, `departures` — прибывшие и проехавшие автомобили;
+    - `total_delay` — суммарная задержка в очереди, авт·с;
+    - `max_queue` — наибольшая очередь одного направления, авт;
+    - `final_queue` — автомобили, оставшиеся в очередях в конце.
+    """
+
+    intersection_ids: List[str]
+    duration: int
+    arrivals: np.ndarray
+    departures: np.ndarray
+    total_delay: np.ndarray
+    max_queue: np.ndarray
+    final_queue: np.ndarray
+    steps: int
+
+    def items(self) -> List[dict]:
+        average = np.divide(
+            self.total_delay,
+            self.arrivals,
+            out=np.zeros_like(self.total_delay),
+            where=self.arrivals > 0,
+        )
+        columns = np.round(
+            [
+                self.arrivals,
+                self.departures,
+                average,
+                self.max_queue,
+                self.final_queue,
+            ],
+            3,
+        )
+        return [
+            {
+                "intersection_id": intersection_id,
+                "arrivals": arrivals,
+                "departures": departures,
+                "average_delay": delay,
+                "max_queue": max_queue,
+                "final_queue": final_queue,
+            }
+            for intersection_id, (
+                arrivals,
+                departures,
+                delay,
+                max_queue,
+                final_queue,
+            ) in zip(self.intersection_ids, columns.T.tolist())
+        ]
+
+    def summary(self) -> dict:
+        arrivals = float(self.arrivals.sum())
+        return {
+            "intersections": len(self.intersection_ids),
+            "duration": self.duration,
+            "arrivals": round(arrivals, 3),
+            "throughput": round(float(self.departures.sum()), 3),
+            "total_delay": round(float(self.total_delay.sum()), 3),
+            "average_delay": round(
+                float(self.total_delay.sum()) / arrivals if arrivals else 0.0,
+                3,
+            ),
+            "max_queue": round(float(self.max_queue.max(initial=0.0)), 3),
+            "steps": self.steps,
+        }
+
+
+def _discharge_table(engine: FleetEngine) -> np.ndarray:
+    """
+    (N, K, D): разъезжается ли очередь направления в фазе k перекрёстка.
+    Одинаковые планы (общий кортеж фаз) разбираются один раз.
+    """
+    max_phases = engine.durations.shape[1]
+    table = np.zeros((len(engine), max_phases, len(_DIRECTIONS)), dtype=bool)
+    cache: Dict[int, np.ndarray] = {}
+    for row, phases in enumerate(engine.phases):
+        flags = cache.get(id(phases))
+        if flags is None:
+            flags = cache[id(phases)] = _phase_flags(phases)
+        table[row, : len(flags)] = flags
+    return table
+
+
+def _phase_flags(phases: Sequence[Phase]) -> np.ndarray:
+    return np.array(
+        [
+            [phase.states.get(d) in _DISCHARGING for d in _DIRECTIONS]
+            for phase in phases
+        ],
+        dtype=bool,
+    ).reshape(len(phases), len(_DIRECTIONS))
+
+
+def _signalled(engine: FleetEngine) -> np.ndarray:
+    """
+    (N, D): есть ли у перекрёстка сигнал для направления хотя бы в одной фазе.
+    """
+    signalled = np.zeros((len(engine), len(_DIRECTIONS)), dtype=bool)
+    for row, phases in enumerate(engine.phases):
+        for phase in phases:
+            for direction in phase.states:
+                signalled[row, _DIRECTIONS.index(direction)] = True
+    return signalled
+
+
+class FleetQueues:
+    """
+    Очереди парка по направлениям (N, D) и накопленные показатели.
+
+    Фазы адресуются плоским номером `строка * K + фаза`: таблицы
+    `lengths` (длительность) и `following` (следующая фаза) позволяют
+    продвигать любое подмножество перекрёстков одной выборкой. Внутри
+    фазы при постоянной интенсивности прибытия очередь меняется линейно,
+    поэтому `advance` обновляет очередь, площадь под её графиком
+    (задержку) и максимум в закрытом виде.
+
+    Учитываются только направления, которые сигнализирует хотя бы один
+    перекрёсток; у перекрёстка без сигнала для направления прибытий нет.
+    """
+
+    def __init__(
+        self,
+        engine: FleetEngine,
+        saturation_flows: Optional[np.ndarray] = None,
+    ) -> None:
+        count = len(engine)
+        signalled = _signalled(engine)
+        self.columns = signalled.any(axis=0)
+        self._signalled = signalled[:, self.columns]
+
+        durations = engine.durations
+        phases = durations.shape[1]
+        phase_counts = np.maximum((durations > 0).sum(axis=1), 1)
+        base = np.arange(count)[:, None] * phases
+        self.phases = phases
+        self.lengths = durations.ravel().astype(float)
+        self.following = (
+            base + (np.arange(phases) + 1) % phase_counts[:, None]
+        ).ravel()
+        self.current = base[:, 0] + engine.current_index
+        self.elapsed = engine.elapsed_in_phase.astype(float)
+
+        if saturation_flows is None:
+            saturation_flows = per_direction({}, DEFAULT_SATURATION_FLOW)
+        saturation = np.broadcast_to(saturation_flows, (count, len(_DIRECTIONS)))
+        discharge = _discharge_table(engine)[:, :, self.columns]
+        self._served = (saturation[:, None, self.columns] * discharge).reshape(
+            count * phases, -1
+        )
+
+        shape = (count, int(self.columns.sum()))
+        self.arrivals = np.zeros(shape)
+        self.rates = -self._served
+        self.queue = np.zeros(shape)
+        self.delay = np.zeros(shape)
+        self.max_queue = np.zeros(shape)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def set_arrivals(self, arrival_rates: np.ndarray) -> None:
+        """
+        Задать интенсивности прибытия (авт/с, (D,) или (N, D)). Очереди
+        должны быть перед этим продвинуты до момента смены.
+        """
+        arrivals = np.broadcast_to(arrival_rates, (len(self), len(_DIRECTIONS)))
+        self.arrivals = arrivals[:, self.columns] * self._signalled
+        self.rates = np.repeat(self.arrivals, self.phases, axis=0) - self._served
+
+    def advance(
+        self,
+        phases: np.ndarray,
+        dt: np.ndarray,
+        rows: Union[slice, np.ndarray] = slice(None),
+    ) -> None:
+        """
+        Продвинуть очереди строк `rows` на `dt` секунд ((n, 1)) в фазах
+        `phases` (плоские номера); фаза внутри интервала не меняется.
+        """
+        net = self.rates[phases]
+        queue = self.queue[rows]
+        end = queue + net * dt
+        area = (queue + end) * dt / 2
+        # Очередь опустела внутри шага: площадь — треугольник до момента
+        # опустошения, дальше прибывающие проезжают без задержки.
+        emptied = end < 0
+        if emptied.any():
+            area[emptied] = queue[emptied] ** 2 / (-2 * net[emptied])
+            end[emptied] = 0
+        self.delay[rows] += area
+        self.max_queue[rows] = np.maximum(self.max_queue[rows], end)
+        self.queue[rows] = end
+
+    def result(
+        self,
+        intersection_ids: List[str],
+        duration: int,
+        arrived: np.ndarray,
+        steps: int,
+    ) -> QueueSimulationResult:
+        """
+        Итоги по перекрёсткам; `arrived` — прибывшие по строкам (N,).
+        Проехавшие считаются из баланса: прибывшие минус оставшиеся.
+        """
+        final_queue = self.queue.sum(axis=1)
+        return QueueSimulationResult(
+            intersection_ids=intersection_ids,
+            duration=duration,
+            arrivals=arrived,
+            departures=arrived - final_queue,
+            total_delay=self.delay.sum(axis=1),
+            max_queue=self.max_queue.max(axis=1, initial=0.0),
+            final_queue=final_queue,
+            steps=steps,
+        )
+
+
+def simulate_queues(
+    engine: FleetEngine,
+    duration: int,
+    arrival_rates: np.ndarray,
+    saturation_flows: Optional[np.ndarray] = None,
+) -> QueueSimulationResult:
+    """
+    Смоделировать очереди автомобилей по направлениям для всего парка.
+
+    Модель жидкостная (детерминированная): автомобили прибывают с
+    постоянной интенсивностью `arrival_rates` (авт/с, (D,) или (N, D)),
+    очередь разъезжается с потоком насыщения `saturation_flows` во время
+    GREEN и YELLOW (см. `FleetQueues`).
+
+    Каждый перекрёсток за шаг доходит до конца своей текущей фазы: все
+    перекрёстки и направления обрабатываются одной векторной операцией,
+    а число шагов равно числу фаз за `duration`, а не числу секунд.
+
+    `engine` продвигается на `duration` секунд; контроллеры не меняются.
+    """
+    queues = FleetQueues(engine, saturation_flows)
+    queues.set_arrivals(arrival_rates)
+    current = queues.current
+    # Только первый шаг начинается с середины фазы: дальше каждый шаг —
+    # целая фаза (или остаток `duration` для последнего).
+    elapsed = queues.elapsed
+    left = np.full(len(queues), float(duration))
+    steps = 0
+
+    while left.any():
+        step = np.minimum(queues.lengths[current] - elapsed, left)
+        left -= step
+        queues.advance(current, step[:, None])
+        # Для перекрёстков, у которых время вышло, фаза больше не важна:
+        # их шаг дальше нулевой.
+        current = queues.following[current]
+        elapsed = 0.0
+        steps += 1
+
+    engine.advance(duration)
+    arrived = (queues.arrivals * duration).sum(axis=1)
+    return queues.result(engine.ids, duration, arrived, steps)
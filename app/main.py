@@ -1,8 +1,27 @@
+import asyncio
+import os
+import signal
+
 from fastapi import FastAPI
 
+from .api.middleware import RequestContextMiddleware, RequestMetricsMiddleware
+from .api.profiling import ProfilingMiddleware
+from .api.routes.admin import router as admin_router
+from .api.routes.corridors import router as corridors_router
 from .api.routes.intersections import router as intersections_router
+from .api.routes.metrics import router as metrics_router
+from .api.routes.simulation import router as simulation_router
 from .config import get_settings
-from .core.repository import create_default_intersection
+from .core.bulk_import import shutdown_process_pool
+from .core.metrics import monitor_event_loop_lag
+from .core.profiling import profiler
+from .core.repository import create_default_intersection, repo
+from .core.scheduler import scheduler
+from .core.snapshot import (
+    load_fleet_snapshot,
+    run_periodic_snapshots,
+    save_fleet_snapshot,
+)
 from .utils.logging import configure_logging, get_logger
 
 logger = get_logger(__name__)
@@ -21,15 +40,86 @@ def create_app() -> FastAPI:
         ),
     )
 
+    # Снимки парка поддерживаются только для in-memory хранилища: у
+    # остальных backend'ов своя долговременная форма хранения.
+    snapshots_enabled = (
+        bool(settings.snapshot_path) and settings.repository_backend == "memory"
+    )
+    background_tasks: list[asyncio.Task] = []
+
     @app.on_event("startup")
     def on_startup() -> None:  # type: ignore[unused-ignore]
         logger.info("Application starting up in %s mode", settings.app_env)
+        if snapshots_enabled:
+            load_fleet_snapshot(
+                repo,
+                settings.snapshot_path,
+                settings.controller_mode,
+            )
         create_default_intersection()
         logger.info("Default intersection initialized")
 
+    @app.on_event("startup")
+    async def start_scheduler() -> None:  # type: ignore[unused-ignore]
+        if settings.scheduler_enabled:
+            scheduler.start()
+            logger.info("Transition scheduler started (%d items)", len(scheduler))
+
+    @app.on_event("startup")
+    async def start_snapshots() -> None:  # type: ignore[unused-ignore]
+        if snapshots_enabled:
+            background_tasks.append(
+                asyncio.create_task(
+                    run_periodic_snapshots(
+                        repo,
+                        settings.snapshot_path,
+                        settings.snapshot_interval,
+                    ),
+                ),
+            )
+
+    @app.on_event("startup")
+    async def start_loop_monitor() -> None:  # type: ignore[unused-ignore]
+        if settings.metrics_enabled:
+            background_tasks.append(
+                asyncio.create_task(
+                    monitor_event_loop_lag(settings.metrics_loop_lag_interval),
+                ),
+            )
+
+    @app.on_event("startup")
+    async def install_profiling_signal() -> None:  # type: ignore[unused-ignore]
+        if not settings.profiling_signal or not hasattr(signal, "SIGUSR2"):
+            return
+        profiler.sample_every = settings.profiling_sample_every
+        profiler.interval = settings.profiling_interval
+        output = settings.profiling_output.format(pid=os.getpid())
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGUSR2,
+                profiler.toggle,
+                output,
+            )
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Цикл событий не в главном потоке (например, TestClient).
+            logger.debug("Profiling signal handler is not available")
+
+    @app.on_event("shutdown")
+    async def stop_background_tasks() -> None:  # type: ignore[unused-ignore]
+        await scheduler.stop()
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        background_tasks.clear()
+        profiler.stop()
+        shutdown_process_pool()
+
     @app.on_event("shutdown")
     def on_shutdown() -> None:  # type: ignore[unused-ignore]
         logger.info("Application shutting down")
+        if snapshots_enabled:
+            save_fleet_snapshot(repo, settings.snapshot_path)
+        repo.close()
 
     @app.get("/health", tags=["health"])
     def health() -> dict:  # type: ignore[unused-ignore]
@@ -38,10 +128,26 @@ def create_app() -> FastAPI:
         """
         return {"status": "ok"}
 
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+    if settings.metrics_enabled:
+        app.add_middleware(RequestMetricsMiddleware)
+        app.include_router(metrics_router)
+    if settings.admin_enabled:
+        app.include_router(admin_router, prefix="/admin")
+
     app.include_router(
         intersections_router,
         prefix=f"{settings.api_v1_prefix}/intersections",
     )
+    app.include_router(
+        corridors_router,
+        prefix=f"{settings.api_v1_prefix}/corridors",
+    )
+    app.include_router(
+        simulation_router,
+        prefix=f"{settings.api_v1_prefix}/simulation",
+    )
 
     return app
 
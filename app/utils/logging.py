@@ -1,23 +1,204 @@
+import atexit
+import json
 import logging
-from typing import Optional
+import queue
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Dict, List, Optional
 
 from ..config import Settings
 
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
+# Предел числа ключей в фильтре частоты.
+MAX_RATE_KEYS = 10_000
 
-def configure_logging(settings: Settings) -> None:
+# Контекст текущего запроса (request_id, метод, путь): задаётся
+# middleware одним присваиванием и попадает в запись лога только если она
+# прошла фильтры.
+request_context: ContextVar[Optional[Dict[str, object]]] = ContextVar(
+    "request_context", default=None
+)
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[logging.Handler] = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничение частоты по ключу сообщения: логгер, уровень и шаблон
+    (`record.msg` до подстановки аргументов), поэтому "Intersection not
+    found: %s" для любых id — один ключ.
+
+    За окно `window` секунд по ключу проходит не больше `rate` записей;
+    сверх лимита проходит каждая `sample_every`-я (0 — ни одной). Первая
+    запись следующего окна несёт число подавленных (`suppressed`).
+
+    Работает в потоке, который пишет в лог, до постановки в очередь, и без
+    блокировок: при гонках счёт приблизительный, зато отброшенная запись
+    стоит словарного поиска и сравнения.
     """
-    Базовая настройка логирования.
 
-    В реальном проекте сюда можно добавить:
-    - JSON-формат логов
-    - интеграцию с Sentry / ELK и т.п.
+    def __init__(self, rate: int, window: float = 1.0, sample_every: int = 0):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self.sample_every = sample_every
+        # ключ -> [начало окна, записей в окне, подавлено]
+        self._keys: Dict[tuple, List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg)
+        now = record.created
+        state = self._keys.get(key)
+        if state is None and len(self._keys) >= MAX_RATE_KEYS:
+            # Сообщения без шаблона (готовые строки) не должны раздувать
+            # таблицу ключей.
+            self._keys.clear()
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state is not None else 0
+            self._keys[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = int(suppressed)
+            return True
+        state[1] += 1
+        if state[1] <= self.rate:
+            return True
+        if self.sample_every and (state[1] - self.rate) % self.sample_every == 0:
+            record.sampled = self.sample_every
+            return True
+        state[2] += 1
+        return False
+
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    Постановка записи в очередь без форматирования: в потоке запроса
+    только подставляются аргументы и прикрепляется контекст, форматирование
+    и запись — в потоке слушателя.
     """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Трассировка содержит кадры: форматируем сейчас, пока они живы.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.context = request_context.get()
+        return record
+
+
+def _context(record: logging.LogRecord) -> Optional[Dict[str, object]]:
+    # Без очереди запись форматируется в потоке запроса: контекст берётся
+    # прямо из contextvar.
+    if "context" in record.__dict__:
+        return record.context  # type: ignore[attr-defined]
+    return request_context.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна запись — одна строка JSON: время, уровень, логгер, сообщение,
+    контекст запроса и служебные поля фильтра (`suppressed`, `sampled`).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, object] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        context = _context(record)
+        if context:
+            entry.update(context)
+        for field in ("suppressed", "sampled"):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    """
+    Текстовый формат с контекстом запроса и числом подавленных записей.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        context = _context(record)
+        if context:
+            text += " " + " ".join(f"{k}={v}" for k, v in context.items())
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            text += f" (suppressed {suppressed} similar)"
+        return text
+
+
+def configure_logging(settings: Settings, stream: Optional[IO[str]] = None) -> None:
+    """
+    Настройка логирования: записи из потоков запросов проходят
+    ограничение частоты и кладутся в очередь, а форматирует (JSON или
+    текст) и пишет их отдельный поток-слушатель, поэтому медленный вывод
+    не задерживает запросы.
+
+    Повторный вызов заменяет ранее установленный обработчик.
+    """
+    global _listener, _handler
+
     level = getattr(logging, settings.log_level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=level,
-        format="[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(
+        JsonFormatter() if settings.log_format == "json" else _TextFormatter()
     )
 
+    shutdown_logging()
+    root = logging.getLogger()
+    if settings.log_queue:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler: logging.Handler = _ContextQueueHandler(records)
+        _listener = QueueListener(records, output)
+        _listener.start()
+    else:
+        handler = output
+    if settings.log_rate_limit > 0:
+        handler.addFilter(
+            RateLimitFilter(
+                settings.log_rate_limit,
+                settings.log_rate_window,
+                settings.log_sample_every,
+            ),
+        )
+    _handler = handler
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """
+    Дописать очередь и снять обработчик, установленный `configure_logging`.
+    """
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     return logging.getLogger(name or "traffic-light")
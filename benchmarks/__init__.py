@@ -0,0 +1 @@
+# Пакет с бенчмарками (запускаются вручную, не входят в pytest)
@@ -0,0 +1,38 @@
+"""
+Время подбора смещений "зелёной волны" для коридоров разной длины
+(случайные длительности зелёного и длины участков, общий цикл 90 с).
+
+Запуск:
+    python -m benchmarks.bench_corridor
+"""
+
+import time
+
+import numpy as np
+
+from app.core.corridor import optimize_offsets
+
+SIZES = [20, 50, 200, 500]
+CYCLE = 90
+
+
+def main() -> None:
+    rng = np.random.default_rng(1)
+    for size in SIZES:
+        greens = np.zeros((size, CYCLE), dtype=bool)
+        for i in range(size):
+            greens[i, : rng.integers(35, 55)] = True
+        travel = np.concatenate(([0], np.cumsum(rng.integers(15, 40, size - 1))))
+
+        start = time.perf_counter()
+        _, outbound, inbound = optimize_offsets(greens, travel)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{size:>4} intersections: {elapsed * 1000:7.1f} ms, "
+            f"bandwidth {outbound} s / {inbound} s "
+            f"(min green {greens.sum(axis=1).min()} s)",
+        )
+
+
+if __name__ == "__main__":
+    main()
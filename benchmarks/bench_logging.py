@@ -0,0 +1,125 @@
+"""
+Логирование под потоком 404: каждый запрос к несуществующему перекрёстку
+пишет предупреждение "Intersection not found".
+
+Сравниваются:
+- `basicConfig` — прежняя схема: текстовый `StreamHandler`, запись и
+  форматирование в потоке запроса;
+- `queue` — очередь и поток-слушатель, JSON, без ограничения частоты;
+- `queue+limit` — то же с ограничением частоты по ключу сообщения
+  (настройки по умолчанию).
+
+Для каждой схемы измеряются пропускная способность самого логгера
+(`logger.warning` из нескольких потоков) и 404-запросов, поданных прямо
+в ASGI-приложение. Логи пишутся во временный файл.
+
+Запуск:
+    python -m benchmarks.bench_logging
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import IO, Callable, Dict
+
+from app.config import Settings
+from app.main import create_app
+from app.utils.logging import (
+    TEXT_FORMAT,
+    configure_logging,
+    get_logger,
+    shutdown_logging,
+)
+
+from .bench_metrics import _request
+
+THREADS = 4
+RECORDS = 20_000
+REQUESTS = 5_000
+
+
+def _basic_config(stream: IO[str]) -> None:
+    shutdown_logging()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    # Снимается вместе с остальными при смене схемы.
+    _BASIC_HANDLERS.append(handler)
+
+
+_BASIC_HANDLERS = []
+
+
+def _reset() -> None:
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in _BASIC_HANDLERS:
+        root.removeHandler(handler)
+        handler.flush()
+    _BASIC_HANDLERS.clear()
+
+
+SCHEMES: Dict[str, Callable[[IO[str]], None]] = {
+    "basicConfig": _basic_config,
+    "queue": lambda stream: configure_logging(Settings(log_rate_limit=0), stream),
+    "queue+limit": lambda stream: configure_logging(Settings(), stream),
+}
+
+
+def _records_per_second() -> float:
+    logger = get_logger("app.api.routes.intersections")
+
+    def flood(thread: int) -> None:
+        for n in range(RECORDS):
+            logger.warning("Intersection not found: %s", f"missing-{thread}-{n}")
+
+    threads = [threading.Thread(target=flood, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return THREADS * RECORDS / (time.perf_counter() - start)
+
+
+def _requests_per_second(app) -> float:  # type: ignore[no-untyped-def]
+    call = _request(app, "GET", "/api/v1/intersections/missing/state", status=404)
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await call()
+        return REQUESTS / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    app = create_app()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, configure in SCHEMES.items():
+            path = os.path.join(directory, f"{name}.log")
+            with open(path, "w", encoding="utf-8") as stream:
+                # Замеры раздельно: между ними слушатель дописывает очередь,
+                # чтобы хвост одного замера не достался другому.
+                configure(stream)
+                records = _records_per_second()
+                _reset()
+                configure(stream)
+                requests = _requests_per_second(app)
+                _reset()
+            with open(path, encoding="utf-8") as fh:
+                lines = sum(1 for _ in fh)
+            print(
+                f"{name:<12} logger {records:10.0f} records/s  "
+                f"404 flood {requests:8.0f} req/s  lines written {lines}",
+            )
+
+
+if __name__ == "__main__":
+    main()
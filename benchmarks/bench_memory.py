@@ -0,0 +1,89 @@
+"""
+Память на перекрёсток при загрузке парка с интернированием планов фаз
+и без него.
+
+Каждый перекрёсток создаётся из собственных объектов `Phase` (как при
+разборе конфигурации из API). Без интернирования контроллер держит свой
+план (фазы, словари состояний, смещения); с интернированием одинаковые
+конфигурации сводятся к одному `PhasePlan`, а лишние фазы освобождаются.
+
+Запуск:
+    python -m benchmarks.bench_memory
+"""
+
+import gc
+import tracemalloc
+from typing import Callable, List
+
+from app.core.domain import (
+    Direction,
+    Phase,
+    PhasePlan,
+    SignalColor,
+    TrafficController,
+)
+
+SIZES = [10000, 100000]
+PLAN_VARIANTS = 8
+
+
+def _phases(variant: int) -> List[Phase]:
+    green = 20 + variant
+    return [
+        Phase(
+            "NS_GREEN",
+            green,
+            {Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "NS_YELLOW",
+            5,
+            {Direction.NS: SignalColor.YELLOW, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "EW_GREEN",
+            green,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+        ),
+        Phase(
+            "EW_YELLOW",
+            5,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.YELLOW},
+        ),
+    ]
+
+
+def _measure(count: int, build: Callable[[int], TrafficController]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    fleet = [build(n) for n in range(count)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del fleet
+    return current / count
+
+
+def main() -> None:
+    for size in SIZES:
+        private = _measure(
+            size,
+            lambda n: TrafficController(
+                f"i{n:06d}", f"Intersection {n}", PhasePlan(_phases(n % PLAN_VARIANTS))
+            ),
+        )
+        interned = _measure(
+            size,
+            lambda n: TrafficController(
+                f"i{n:06d}", f"Intersection {n}", _phases(n % PLAN_VARIANTS)
+            ),
+        )
+        print(
+            f"{size:>6} intersections: own plan {private:7.0f} B/intersection, "
+            f"interned {interned:7.0f} B/intersection "
+            f"({private / interned:.1f}x)",
+        )
+
+
+if __name__ == "__main__":
+    main()
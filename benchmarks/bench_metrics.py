@@ -0,0 +1,204 @@
+"""
+Накладные расходы метрик: задержка `GET /state` и `POST /tick` в
+приложении с метриками и без них (`METRICS_ENABLED=false`), а также
+стоимость отдельных операций — наблюдения в гистограмму, инкремента
+счётчика, шаблона маршрута и выгрузки `/metrics`.
+
+Запросы подаются прямо в ASGI-приложение, без сети: это худший случай,
+когда сам обработчик быстрее всего и доля метрик в задержке наибольшая.
+Приложения чередуются, берётся лучший из `ROUNDS` замеров.
+
+Запуск:
+    python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Optional
+
+from fastapi import FastAPI
+
+from app.api.middleware import RequestMetricsMiddleware, route_template
+from app.config import get_settings
+from app.core.metrics import Counter, Histogram, record_tick, registry
+from app.core.repository import create_default_intersection, repo
+from app.main import create_app
+
+STATE = "/api/v1/intersections/default/state"
+REQUESTS = 5000
+ROUNDS = 7
+# Допустимая доля метрик в задержке запроса (несколько процентов).
+BUDGET = 0.03
+
+
+# Маршрут, как его видит middleware после маршрутизации.
+_ROUTE = type(
+    "Route",
+    (),
+    {"path": "/{intersection_id}/state", "path_format": "/{intersection_id}/state"},
+)()
+
+
+def _app(metrics_enabled: bool) -> FastAPI:
+    os.environ["METRICS_ENABLED"] = str(metrics_enabled).lower()
+    get_settings.cache_clear()
+    try:
+        return create_app()
+    finally:
+        del os.environ["METRICS_ENABLED"]
+        get_settings.cache_clear()
+
+
+def _request(
+    app: FastAPI,
+    method: str,
+    path: str,
+    body: Optional[dict] = None,
+    status: int = 200,
+) -> Callable[[], "asyncio.Future"]:
+    payload = b"" if body is None else json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            assert message["status"] == status, message["status"]
+
+    def call():  # type: ignore[no-untyped-def]
+        return app(dict(scope), receive, send)
+
+    return call
+
+
+async def _seconds_per_request(call: Callable) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await call()
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def _compare(name: str, method: str, path: str, body: Optional[dict]) -> float:
+    """
+    Задержка запроса без метрик; для сравнения выводится и задержка с
+    метриками (на шумной машине разница сопоставима с шумом).
+    """
+    plain = _request(_app(False), method, path, body)
+    measured = _request(_app(True), method, path, body)
+
+    async def run() -> tuple:
+        await _seconds_per_request(plain)
+        await _seconds_per_request(measured)
+        without, with_metrics = [], []
+        for _ in range(ROUNDS):
+            without.append(await _seconds_per_request(plain))
+            with_metrics.append(await _seconds_per_request(measured))
+        return min(without), min(with_metrics)
+
+    without, with_metrics = asyncio.run(run())
+    print(
+        f"{name:<14} without {without * 1e6:8.1f} us  with {with_metrics * 1e6:8.1f} us"
+        f"  ({with_metrics / without - 1:+.1%})",
+    )
+    return without
+
+
+def _nanoseconds(func: Callable[[], object], number: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1e9
+
+
+async def _middleware_nanoseconds(number: int = 100_000) -> float:
+    """
+    Чистая добавка middleware на запрос: он же вокруг пустого приложения
+    минус пустое приложение.
+    """
+
+    async def endpoint(scope, receive, send) -> None:  # type: ignore
+        scope["route"] = _ROUTE
+        await send({"type": "http.response.start", "status": 200})
+
+    async def receive() -> dict:
+        return {}
+
+    async def send(message: dict) -> None:
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": STATE}
+    wrapped = RequestMetricsMiddleware(endpoint)
+    best = []
+    for app in (endpoint, wrapped):
+        rounds = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            for _ in range(number):
+                await app(dict(scope), receive, send)
+            rounds.append((time.perf_counter() - start) / number)
+        best.append(min(rounds))
+    return (best[1] - best[0]) * 1e9
+
+
+async def _render_microseconds(number: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        registry.render()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main() -> None:
+    repo.clear()
+    create_default_intersection()
+    tick = "/api/v1/intersections/default/tick"
+
+    latencies = [
+        _compare("GET /state", "GET", STATE, None),
+        _compare("POST /tick", "POST", tick, {"seconds": 7}),
+    ]
+
+    histogram = Histogram("bench_seconds", "Bench.", ("method", "route", "status"))
+    counter = Counter("bench_total", "Bench.")
+    labels = ("GET", "/api/v1/intersections/{intersection_id}/state", "200")
+    scope = {
+        "path": STATE,
+        "route": _ROUTE,
+    }
+    middleware = asyncio.run(_middleware_nanoseconds())
+    observe = _nanoseconds(lambda: histogram.observe(0.001, labels))
+    print(f"Histogram.observe   {observe:8.0f} ns")
+    print(f"Counter.inc         {_nanoseconds(counter.inc):8.0f} ns")
+    print(f"record_tick         {_nanoseconds(lambda: record_tick(7, 1)):8.0f} ns")
+    print(f"route_template      {_nanoseconds(lambda: route_template(scope)):8.0f} ns")
+    print(f"middleware/request  {middleware:8.0f} ns")
+    print(f"render /metrics     {asyncio.run(_render_microseconds()):8.0f} us")
+
+    # Доля метрик в задержке самого быстрого запроса: добавка middleware и
+    # счётчиков tick к задержке запроса без метрик.
+    overhead = (middleware + observe) / 1e9 / min(latencies)
+    verdict = "within" if overhead <= BUDGET else "ABOVE"
+    print(f"metrics overhead {overhead:.2%} of request latency: {verdict} the budget")
+
+
+if __name__ == "__main__":
+    main()
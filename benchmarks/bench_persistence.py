@@ -0,0 +1,81 @@
+"""
+Пропускная способность tick с журналом на диске и без него.
+
+Несколько потоков тикают перекрёстки через `locked()`, как это делают
+сервисы; сравниваются in-memory репозиторий и DurableIntersectionRepository
+с разными уровнями надёжности.
+
+Запуск:
+    python -m benchmarks.bench_persistence
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from app.core.domain import Direction, Phase, SignalColor, TrafficController
+from app.core.durable_repository import DurableIntersectionRepository
+from app.core.repository import InMemoryIntersectionRepository
+
+INTERSECTIONS = 1000
+THREADS = 8
+TICKS_PER_THREAD = 20000
+
+
+def _controller(intersection_id: str) -> TrafficController:
+    phases = [
+        Phase(
+            name="NS_GREEN",
+            duration=30,
+            states={Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            name="EW_GREEN",
+            duration=30,
+            states={Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+        ),
+    ]
+    return TrafficController(intersection_id, intersection_id, phases)
+
+
+def _ticks_per_second(repo: InMemoryIntersectionRepository) -> float:
+    ids = [f"i{n}" for n in range(INTERSECTIONS)]
+    for intersection_id in ids:
+        repo.add(_controller(intersection_id))
+
+    def worker(offset: int) -> None:
+        for n in range(TICKS_PER_THREAD):
+            with repo.locked(ids[(offset + n) % INTERSECTIONS]) as controller:
+                controller.tick(1)
+
+    threads = [threading.Thread(target=worker, args=(n * 97,)) for n in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return THREADS * TICKS_PER_THREAD / (time.perf_counter() - start)
+
+
+def main() -> None:
+    baseline = _ticks_per_second(InMemoryIntersectionRepository())
+    print(f"{'memory':>14}: {baseline:10.0f} ticks/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for durability in ("none", "batch", "sync"):
+            repo = DurableIntersectionRepository(
+                os.path.join(directory, f"{durability}.log"),
+                durability=durability,
+                flush_interval=0.002 if durability == "sync" else 0.05,
+            )
+            rate = _ticks_per_second(repo)
+            repo.close()
+            print(
+                f"{'durable/' + durability:>14}: {rate:10.0f} ticks/s "
+                f"({rate / baseline:.0%} of memory)",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Стоимость хуков профилировщика: пока он выключен — проверка флага в
+middleware, чтение contextvar в обёртках маршрута и эндпоинта и пустой
+таймер этапа; включённый — задержка `GET /state` и `POST /tick` при
+сэмплировании 1 из 100 и 1 из 1 запроса.
+
+Запросы подаются прямо в ASGI-приложение (см. `bench_metrics`).
+
+Запуск:
+    python -m benchmarks.bench_profiling
+"""
+
+import asyncio
+
+from app.api.profiling import ProfilingMiddleware
+from app.core.profiling import profiler
+from app.core.repository import create_default_intersection, repo
+from app.main import create_app
+
+from .bench_metrics import ROUNDS, STATE, _nanoseconds, _request, _seconds_per_request
+
+
+async def _middleware_nanoseconds(number: int = 100_000) -> float:
+    async def endpoint(scope, receive, send) -> None:  # type: ignore
+        pass
+
+    wrapped = ProfilingMiddleware(endpoint)
+    scope = {"type": "http"}
+    best = []
+    for app in (endpoint, wrapped):
+        rounds = []
+        for _ in range(ROUNDS):
+            start = asyncio.get_running_loop().time()
+            for _ in range(number):
+                await app(scope, None, None)
+            rounds.append((asyncio.get_running_loop().time() - start) / number)
+        best.append(min(rounds))
+    return (best[1] - best[0]) * 1e9
+
+
+def _latency(call) -> float:  # type: ignore[no-untyped-def]
+    async def run() -> float:
+        await _seconds_per_request(call)
+        return min([await _seconds_per_request(call) for _ in range(ROUNDS)])
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    repo.clear()
+    create_default_intersection()
+    app = create_app()
+    calls = {
+        "GET /state": _request(app, "GET", STATE),
+        "POST /tick": _request(
+            app, "POST", "/api/v1/intersections/default/tick", {"seconds": 7}
+        ),
+    }
+
+    stage = _nanoseconds(lambda: profiler.stage("domain").__enter__())
+    print(f"disabled stage()         {stage:8.0f} ns")
+    print(f"disabled middleware      {asyncio.run(_middleware_nanoseconds()):8.0f} ns")
+
+    for name, call in calls.items():
+        disabled = _latency(call)
+        profiler.start(sample_every=100)
+        sampled = _latency(call)
+        profiler.start(sample_every=1)
+        every = _latency(call)
+        profiler.stop()
+        print(
+            f"{name:<12} disabled {disabled * 1e6:7.1f} us  "
+            f"1/100 {sampled * 1e6:7.1f} us ({sampled / disabled - 1:+.1%})  "
+            f"1/1 {every * 1e6:7.1f} us ({every / disabled - 1:+.1%})",
+        )
+    # Этапы последнего прогона (POST /tick, каждый запрос).
+    for name, timing in profiler.status()["stages"].items():
+        print(f"  {name:<14} mean {timing['mean_ms']:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
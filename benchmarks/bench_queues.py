@@ -0,0 +1,102 @@
+"""
+Моделирование очередей для города: сутки для 5000 перекрёстков с разными
+планами и сдвинутыми фазами. Для сравнения — посекундный шаг той же
+модели на части города за час.
+
+Запуск:
+    python -m benchmarks.bench_queues
+"""
+
+import time
+
+import numpy as np
+
+from app.core.domain import Direction, Phase, SignalColor, TrafficController
+from app.core.fleet import FleetEngine
+from app.core.traffic import DEFAULT_SATURATION_FLOW, per_direction, simulate_queues
+
+CITIES = [500, 5000]
+PLAN_VARIANTS = 8
+DAY = 24 * 3600
+ARRIVALS = {Direction.NS: 600, Direction.EW: 450}
+
+
+def _controller(n: int) -> TrafficController:
+    green = 20 + n % PLAN_VARIANTS
+    phases = [
+        Phase(
+            "NS_GREEN",
+            green,
+            {Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "NS_YELLOW",
+            5,
+            {Direction.NS: SignalColor.YELLOW, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "EW_GREEN",
+            green,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+        ),
+        Phase(
+            "EW_YELLOW",
+            5,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.YELLOW},
+        ),
+    ]
+    controller = TrafficController(f"i{n:05d}", f"Intersection {n}", phases)
+    controller.tick(n * 7)
+    return controller
+
+
+def _per_second(engine: FleetEngine, seconds: int) -> float:
+    """
+    Та же модель с шагом 1 с (очередь меняется по секундам): эталон
+    "наивного" подхода, стоимость пропорциональна числу секунд.
+    """
+    green = np.array(
+        [
+            [p.states[d] != SignalColor.RED for d in ARRIVALS]
+            for p in _controller(0).phases
+        ]
+    )
+    arrivals = per_direction(ARRIVALS)[[list(Direction).index(d) for d in ARRIVALS]]
+    saturation = DEFAULT_SATURATION_FLOW / 3600
+    queue = np.zeros((len(engine), len(ARRIVALS)))
+    delay = 0.0
+    for _ in range(seconds):
+        served = green[engine.current_index % len(green)] * saturation
+        queue = np.maximum(queue + arrivals - served, 0)
+        delay += queue.sum()
+        engine.advance(1)
+    return delay
+
+
+def main() -> None:
+    for city in CITIES:
+        controllers = [_controller(n) for n in range(city)]
+        engine = FleetEngine.from_controllers(controllers)
+
+        start = time.perf_counter()
+        result = simulate_queues(engine, DAY, per_direction(ARRIVALS))
+        elapsed = time.perf_counter() - start
+        summary = result.summary()
+        print(
+            f"{city:>5} intersections x 1 day: {elapsed:.2f} s "
+            f"({summary['steps']} steps), average delay "
+            f"{summary['average_delay']:.1f} s, max queue {summary['max_queue']:.1f}",
+        )
+
+    engine = FleetEngine.from_controllers(controllers)
+    start = time.perf_counter()
+    _per_second(engine, 3600)
+    step_time = time.perf_counter() - start
+    print(
+        f"per-second steps, {CITIES[-1]} intersections x 1 h: {step_time:.2f} s "
+        f"(~{step_time * 24:.0f} s extrapolated to 1 day)",
+    )
+
+
+if __name__ == "__main__":
+    main()
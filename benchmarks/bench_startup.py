@@ -0,0 +1,73 @@
+"""
+Время холодного старта парка: загрузка конфигураций через Pydantic
+(`IntersectionConfig` -> `save_from_config`) против подключения бинарного
+снимка.
+
+Для снимка отдельно измеряется подключение (что делает `on_startup`) и
+первое обращение к одному перекрёстку.
+
+Запуск:
+    python -m benchmarks.bench_startup
+"""
+
+import os
+import tempfile
+import time
+
+from app.core.models import IntersectionConfig
+from app.core.repository import InMemoryIntersectionRepository, save_from_config
+from app.core.snapshot import load_fleet_snapshot, write_snapshot
+
+SIZES = [1000, 10000, 50000]
+
+PLAN = [
+    {"name": "NS_GREEN", "duration": 30, "states": {"NS": "GREEN", "EW": "RED"}},
+    {"name": "NS_YELLOW", "duration": 5, "states": {"NS": "YELLOW", "EW": "RED"}},
+    {"name": "EW_GREEN", "duration": 30, "states": {"NS": "RED", "EW": "GREEN"}},
+    {"name": "EW_YELLOW", "duration": 5, "states": {"NS": "RED", "EW": "YELLOW"}},
+]
+
+
+def _configs(count: int) -> list:
+    return [
+        {"id": f"i{n:06d}", "name": f"Intersection {n}", "phases": PLAN}
+        for n in range(count)
+    ]
+
+
+def _pydantic_load(raw: list, repo: InMemoryIntersectionRepository) -> float:
+    start = time.perf_counter()
+    for item in raw:
+        save_from_config(IntersectionConfig(**item), repo)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            raw = _configs(size)
+            repo = InMemoryIntersectionRepository()
+            pydantic_time = _pydantic_load(raw, repo)
+
+            path = os.path.join(directory, f"fleet-{size}.bin")
+            write_snapshot(repo.list(), path)
+
+            fresh = InMemoryIntersectionRepository()
+            start = time.perf_counter()
+            load_fleet_snapshot(fresh, path)
+            attach_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fresh.get(f"i{size // 2:06d}").state_json()
+            first_access = time.perf_counter() - start
+
+            print(
+                f"{size:>6} intersections: pydantic {pydantic_time * 1000:9.1f} ms, "
+                f"snapshot attach {attach_time * 1000:7.3f} ms, "
+                f"first get {first_access * 1000:6.3f} ms "
+                f"({os.path.getsize(path) / size:.0f} B/intersection)",
+            )
+
+
+if __name__ == "__main__":
+    main()
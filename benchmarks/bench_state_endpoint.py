@@ -0,0 +1,104 @@
+"""
+Микробенчмарк `GET /state`: прежний путь (dict -> IntersectionState ->
+валидация response_model) против ответа из заранее сериализованных
+фрагментов фазы.
+
+Запросы подаются прямо в ASGI-приложение, без сети и TestClient, чтобы
+измерять собственную стоимость обработчика и сериализации.
+
+Запуск:
+    python -m benchmarks.bench_state_endpoint
+"""
+
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI
+
+from app.api.deps import get_settings_dep
+from app.config import Settings
+from app.core.models import IntersectionState
+from app.core.repository import create_default_intersection, repo
+from app.core.services import get_intersection_state_service
+from app.main import create_app
+
+REQUESTS = 20000
+
+
+def _legacy_app() -> FastAPI:
+    legacy = FastAPI()
+
+    @legacy.get("/api/v1/intersections/{intersection_id}/state")
+    def get_state(
+        intersection_id: str,
+        settings: Settings = Depends(get_settings_dep),
+    ) -> IntersectionState:
+        snapshot = get_intersection_state_service(intersection_id)
+        return IntersectionState(**snapshot)
+
+    return legacy
+
+
+async def _requests_per_second(app: FastAPI, path: str) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    async def run(count: int) -> float:
+        start = time.perf_counter()
+        for _ in range(count):
+            await app(dict(scope), receive, send)
+        return time.perf_counter() - start
+
+    await run(500)
+    return REQUESTS / await run(REQUESTS)
+
+
+def _calls_per_second(func, number: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return number / (time.perf_counter() - start)
+
+
+def main() -> None:
+    app = create_app()
+    repo.clear()
+    create_default_intersection()
+    controller = repo.get("default")
+    path = "/api/v1/intersections/default/state"
+
+    legacy = asyncio.run(_requests_per_second(_legacy_app(), path))
+    cached = asyncio.run(_requests_per_second(app, path))
+    print(f"ASGI  legacy: {legacy:10.0f} req/s")
+    print(f"ASGI  cached: {cached:10.0f} req/s  ({cached / legacy:.2f}x)")
+
+    legacy_body = _calls_per_second(
+        lambda: IntersectionState(**controller.state_snapshot()).model_dump_json(),
+    )
+    cached_body = _calls_per_second(controller.state_json)
+    print(f"Body  legacy: {legacy_body:10.0f} ops/s")
+    print(
+        f"Body  cached: {cached_body:10.0f} ops/s  ({cached_body / legacy_body:.2f}x)",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Бенчмарк TrafficController.tick: сравнение арифметики по модулю цикла
+с эталонной пошаговой реализацией на больших прыжках по времени.
+
+Запуск:
+    python -m benchmarks.bench_tick
+"""
+
+import timeit
+
+from app.core.domain import Direction, Phase, SignalColor, TrafficController
+
+YEAR = 365 * 24 * 60 * 60
+
+
+def _controller() -> TrafficController:
+    phases = [
+        Phase(
+            name=name,
+            duration=duration,
+            states={Direction.NS: ns, Direction.EW: ew},
+        )
+        for name, duration, ns, ew in [
+            ("NS_GREEN", 30, SignalColor.GREEN, SignalColor.RED),
+            ("NS_YELLOW", 5, SignalColor.YELLOW, SignalColor.RED),
+            ("EW_GREEN", 30, SignalColor.RED, SignalColor.GREEN),
+            ("EW_YELLOW", 5, SignalColor.RED, SignalColor.YELLOW),
+        ]
+    ]
+    return TrafficController("bench", "bench", phases)
+
+
+def _loop_tick(controller: TrafficController, seconds: int) -> None:
+    remaining = seconds
+    while remaining > 0:
+        time_left = controller.current_phase.duration - controller.elapsed_in_phase
+        if remaining < time_left:
+            controller.elapsed_in_phase += remaining
+            remaining = 0
+        else:
+            remaining -= time_left
+            controller.current_index = (controller.current_index + 1) % len(
+                controller.phases,
+            )
+            controller.elapsed_in_phase = 0
+
+
+def main() -> None:
+    for seconds in [1, 60, 3600, 7 * 24 * 3600, YEAR]:
+        fast = _controller()
+        slow = _controller()
+        number = 10 if seconds >= 3600 else 10000
+
+        fast_time = timeit.timeit(lambda: fast.tick(seconds), number=number)
+        slow_time = timeit.timeit(lambda: _loop_tick(slow, seconds), number=number)
+
+        assert (fast.current_index, fast.elapsed_in_phase) == (
+            slow.current_index,
+            slow.elapsed_in_phase,
+        )
+        print(
+            f"tick({seconds:>9}): modulo {fast_time / number * 1e6:10.2f} us, "
+            f"loop {slow_time / number * 1e6:12.2f} us",
+        )
+
+
+if __name__ == "__main__":
+    main()
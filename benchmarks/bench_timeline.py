@@ -0,0 +1,96 @@
+"""
+Запросы к временной шкале для района: состояние через заданное время и
+все переходы за сутки. Для сравнения — пошаговая симуляция копий
+контроллеров (tick(1)) на части района за час.
+
+Запуск:
+    python -m benchmarks.bench_timeline
+"""
+
+import copy
+import time
+
+from app.core.domain import Direction, Phase, SignalColor, TrafficController
+from app.core.timeline import states_at, timeline_entry, transitions_between
+
+DISTRICTS = [500, 5000]
+PLAN_VARIANTS = 8
+DAY = 24 * 3600
+
+
+def _controller(n: int) -> TrafficController:
+    green = 20 + n % PLAN_VARIANTS
+    phases = [
+        Phase(
+            "NS_GREEN",
+            green,
+            {Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "NS_YELLOW",
+            5,
+            {Direction.NS: SignalColor.YELLOW, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            "EW_GREEN",
+            green,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+        ),
+        Phase(
+            "EW_YELLOW",
+            5,
+            {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.YELLOW},
+        ),
+    ]
+    controller = TrafficController(f"i{n:05d}", f"Intersection {n}", phases)
+    controller.tick(n * 7)
+    return controller
+
+
+def _stepwise(controllers: list, seconds: int) -> int:
+    transitions = 0
+    for controller in controllers:
+        reference = copy.copy(controller)
+        for _ in range(seconds):
+            previous = reference.current_index
+            reference.tick(1)
+            transitions += reference.current_index != previous
+    return transitions
+
+
+def main() -> None:
+    for district in DISTRICTS:
+        controllers = [_controller(n) for n in range(district)]
+
+        start = time.perf_counter()
+        entries = [timeline_entry(c) for c in controllers]
+        collect = time.perf_counter() - start
+
+        start = time.perf_counter()
+        states_at(entries, 17 * 3600 + 42 * 60 + 10)
+        states_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        day = transitions_between(entries, 0, DAY)
+        day_time = time.perf_counter() - start
+        count = sum(len(item["at"]) for item in day)
+
+        print(
+            f"{district:>5} intersections: collect {collect * 1000:.1f} ms, "
+            f"states at T {states_time * 1000:.1f} ms, "
+            f"one-day transitions {day_time * 1000:.1f} ms ({count} transitions)",
+        )
+
+    sample = controllers[:100]
+    start = time.perf_counter()
+    _stepwise(sample, 3600)
+    step_time = time.perf_counter() - start
+    print(
+        f"stepwise tick(1), 100 intersections x 1 h: {step_time * 1000:.1f} ms "
+        f"(~{step_time * DISTRICTS[-1] / 100 * 24:.0f} s extrapolated to "
+        f"{DISTRICTS[-1]} intersections x 1 day)",
+    )
+
+
+if __name__ == "__main__":
+    main()
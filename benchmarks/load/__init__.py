@@ -0,0 +1,8 @@
+"""
+Нагрузочный стенд на одной машине: генератор синтетического города
+(`city`) и асинхронный драйвер нагрузки (`driver`) против локально
+запущенного `app.main:app`.
+
+    python -m benchmarks.load --intersections 10000 --concurrency 8,16,32,64
+    python -m benchmarks.load --mix state=80,tick=20 --stage-seconds 30
+"""
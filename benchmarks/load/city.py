@@ -0,0 +1,149 @@
+"""
+Генератор синтетического города: парк конфигураций перекрёстков
+(`IntersectionConfig`) из нескольких типовых планов — двухфазный,
+с защищёнными левыми поворотами, с пешеходными фазами и со "всем
+красным" между фазами. Длительности фаз варьируются, но число
+различных планов ограничено (`variants`), как в реальном городе, где
+большинство перекрёстков работает по нескольким типовым программам.
+
+Генерация детерминирована: одинаковые `count`, `seed` и `variants` дают
+одинаковый парк.
+"""
+
+import json
+import random
+from typing import Callable, Dict, Iterator, List
+
+from app.core.models import IntersectionConfig
+
+Plan = List[dict]
+
+YELLOW = 4
+ALL_RED = 2
+
+
+def _phase(name: str, duration: int, **states: str) -> dict:
+    return {"name": name, "duration": duration, "states": states}
+
+
+def _two_phase(rng: random.Random) -> Plan:
+    ns, ew = rng.randrange(20, 61, 5), rng.randrange(20, 61, 5)
+    return [
+        _phase("NS_GREEN", ns, NS="GREEN", EW="RED"),
+        _phase("NS_YELLOW", YELLOW, NS="YELLOW", EW="RED"),
+        _phase("EW_GREEN", ew, NS="RED", EW="GREEN"),
+        _phase("EW_YELLOW", YELLOW, NS="RED", EW="YELLOW"),
+    ]
+
+
+def _protected_left(rng: random.Random) -> Plan:
+    left = rng.randrange(10, 21, 5)
+    return [
+        _phase("NS_LEFT", left, NS="RED", EW="RED", NS_LEFT="GREEN", EW_LEFT="RED"),
+        _phase("NS_LEFT_YELLOW", YELLOW, NS="RED", EW="RED", NS_LEFT="YELLOW"),
+        *_two_phase(rng)[:2],
+        _phase("EW_LEFT", left, NS="RED", EW="RED", NS_LEFT="RED", EW_LEFT="GREEN"),
+        _phase("EW_LEFT_YELLOW", YELLOW, NS="RED", EW="RED", EW_LEFT="YELLOW"),
+        *_two_phase(rng)[2:],
+    ]
+
+
+def _pedestrian(rng: random.Random) -> Plan:
+    walk = rng.randrange(10, 31, 5)
+    ns, ew = rng.randrange(15, 41, 5), rng.randrange(15, 41, 5)
+    return [
+        _phase("NS_WALK", walk, NS="GREEN", EW="RED", NS_PED="GREEN", EW_PED="RED"),
+        _phase("NS_GREEN", ns, NS="GREEN", EW="RED", NS_PED="RED", EW_PED="RED"),
+        _phase("NS_YELLOW", YELLOW, NS="YELLOW", EW="RED"),
+        _phase("EW_WALK", walk, NS="RED", EW="GREEN", NS_PED="RED", EW_PED="GREEN"),
+        _phase("EW_GREEN", ew, NS="RED", EW="GREEN", NS_PED="RED", EW_PED="RED"),
+        _phase("EW_YELLOW", YELLOW, NS="RED", EW="YELLOW"),
+    ]
+
+
+def _all_red(rng: random.Random) -> Plan:
+    plan: Plan = []
+    for phase in _two_phase(rng):
+        plan.append(phase)
+        if phase["name"].endswith("YELLOW"):
+            clearance = f"{phase['name'][:2]}_ALL_RED"
+            plan.append(_phase(clearance, ALL_RED, NS="RED", EW="RED"))
+    return plan
+
+
+# Тип плана -> (генератор, доля в городе).
+TEMPLATES: Dict[str, tuple] = {
+    "two_phase": (_two_phase, 0.5),
+    "protected_left": (_protected_left, 0.2),
+    "pedestrian": (_pedestrian, 0.2),
+    "all_red": (_all_red, 0.1),
+}
+
+
+def plan_variants(variants: int, seed: int = 0) -> List[Plan]:
+    """
+    `variants` различных планов в пропорциях `TEMPLATES`.
+    """
+    rng = random.Random(seed)
+    makers: List[Callable[[random.Random], Plan]] = [
+        maker for maker, _ in TEMPLATES.values()
+    ]
+    weights = [share for _, share in TEMPLATES.values()]
+    plans = [makers[index](rng) for index in range(min(variants, len(makers)))]
+    while len(plans) < variants:
+        plans.append(rng.choices(makers, weights)[0](rng))
+    return plans
+
+
+def generate_records(
+    count: int,
+    seed: int = 0,
+    variants: int = 50,
+    prefix: str = "city",
+) -> Iterator[dict]:
+    """
+    Конфигурации перекрёстков в виде JSON-совместимых словарей (формат
+    тела `PUT /intersections/{id}` и строки импорта NDJSON).
+    """
+    plans = plan_variants(variants, seed)
+    rng = random.Random(seed + 1)
+    width = len(str(max(count - 1, 0)))
+    for number in range(count):
+        intersection_id = f"{prefix}-{number:0{width}d}"
+        yield {
+            "id": intersection_id,
+            "name": f"Synthetic {intersection_id}",
+            "phases": rng.choice(plans),
+        }
+
+
+def generate_city(
+    count: int,
+    seed: int = 0,
+    variants: int = 50,
+    prefix: str = "city",
+) -> List[IntersectionConfig]:
+    return [
+        IntersectionConfig(**record)
+        for record in generate_records(count, seed, variants, prefix)
+    ]
+
+
+def ndjson_chunks(
+    count: int,
+    chunk_size: int = 5000,
+    seed: int = 0,
+    variants: int = 50,
+    prefix: str = "city",
+) -> Iterator[bytes]:
+    """
+    Парк в виде пачек NDJSON для `POST /intersections/import`.
+    """
+    lines: List[str] = []
+    for record in generate_records(count, seed, variants, prefix):
+        lines.append(json.dumps(record, separators=(",", ":")))
+        if len(lines) == chunk_size:
+            yield "\n".join(lines).encode()
+            lines = []
+    if lines:
+        yield "\n".join(lines).encode()
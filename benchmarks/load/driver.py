@@ -0,0 +1,368 @@
+"""
+Асинхронный драйвер нагрузки: закрытый цикл (каждый из `concurrency`
+клиентов отправляет следующий запрос сразу после ответа) с заданной
+смесью операций чтения и записи.
+
+Нагрузка идёт ступенями по уровню параллелизма; на каждой ступени
+считаются пропускная способность, p50/p90/p99/max задержки и ошибки,
+а раз в `rss_interval` секунд — RSS процесса сервера. Точка насыщения —
+ступень, после которой рост параллелизма прибавляет меньше
+`SATURATION_GAIN` пропускной способности: дальше растёт только задержка.
+
+Драйвер и сервер делят одну машину: на малом числе ядер драйвер сам
+съедает часть CPU, поэтому абсолютные цифры — нижняя оценка.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from ..local_server import LocalServer, rss_bytes
+from .city import generate_records, ndjson_chunks
+
+PREFIX = "/api/v1"
+INTERSECTIONS = f"{PREFIX}/intersections"
+DEFAULT_MIX = "state=60,states=10,tick=20,batch_tick=5,write=5"
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+SATURATION_GAIN = 0.05
+# Перекрёстков в запросах по нескольким id (states, batch_tick, timeline).
+SAMPLE = 10
+
+Request = Tuple[str, str, dict]
+
+
+class Workload:
+    """
+    Генератор запросов по смеси операций; id перекрёстков выбираются
+    равномерно из парка, сид фиксирован.
+    """
+
+    def __init__(self, records: List[dict], mix: Dict[str, int], seed: int = 0):
+        unknown = set(mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"unknown operations: {', '.join(sorted(unknown))}")
+        self.records = records
+        self.ids = [record["id"] for record in records]
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = random.Random(seed)
+
+    def next(self) -> Tuple[str, Request]:
+        name = self.rng.choices(self.operations, self.weights)[0]
+        return name, OPERATIONS[name](self)
+
+    def one(self) -> str:
+        return self.rng.choice(self.ids)
+
+    def sample(self) -> List[str]:
+        return self.rng.sample(self.ids, min(SAMPLE, len(self.ids)))
+
+
+def _query(ids: List[str]) -> str:
+    return "&".join(f"ids={i}" for i in ids)
+
+
+def _write(workload: Workload) -> Request:
+    record = workload.rng.choice(workload.records)
+    return "PUT", f"{INTERSECTIONS}/{record['id']}", {"json": record}
+
+
+OPERATIONS: Dict[str, Callable[[Workload], Request]] = {
+    "state": lambda w: ("GET", f"{INTERSECTIONS}/{w.one()}/state", {}),
+    "states": lambda w: ("GET", f"{INTERSECTIONS}/states?{_query(w.sample())}", {}),
+    "tick": lambda w: (
+        "POST",
+        f"{INTERSECTIONS}/{w.one()}/tick",
+        {"json": {"seconds": w.rng.randint(1, 60)}},
+    ),
+    "batch_tick": lambda w: (
+        "POST",
+        f"{INTERSECTIONS}/batch/tick",
+        {
+            "json": {
+                "items": [
+                    {"intersection_id": i, "seconds": w.rng.randint(1, 60)}
+                    for i in w.sample()
+                ],
+            },
+        },
+    ),
+    "write": _write,
+    "timeline": lambda w: (
+        "GET",
+        f"{INTERSECTIONS}/timeline/state"
+        f"?offset={w.rng.randint(1, 86400)}&{_query(w.sample())}",
+        {},
+    ),
+}
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """
+    `"state=80,tick=20"` -> `{"state": 80, "tick": 20}`.
+    """
+    mix: Dict[str, int] = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("mix must have a positive weight")
+    return mix
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """
+    Перцентиль (0..100) по отсортированной выборке, ближайший ранг.
+    """
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class Stage:
+    concurrency: int
+    duration: float = 0.0
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: int = 0
+    rss: List[Tuple[float, int]] = field(default_factory=list)
+
+    def record(self, operation: str, latency: float) -> None:
+        self.latencies.setdefault(operation, []).append(latency)
+
+    def report(self) -> dict:
+        merged = sorted(x for values in self.latencies.values() for x in values)
+        operations = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            operations[name] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        return {
+            "concurrency": self.concurrency,
+            "requests": len(merged),
+            "errors": self.errors,
+            "throughput": len(merged) / self.duration if self.duration else 0.0,
+            "p50_ms": percentile(merged, 50) * 1000,
+            "p90_ms": percentile(merged, 90) * 1000,
+            "p99_ms": percentile(merged, 99) * 1000,
+            "max_ms": merged[-1] * 1000 if merged else 0.0,
+            "rss_mb": [(round(t, 1), round(b / 2**20, 1)) for t, b in self.rss],
+            "operations": operations,
+        }
+
+
+def saturation(stages: List[dict], gain: float = SATURATION_GAIN) -> Optional[dict]:
+    """
+    Ступень, после которой следующая прибавляет меньше `gain` пропускной
+    способности (или последняя, если насыщение не достигнуто — тогда None).
+    """
+    for previous, stage in zip(stages, stages[1:]):
+        if stage["throughput"] < previous["throughput"] * (1 + gain):
+            return previous
+    return None
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    stage: Stage,
+    deadline: float,
+) -> None:
+    while time.perf_counter() < deadline:
+        operation, (method, url, kwargs) = workload.next()
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stage.errors += 1
+            continue
+        latency = time.perf_counter() - start
+        if response.status_code >= 400:
+            stage.errors += 1
+        else:
+            stage.record(operation, latency)
+
+
+async def _sample_rss(
+    pid: Optional[int], stage: Stage, started: float, interval: float
+) -> None:
+    while pid is not None:
+        rss = rss_bytes(pid)
+        if rss is not None:
+            stage.rss.append((time.perf_counter() - started, rss))
+        await asyncio.sleep(interval)
+
+
+async def run_stage(
+    url: str,
+    workload: Workload,
+    concurrency: int,
+    seconds: float,
+    pid: Optional[int] = None,
+    started: float = 0.0,
+    rss_interval: float = 1.0,
+) -> Stage:
+    stage = Stage(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        sampler = asyncio.create_task(
+            _sample_rss(pid, stage, started or time.perf_counter(), rss_interval),
+        )
+        begin = time.perf_counter()
+        deadline = begin + seconds
+        await asyncio.gather(
+            *(_worker(client, workload, stage, deadline) for _ in range(concurrency)),
+        )
+        stage.duration = time.perf_counter() - begin
+        sampler.cancel()
+    return stage
+
+
+def load_city(
+    url: str,
+    count: int,
+    seed: int,
+    variants: int,
+    chunk_size: int = 5000,
+) -> None:
+    """
+    Загрузить парк через `POST /intersections/import`.
+    """
+    with httpx.Client(base_url=url, timeout=600) as client:
+        for chunk in ndjson_chunks(count, chunk_size, seed, variants):
+            response = client.post(
+                f"{INTERSECTIONS}/import",
+                content=chunk,
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            response.raise_for_status()
+            if response.json()["failed"]:
+                raise RuntimeError(f"import failed: {response.json()['errors'][:3]}")
+
+
+def _print_stage(report: dict) -> None:
+    rss = report["rss_mb"][-1][1] if report["rss_mb"] else float("nan")
+    print(
+        f"c={report['concurrency']:<5} {report['throughput']:9.0f} req/s  "
+        f"p50 {report['p50_ms']:7.2f} ms  p90 {report['p90_ms']:7.2f} ms  "
+        f"p99 {report['p99_ms']:7.2f} ms  max {report['max_ms']:8.2f} ms  "
+        f"errors {report['errors']:<5} rss {rss:7.1f} MB",
+        flush=True,
+    )
+
+
+async def _drive(args: argparse.Namespace, url: str, pid: Optional[int]) -> dict:
+    records = list(generate_records(args.intersections, args.seed, args.variants))
+    workload = Workload(records, parse_mix(args.mix), args.seed)
+    started = time.perf_counter()
+    if args.warmup > 0:
+        await run_stage(url, workload, args.concurrency[0], args.warmup)
+
+    stages = []
+    for concurrency in args.concurrency:
+        stage = await run_stage(
+            url,
+            workload,
+            concurrency,
+            args.stage_seconds,
+            pid,
+            started,
+            args.rss_interval,
+        )
+        stages.append(stage.report())
+        _print_stage(stages[-1])
+
+    saturated = saturation(stages)
+    if saturated is None:
+        print("saturation not reached: throughput still grows at the last stage")
+    else:
+        print(
+            f"saturation: ~{saturated['throughput']:.0f} req/s at "
+            f"concurrency {saturated['concurrency']} "
+            f"(p99 {saturated['p99_ms']:.2f} ms)",
+        )
+    return {
+        "intersections": args.intersections,
+        "mix": parse_mix(args.mix),
+        "stage_seconds": args.stage_seconds,
+        "workers": args.workers,
+        "cpu_count": os.cpu_count(),
+        "stages": stages,
+        "saturation": None if saturated is None else saturated["concurrency"],
+    }
+
+
+def _integers(text: str) -> List[int]:
+    return [int(value) for value in text.split(",") if value]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description="Load a synthetic city and find the saturation point.",
+    )
+    parser.add_argument("--intersections", type=int, default=10_000)
+    parser.add_argument("--variants", type=int, default=50, help="distinct plans")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"operation weights ({', '.join(OPERATIONS)})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=_integers,
+        default=DEFAULT_CONCURRENCY,
+        help="comma-separated concurrency stages",
+    )
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--url",
+        help="use a running service instead of starting uvicorn",
+    )
+    parser.add_argument("--pid", type=int, help="server pid for RSS with --url")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--no-load", action="store_true", help="skip city import")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    url, pid = args.url, args.pid
+    if url is None:
+        server = LocalServer(workers=args.workers).start()
+        url, pid = server.url, server.pid
+    try:
+        if not args.no_load:
+            begin = time.perf_counter()
+            load_city(url, args.intersections, args.seed, args.variants)
+            print(
+                f"loaded {args.intersections} intersections "
+                f"in {time.perf_counter() - begin:.1f} s",
+                flush=True,
+            )
+        report = asyncio.run(_drive(args, url, pid))
+    finally:
+        if server is not None:
+            server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+        print(f"report written to {args.output}")
+    return 0
@@ -0,0 +1,127 @@
+"""
+Локальный процесс uvicorn с `app.main:app` для бенчмарков и нагрузочных
+тестов: свободный порт на 127.0.0.1, без фоновых задач, ожидание
+готовности по `/health` и RSS процесса (с воркерами) из /proc.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+STARTUP_TIMEOUT = 30.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """
+    RSS процесса и его прямых потомков (воркеров uvicorn), байты.
+    None, если /proc недоступен (не Linux) или процесс уже завершён.
+    """
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as fh:
+                pids.extend(int(child) for child in fh.read().split())
+    except OSError:
+        return None
+
+    total = 0
+    for process in pids:
+        try:
+            with open(f"/proc/{process}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class LocalServer:
+    """
+    Процесс uvicorn; `env` дополняет окружение (переменные настроек
+    приложения). Используется как контекстный менеджер.
+    """
+
+    def __init__(
+        self,
+        env: Optional[Dict[str, str]] = None,
+        workers: int = 1,
+        log_level: str = "ERROR",
+    ) -> None:
+        self.env = {
+            "LOG_LEVEL": log_level,
+            "REPOSITORY_BACKEND": "memory",
+            "SCHEDULER_ENABLED": "false",
+            "SNAPSHOT_PATH": "",
+            **(env or {}),
+        }
+        self.workers = workers
+        self.log_level = log_level
+        self.port = 0
+        self.process: "subprocess.Popen[bytes] | None" = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process is not None else None
+
+    def start(self) -> "LocalServer":
+        self.port = free_port()
+        command: List[str] = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(self.port),
+            "--log-level",
+            self.log_level.lower(),
+            "--no-access-log",
+        ]
+        if self.workers > 1:
+            command += ["--workers", str(self.workers)]
+        self.process = subprocess.Popen(command, env={**os.environ, **self.env})
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                httpx.get(f"{self.url}/health", timeout=1.0)
+                return self
+            except httpx.TransportError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+    def __enter__(self) -> "LocalServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
@@ -0,0 +1,10 @@
+"""
+Воспроизводимый офлайн-набор бенчмарков горячих путей: домен
+(`tick`, снимки состояния), репозиторий на 1k–1M перекрёстков и HTTP
+(TestClient и локальный uvicorn) по каждому маршруту.
+
+Запуск:
+    python -m benchmarks.suite [--quick] [--groups domain,repository]
+    python -m benchmarks.suite --baseline benchmarks/results/baseline.json
+    python -m benchmarks.suite compare OLD.json NEW.json
+"""
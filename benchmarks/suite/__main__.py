@@ -0,0 +1,12 @@
+import os
+import sys
+
+from .runner import main
+
+# Порядок в словарях и множествах строк зависит от сида хеширования;
+# для воспроизводимости перезапускаемся с фиксированным сидом.
+if "PYTHONHASHSEED" not in os.environ:
+    os.environ["PYTHONHASHSEED"] = "0"
+    os.execv(sys.executable, [sys.executable, "-m", "benchmarks.suite", *sys.argv[1:]])
+
+sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Домен: `TrafficController.tick` на разных величинах шага, снимки
+состояния (dict и готовый JSON), контроллер реального времени.
+"""
+
+from typing import Callable, Iterator
+
+from app.core.domain import (
+    Direction,
+    Phase,
+    SignalColor,
+    TrafficController,
+    WallClockTrafficController,
+)
+
+from .runner import Case, Options
+
+CALLS = 20_000
+TICK_SECONDS = [1, 7, 60, 3600, 24 * 3600, 7 * 24 * 3600, 365 * 24 * 3600]
+
+PLAN = [
+    Phase(name, duration, {Direction.NS: ns, Direction.EW: ew})
+    for name, duration, ns, ew in [
+        ("NS_GREEN", 30, SignalColor.GREEN, SignalColor.RED),
+        ("NS_YELLOW", 5, SignalColor.YELLOW, SignalColor.RED),
+        ("EW_GREEN", 30, SignalColor.RED, SignalColor.GREEN),
+        ("EW_YELLOW", 5, SignalColor.RED, SignalColor.YELLOW),
+    ]
+]
+
+
+def _calls(func: Callable[[], object], calls: int) -> Callable[[], int]:
+    def batch() -> int:
+        for _ in range(calls):
+            func()
+        return calls
+
+    return batch
+
+
+def _tick(seconds: int, calls: int) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        controller = TrafficController("bench", "Bench", PLAN)
+        return _calls(lambda: controller.tick(seconds), calls)
+
+    return prepare
+
+
+def _method(
+    factory: Callable[[], TrafficController],
+    method: str,
+    calls: int,
+) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        return _calls(getattr(factory(), method), calls)
+
+    return prepare
+
+
+def _simulated() -> TrafficController:
+    controller = TrafficController("bench", "Bench", PLAN)
+    controller.tick(42)
+    return controller
+
+
+def _wall_clock() -> TrafficController:
+    return WallClockTrafficController("bench", "Bench", PLAN)
+
+
+def cases(options: Options) -> Iterator[Case]:
+    calls = CALLS // 10 if options.quick else CALLS
+    for seconds in TICK_SECONDS:
+        yield Case(f"domain.tick[seconds={seconds}]", _tick(seconds, calls))
+    for method in ("state_snapshot", "state_json", "locate"):
+        yield Case(f"domain.{method}", _method(_simulated, method, calls))
+        yield Case(
+            f"domain.{method}[wall_clock]",
+            _method(_wall_clock, method, calls),
+        )
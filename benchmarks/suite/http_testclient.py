@@ -0,0 +1,37 @@
+"""
+HTTP end-to-end через `TestClient` по маршрутам из `routes`. Логи ниже
+`LOG_LEVEL` (ERROR) не пишутся, чтобы вывод не влиял на результат.
+"""
+
+import logging
+from typing import Callable, Iterator, List
+
+from fastapi.testclient import TestClient
+
+from .routes import LOG_LEVEL, ROUTES, Route, populate, requests_for, route_batch
+from .runner import Case, Options
+
+
+def cases(options: Options) -> Iterator[Case]:
+    client: List[TestClient] = []
+
+    def session() -> TestClient:
+        # Приложение и парк создаются при первом выбранном кейсе.
+        if not client:
+            from app.core.repository import repo
+            from app.main import create_app
+
+            repo.clear()
+            app = create_app()
+            logging.getLogger().setLevel(LOG_LEVEL)
+            client.append(TestClient(app))
+            populate(client[0].request)
+        return client[0]
+
+    def prepare(route: Route) -> Callable[[], Callable[[], int]]:
+        return lambda: route_batch(
+            session().request, route, requests_for(route, options)
+        )
+
+    for route in ROUTES:
+        yield Case(f"http.testclient[{route.name}]", prepare(route))
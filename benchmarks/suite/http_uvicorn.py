@@ -0,0 +1,101 @@
+"""
+HTTP через настоящий локальный uvicorn (отдельный процесс, 127.0.0.1):
+маршруты из `routes` по одному keep-alive соединению,
+и пропускная способность `GET /state` при параллельных соединениях.
+"""
+
+import asyncio
+from typing import Callable, Iterator
+
+import httpx
+
+from ..local_server import LocalServer
+from .routes import (
+    INTERSECTIONS,
+    LOG_LEVEL,
+    ROUTES,
+    populate,
+    requests_for,
+    route_batch,
+)
+from .runner import Case, Options
+
+CONCURRENCY = [8, 32]
+
+
+class _Server:
+    """
+    Локальный uvicorn (логи ниже ERROR отключены) и keep-alive клиент;
+    запускается и наполняется парком при первом обращении.
+    """
+
+    def __init__(self) -> None:
+        self._server = LocalServer(log_level=LOG_LEVEL)
+        self._client: "httpx.Client | None" = None
+
+    @property
+    def url(self) -> str:
+        return self._server.url
+
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._server.start()
+            self._client = httpx.Client(base_url=self.url, timeout=30.0)
+            populate(self._client.request)
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._server.stop()
+
+
+def _concurrent(
+    server: _Server,
+    concurrency: int,
+    count: int,
+) -> Callable[[], Callable[[], int]]:
+    path = f"{INTERSECTIONS}/b00001/state"
+
+    async def run() -> None:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=server.url, limits=limits) as client:
+
+            async def worker(requests: int) -> None:
+                for _ in range(requests):
+                    response = await client.get(path)
+                    response.raise_for_status()
+
+            await asyncio.gather(
+                *(worker(count // concurrency) for _ in range(concurrency)),
+            )
+
+    def batch() -> int:
+        asyncio.run(run())
+        return count // concurrency * concurrency
+
+    def prepare() -> Callable[[], int]:
+        server.client()
+        return batch
+
+    return prepare
+
+
+def cases(options: Options) -> Iterator[Case]:
+    server = _Server()
+    try:
+        for route in ROUTES:
+            yield Case(
+                f"uvicorn[{route.name}]",
+                lambda route=route: route_batch(
+                    server.client().request, route, requests_for(route, options)
+                ),
+            )
+        for concurrency in CONCURRENCY:
+            yield Case(
+                f"uvicorn.concurrent[GET /intersections/{{id}}/state, c={concurrency}]",
+                _concurrent(server, concurrency, 200 if options.quick else 2000),
+            )
+    finally:
+        server.close()
@@ -0,0 +1,106 @@
+"""
+In-memory репозиторий на 1k–1M перекрёстков: добавление, `get`,
+доступ под локом (`locked`) и `list`.
+"""
+
+import random
+from functools import lru_cache
+from typing import Callable, Iterator, List, Tuple
+
+from app.core.domain import TrafficController, plan_registry
+from app.core.repository import InMemoryIntersectionRepository
+
+from .domain import PLAN
+from .runner import Case, Options
+
+LOOKUPS = 20_000
+# Сид выборки id: одинаковые запросы от запуска к запуску.
+SEED = 2024
+
+
+@lru_cache(maxsize=1)
+def _fleet(
+    size: int,
+) -> Tuple[List[TrafficController], InMemoryIntersectionRepository, List[str]]:
+    """
+    Контроллеры, заполненный репозиторий и выборка id для поиска.
+    Держится только последний размер, чтобы не копить память.
+    """
+    plan = plan_registry.intern(PLAN)
+    controllers = [
+        TrafficController(f"i{n:07d}", f"Intersection {n}", plan) for n in range(size)
+    ]
+    repo = InMemoryIntersectionRepository()
+    for controller in controllers:
+        repo.add(controller)
+    rng = random.Random(SEED)
+    ids = [controllers[rng.randrange(size)].id for _ in range(LOOKUPS)]
+    return controllers, repo, ids
+
+
+def _add(size: int) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        controllers = _fleet(size)[0]
+
+        def batch() -> int:
+            repo = InMemoryIntersectionRepository()
+            for controller in controllers:
+                repo.add(controller)
+            return size
+
+        return batch
+
+    return prepare
+
+
+def _get(size: int) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        _, repo, ids = _fleet(size)
+
+        def batch() -> int:
+            get = repo.get
+            for intersection_id in ids:
+                get(intersection_id)
+            return len(ids)
+
+        return batch
+
+    return prepare
+
+
+def _locked(size: int) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        _, repo, ids = _fleet(size)
+
+        def batch() -> int:
+            for intersection_id in ids:
+                with repo.locked(intersection_id) as controller:
+                    controller.tick(1)
+            return len(ids)
+
+        return batch
+
+    return prepare
+
+
+def _list(size: int) -> Callable[[], Callable[[], int]]:
+    def prepare() -> Callable[[], int]:
+        repo = _fleet(size)[1]
+        calls = max(1, 100_000 // size)
+
+        def batch() -> int:
+            for _ in range(calls):
+                repo.list()
+            return calls
+
+        return batch
+
+    return prepare
+
+
+def cases(options: Options) -> Iterator[Case]:
+    for size in options.sizes:
+        yield Case(f"repository.add[n={size}]", _add(size))
+        yield Case(f"repository.get[n={size}]", _get(size))
+        yield Case(f"repository.locked_tick[n={size}]", _locked(size))
+        yield Case(f"repository.list[n={size}]", _list(size))
@@ -0,0 +1,187 @@
+"""
+Маршруты HTTP-бенчмарков (общие для TestClient и uvicorn): каждый
+маршрут API, кроме потока `/events`, на парке из `FLEET` перекрёстков.
+Запросы и данные одинаковы от запуска к запуску.
+"""
+
+import json
+from typing import Callable, List, NamedTuple, Optional
+
+from .runner import Options
+
+FLEET = 1000
+LOG_LEVEL = "ERROR"
+REQUESTS = 500
+PREFIX = "/api/v1"
+INTERSECTIONS = f"{PREFIX}/intersections"
+
+PLAN = [
+    {"name": "NS_GREEN", "duration": 30, "states": {"NS": "GREEN", "EW": "RED"}},
+    {"name": "NS_YELLOW", "duration": 5, "states": {"NS": "YELLOW", "EW": "RED"}},
+    {"name": "EW_GREEN", "duration": 30, "states": {"NS": "RED", "EW": "GREEN"}},
+    {"name": "EW_YELLOW", "duration": 5, "states": {"NS": "RED", "EW": "YELLOW"}},
+]
+IDS = [f"b{n:05d}" for n in range(FLEET)]
+SAMPLE = IDS[:10]
+
+
+class Route(NamedTuple):
+    """
+    Запрос бенчмарка: `name` — метка маршрута, `status` — ожидаемый код.
+    Тяжёлые маршруты выполняются реже (`weight` — делитель числа запросов).
+    """
+
+    name: str
+    method: str
+    path: str
+    json: Optional[object] = None
+    content: Optional[bytes] = None
+    status: int = 200
+    weight: int = 1
+
+
+def _config(intersection_id: str) -> dict:
+    return {"id": intersection_id, "name": intersection_id, "phases": PLAN}
+
+
+def _ndjson(count: int) -> bytes:
+    lines = [json.dumps(_config(f"import{n:04d}")) for n in range(count)]
+    return "\n".join(lines).encode()
+
+
+def _query(ids: List[str]) -> str:
+    return "&".join(f"ids={i}" for i in ids)
+
+
+ROUTES = [
+    Route("GET /health", "GET", "/health"),
+    Route("GET /intersections/", "GET", f"{INTERSECTIONS}/", weight=10),
+    Route("GET /intersections/{id}/state", "GET", f"{INTERSECTIONS}/b00001/state"),
+    Route(
+        "GET /intersections/{id}/state (404)",
+        "GET",
+        f"{INTERSECTIONS}/missing/state",
+        status=404,
+    ),
+    Route(
+        "GET /intersections/states",
+        "GET",
+        f"{INTERSECTIONS}/states?{_query(SAMPLE)}",
+    ),
+    Route(
+        "POST /intersections/{id}/tick",
+        "POST",
+        f"{INTERSECTIONS}/b00002/tick",
+        json={"seconds": 7},
+    ),
+    Route("POST /intersections/{id}/reset", "POST", f"{INTERSECTIONS}/b00003/reset"),
+    Route(
+        "POST /intersections/batch/tick",
+        "POST",
+        f"{INTERSECTIONS}/batch/tick",
+        json={"items": [{"intersection_id": i, "seconds": 3} for i in SAMPLE]},
+    ),
+    Route(
+        "PUT /intersections/{id}",
+        "PUT",
+        f"{INTERSECTIONS}/b00004",
+        json=_config("b00004"),
+    ),
+    Route(
+        "DELETE /intersections/{id} (404)",
+        "DELETE",
+        f"{INTERSECTIONS}/missing",
+        status=404,
+    ),
+    Route(
+        "GET /intersections/timeline/state",
+        "GET",
+        f"{INTERSECTIONS}/timeline/state?offset=3600&{_query(SAMPLE)}",
+    ),
+    Route(
+        "GET /intersections/timeline/transitions",
+        "GET",
+        f"{INTERSECTIONS}/timeline/transitions?end=3600&{_query(SAMPLE)}",
+    ),
+    Route(
+        "POST /intersections/import",
+        "POST",
+        f"{INTERSECTIONS}/import",
+        content=_ndjson(100),
+        weight=10,
+    ),
+    Route(
+        "POST /corridors/green-wave",
+        "POST",
+        f"{PREFIX}/corridors/green-wave",
+        json={
+            "intersection_ids": SAMPLE,
+            "segment_lengths": [300] * (len(SAMPLE) - 1),
+            "speed_kmh": 50,
+        },
+        weight=10,
+    ),
+    Route(
+        "POST /simulation/queues",
+        "POST",
+        f"{PREFIX}/simulation/queues",
+        json={
+            "duration": 3600,
+            "arrival_rates": {"NS": 600, "EW": 400},
+            "intersection_ids": SAMPLE,
+        },
+        weight=10,
+    ),
+    Route(
+        "POST /simulation/run",
+        "POST",
+        f"{PREFIX}/simulation/run",
+        json={
+            "duration": 3600,
+            "demand": [{"at": 0, "arrival_rates": {"NS": 600, "EW": 400}}],
+            "intersection_ids": SAMPLE,
+        },
+        weight=10,
+    ),
+]
+
+
+def populate(send: Callable[..., object]) -> None:
+    """
+    Наполнить сервис парком через API (одинаково для TestClient и uvicorn).
+    """
+    for intersection_id in IDS:
+        send("PUT", f"{INTERSECTIONS}/{intersection_id}", json=_config(intersection_id))
+
+
+def requests_for(route: Route, options: Options) -> int:
+    count = REQUESTS // route.weight
+    return max(1, count // 10 if options.quick else count)
+
+
+def route_batch(
+    send: Callable[..., object],
+    route: Route,
+    count: int,
+) -> Callable[[], int]:
+    """
+    Пачка из `count` одинаковых запросов; код ответа проверяется, чтобы
+    бенчмарк не измерял по ошибке путь обработки ошибки.
+    """
+    kwargs = {}
+    if route.json is not None:
+        kwargs["json"] = route.json
+    if route.content is not None:
+        kwargs["content"] = route.content
+        kwargs["headers"] = {"Content-Type": "application/x-ndjson"}
+
+    def batch() -> int:
+        for _ in range(count):
+            response = send(route.method, route.path, **kwargs)
+            if response.status_code != route.status:
+                raise RuntimeError(
+                    f"{route.name}: unexpected status {response.status_code}",
+                )
+        return count
+
+    return batch
@@ -0,0 +1,293 @@
+"""
+Запуск набора бенчмарков, сохранение результатов в JSON и сравнение с
+базовой линией.
+
+Каждый кейс готовит функцию-"пачку", которая выполняет фиксированный
+объём работы и возвращает число операций. Подготовка (наполнение
+репозитория, запуск сервера) не измеряется и выполняется только для
+выбранных кейсов. Пачка прогревается один раз, затем
+выполняется `repeat` раз с отключённым сборщиком мусора; в результат
+попадают медиана и лучшее время на операцию. Сравнение идёт по медиане:
+регрессия — если время на операцию выросло больше чем на `threshold`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+FORMAT_VERSION = 1
+# Группа -> модуль пакета с функцией `cases(options)`.
+GROUPS = {
+    "domain": "domain",
+    "repository": "repository",
+    "http": "http_testclient",
+    "uvicorn": "http_uvicorn",
+}
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000]
+DEFAULT_THRESHOLD = 0.2
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+class Case(NamedTuple):
+    """
+    Кейс бенчмарка: имя (`группа.операция[параметры]`) и подготовка,
+    возвращающая пачку работы; пачка возвращает число выполненных операций.
+    """
+
+    name: str
+    prepare: Callable[[], Callable[[], int]]
+
+
+@dataclass
+class Options:
+    sizes: List[int] = field(default_factory=lambda: list(DEFAULT_SIZES))
+    repeat: int = 5
+    # Быстрый режим: меньше размеров и запросов в пачке (для CI и отладки).
+    quick: bool = False
+
+
+def _environment() -> dict:
+    versions = {}
+    for package in ("numpy", "fastapi", "pydantic", "starlette", "uvicorn", "httpx"):
+        try:
+            versions[package] = importlib.import_module(package).__version__
+        except ImportError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pythonhashseed": os.environ.get("PYTHONHASHSEED"),
+        "packages": versions,
+    }
+
+
+def measure(case: Case, repeat: int) -> dict:
+    """
+    Подготовить кейс, прогреть и `repeat` раз выполнить его пачку.
+    """
+    batch = case.prepare()
+    batch()
+    per_op: List[float] = []
+    ops = 0
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ops = batch()
+            per_op.append((time.perf_counter() - start) / ops)
+    finally:
+        if enabled:
+            gc.enable()
+    median = statistics.median(per_op)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "median": median,
+        "best": min(per_op),
+        "ops_per_sec": 1 / median,
+    }
+
+
+def _cases(group: str, options: Options) -> Iterator[Case]:
+    module = importlib.import_module(f"{__package__}.{GROUPS[group]}")
+    return module.cases(options)
+
+
+def run(
+    groups: Sequence[str],
+    options: Options,
+    pattern: Optional[str] = None,
+    report: Callable[[str, dict], None] = lambda name, result: None,
+) -> dict:
+    """
+    Выполнить кейсы выбранных групп (с подстрокой `pattern` в имени).
+    """
+    results: Dict[str, dict] = {}
+    for group in groups:
+        for case in _cases(group, options):
+            if pattern and pattern not in case.name:
+                continue
+            results[case.name] = measure(case, options.repeat)
+            report(case.name, results[case.name])
+    return {
+        "version": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "options": {
+            "sizes": options.sizes,
+            "repeat": options.repeat,
+            "quick": options.quick,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[dict]:
+    """
+    Сравнить результаты с базовой линией по медианному времени на операцию.
+
+    Возвращает строки для общих кейсов: `ratio` — во сколько раз изменилось
+    время (больше 1 — медленнее), `regression` — превышен ли порог.
+    """
+    rows = []
+    base = baseline["results"]
+    for name, result in current["results"].items():
+        if name not in base:
+            continue
+        ratio = result["median"] / base[name]["median"]
+        rows.append(
+            {
+                "name": name,
+                "baseline": base[name]["median"],
+                "current": result["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            },
+        )
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def _print_result(name: str, result: dict) -> None:
+    print(
+        f"{name:<60} {_format_time(result['median'])}/op "
+        f"{result['ops_per_sec']:14.0f} ops/s",
+        flush=True,
+    )
+
+
+def _print_comparison(rows: List[dict], baseline: dict, current: dict) -> None:
+    for row in rows:
+        mark = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<60} {_format_time(row['baseline'])} -> "
+            f"{_format_time(row['current'])} {row['ratio']:6.2f}x {mark}",
+        )
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    added = sorted(set(current["results"]) - set(baseline["results"]))
+    if missing:
+        print(f"not measured: {len(missing)} baseline case(s)")
+    if added:
+        print(f"new cases: {', '.join(added)}")
+    if baseline.get("environment") != current.get("environment"):
+        print("warning: environment differs from the baseline")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    if data.get("version") != FORMAT_VERSION:
+        raise SystemExit(f"{path}: unsupported results format {data.get('version')}")
+    return data
+
+
+def _save(path: str, data: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Run the benchmark suite and compare with a baseline.",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="run benchmarks (default)")
+    run_parser.add_argument(
+        "--groups",
+        default=",".join(GROUPS),
+        help=f"comma-separated groups ({', '.join(GROUPS)})",
+    )
+    run_parser.add_argument("-k", "--filter", help="only cases containing this text")
+    run_parser.add_argument(
+        "--sizes",
+        help="repository sizes, comma-separated (default 1k..1M)",
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--quick", action="store_true")
+    run_parser.add_argument(
+        "--output",
+        default=os.path.join(RESULTS_DIR, "latest.json"),
+    )
+    run_parser.add_argument("--baseline", help="compare with this results file")
+    run_parser.add_argument(
+        "--save-baseline",
+        metavar="PATH",
+        help="also store the results as a new baseline",
+    )
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        baseline, current = _load(args.baseline), _load(args.current)
+    else:
+        groups = [g for g in args.groups.split(",") if g]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+        options = Options(repeat=args.repeat, quick=args.quick)
+        if args.sizes:
+            options.sizes = [int(size) for size in args.sizes.split(",")]
+        elif args.quick:
+            options.sizes = list(QUICK_SIZES)
+
+        current = run(groups, options, args.filter, _print_result)
+        _save(args.output, current)
+        print(f"results written to {args.output}")
+        if args.save_baseline:
+            _save(args.save_baseline, current)
+            print(f"baseline written to {args.save_baseline}")
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+
+    rows = compare(baseline, current, args.threshold)
+    _print_comparison(rows, baseline, current)
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) above {args.threshold:.0%}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
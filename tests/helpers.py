@@ -0,0 +1,26 @@
+from typing import Sequence
+
+from app.core.domain import Direction, Phase, SignalColor, TrafficController
+
+
+def create_controller(
+    id_: str = "id",
+    durations: Sequence[int] = (5, 5),
+    name: str = "name",
+) -> TrafficController:
+    """
+    Контроллер с фазами P1, P2, ... заданной длительности: в нечётных
+    фазах зелёный у NS, в чётных — у EW.
+    """
+    phases = [
+        Phase(
+            name=f"P{number}",
+            duration=duration,
+            states={
+                Direction.NS: SignalColor.GREEN if number % 2 else SignalColor.RED,
+                Direction.EW: SignalColor.RED if number % 2 else SignalColor.GREEN,
+            },
+        )
+        for number, duration in enumerate(durations, start=1)
+    ]
+    return TrafficController(id_, name, phases)
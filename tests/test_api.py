@@ -1,7 +1,16 @@
+import asyncio
+import json
+
 from fastapi.testclient import TestClient
 
-from app.core.repository import create_default_intersection, repo
+from app.core.bulk_import import import_ndjson
+from app.core.repository import (
+    InMemoryIntersectionRepository,
+    create_default_intersection,
+    repo,
+)
 from app.main import create_app
+from tests.helpers import create_controller
 
 app = create_app()
 client = TestClient(app)
@@ -68,3 +77,317 @@ def test_tick_not_found() -> None:
         json={"seconds": 10},
     )
     assert response.status_code == 404
+
+
+def test_batch_tick_items_with_missing_id() -> None:
+    response = client.post(
+        "/api/v1/intersections/batch/tick",
+        json={
+            "items": [
+                {"intersection_id": "default", "seconds": 40},
+                {"intersection_id": "unknown", "seconds": 10},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0]["state"]["phase_name"] == "EW_GREEN"
+    assert items[0]["error"] is None
+    assert items[1]["state"] is None
+    assert "unknown" in items[1]["error"]
+
+
+def test_batch_tick_all_intersections() -> None:
+    response = client.post(
+        "/api/v1/intersections/batch/tick",
+        json={"seconds": 31},
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["intersection_id"] for item in items] == ["default"]
+    assert items[0]["state"]["phase_name"] == "NS_YELLOW"
+
+
+def test_batch_tick_requires_exactly_one_mode() -> None:
+    response = client.post("/api/v1/intersections/batch/tick", json={})
+    assert response.status_code == 400
+
+
+def test_reserved_ids_are_rejected() -> None:
+    phases = [{"name": "P1", "duration": 5, "states": {"NS": "GREEN", "EW": "RED"}}]
+    response = client.put(
+        "/api/v1/intersections/batch",
+        json={"id": "batch", "name": "Batch", "phases": phases},
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/intersections/import",
+        content=json.dumps({"id": "timeline", "name": "T", "phases": phases}),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    report = response.json()
+    assert report["imported"] == 0
+    assert "reserved" in report["errors"][0]["error"]
+
+    response = client.get("/api/v1/intersections/timeline/state?offset=5")
+    assert response.status_code == 200
+
+
+def test_get_states_all_and_filtered() -> None:
+    client.put(
+        "/api/v1/intersections/second",
+        json={
+            "id": "second",
+            "name": "Second",
+            "phases": [
+                {"name": "P1", "duration": 5, "states": {"NS": "GREEN", "EW": "RED"}},
+            ],
+        },
+    )
+
+    response = client.get("/api/v1/intersections/states")
+    assert response.status_code == 200
+    body = response.json()
+    assert {item["intersection_id"] for item in body["items"]} == {
+        "default",
+        "second",
+    }
+    assert body["missing"] == []
+
+    response = client.get(
+        "/api/v1/intersections/states",
+        params=[("ids", "second"), ("ids", "unknown")],
+    )
+    body = response.json()
+    assert [item["intersection_id"] for item in body["items"]] == ["second"]
+    single = client.get("/api/v1/intersections/second/state").json()
+    assert body["items"][0] == single
+    assert body["missing"] == ["unknown"]
+
+
+def test_bulk_import_ndjson_reports_per_line_errors() -> None:
+    plan = [
+        {"name": "P1", "duration": 5, "states": {"NS": "GREEN", "EW": "RED"}},
+        {"name": "P2", "duration": 5, "states": {"NS": "RED", "EW": "GREEN"}},
+    ]
+    lines = [
+        json.dumps({"id": "a", "name": "A", "phases": plan}),
+        "",
+        "{not json",
+        json.dumps(
+            {
+                "id": "bad",
+                "name": "Bad",
+                "phases": [
+                    {
+                        "name": "X",
+                        "duration": 5,
+                        "states": {"NS": "GREEN", "EW": "GREEN"},
+                    },
+                ],
+            },
+        ),
+        json.dumps({"id": "b", "name": "B", "phases": plan}),
+        json.dumps({"id": "c", "name": "C", "phases": []}),
+    ]
+
+    response = client.post(
+        "/api/v1/intersections/import",
+        params={"chunk_size": 2},
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["failed"] == 3
+    assert [error["line"] for error in report["errors"]] == [3, 4, 6]
+    assert "Conflicting GREEN" in report["errors"][1]["error"]
+
+    state = client.get("/api/v1/intersections/b/state").json()
+    assert state["phase_name"] == "P1"
+
+
+def test_bulk_import_rejects_overlong_lines() -> None:
+    plan = [{"name": "P1", "duration": 5, "states": {"NS": "GREEN", "EW": "RED"}}]
+    record = json.dumps({"id": "a", "name": "A", "phases": plan}).encode()
+    body = record + b"\n" + b"x" * 1000 + b"\n" + record.replace(b'"a"', b'"b"')
+
+    async def blocks():
+        for start in range(0, len(body), 64):
+            yield body[start : start + 64]
+
+    repository = InMemoryIntersectionRepository()
+    report = asyncio.run(
+        import_ndjson(blocks(), repository=repository, max_line_bytes=200),
+    )
+    assert report["imported"] == 2
+    assert report["errors"] == [
+        {"line": 2, "error": "line exceeds the maximum length"},
+    ]
+    assert {c.id for c in repository.list()} == {"a", "b"}
+
+
+def test_config_with_custom_conflicts() -> None:
+    config = {
+        "id": "left",
+        "name": "Left turns",
+        "phases": [
+            {
+                "name": "NS_ALL",
+                "duration": 10,
+                "states": {"NS": "GREEN", "NS_LEFT": "GREEN", "EW": "RED"},
+            },
+        ],
+    }
+
+    response = client.put("/api/v1/intersections/left", json=config)
+    assert response.status_code == 400
+    assert "NS/NS_LEFT" in response.json()["detail"]
+
+    config["conflicts"] = [["NS", "EW"], ["NS_LEFT", "EW"]]
+    response = client.put("/api/v1/intersections/left", json=config)
+    assert response.status_code == 200
+    assert response.json()["conflicts"] == [["NS", "EW"], ["EW", "NS_LEFT"]]
+    state = client.get("/api/v1/intersections/left/state").json()
+    assert state["signals"]["NS_LEFT"] == "GREEN"
+
+
+def test_timeline_endpoints_do_not_change_state() -> None:
+    response = client.get(
+        "/api/v1/intersections/timeline/state",
+        params={"offset": 40, "ids": ["default", "unknown"]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["missing"] == ["unknown"]
+    assert body["items"][0]["phase_name"] == "EW_GREEN"
+    assert body["items"][0]["elapsed_in_phase"] == 5
+
+    response = client.get(
+        "/api/v1/intersections/timeline/transitions",
+        params={"start": 0, "end": 70},
+    )
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item["at"] == [0, 30, 35, 65, 70]
+    assert item["phase_name"][:2] == ["NS_GREEN", "NS_YELLOW"]
+
+    state = client.get("/api/v1/intersections/default/state").json()
+    assert state["phase_name"] == "NS_GREEN"
+    assert state["elapsed_in_phase"] == 0
+
+    response = client.get(
+        "/api/v1/intersections/timeline/transitions",
+        params={"start": 10, "end": 5},
+    )
+    assert response.status_code == 400
+
+
+def test_timeline_transitions_reject_oversized_requests() -> None:
+    for number in range(2):
+        repo.add(create_controller(f"fast{number}", (1, 1)))
+    week = 7 * 24 * 3600
+
+    response = client.get(
+        "/api/v1/intersections/timeline/transitions",
+        params={"start": 0, "end": week},
+    )
+    assert response.status_code == 400
+    assert "limit" in response.json()["detail"]
+
+    response = client.get(
+        "/api/v1/intersections/timeline/transitions",
+        params={"start": 0, "end": week, "ids": ["default"]},
+    )
+    assert response.status_code == 200
+
+
+def test_green_wave_applies_offsets_atomically() -> None:
+    phases = [
+        {"name": "NS", "duration": 30, "states": {"NS": "GREEN", "EW": "RED"}},
+        {"name": "EW", "duration": 30, "states": {"NS": "RED", "EW": "GREEN"}},
+    ]
+    ids = ["w0", "w1", "w2"]
+    for intersection_id in ids:
+        client.put(
+            f"/api/v1/intersections/{intersection_id}",
+            json={"id": intersection_id, "name": intersection_id, "phases": phases},
+        )
+    body = {"intersection_ids": ids, "segment_lengths": [300, 300], "speed_kmh": 36}
+
+    response = client.post("/api/v1/corridors/green-wave", json=body)
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["applied"] is False
+    assert plan["bandwidth_outbound"] == plan["bandwidth_inbound"] == 30
+
+    response = client.post(
+        "/api/v1/corridors/green-wave",
+        json={**body, "apply": True},
+    )
+    assert response.json()["shifts"] == [0] + plan["offsets"][1:]
+    states = client.get("/api/v1/intersections/states", params={"ids": ids}).json()
+    assert [s["phase_name"] for s in states["items"]] == ["NS", "EW", "NS"]
+
+    response = client.post(
+        "/api/v1/corridors/green-wave",
+        json={**body, "intersection_ids": ["w0", "missing", "w2"]},
+    )
+    assert response.status_code == 404
+
+
+def test_queue_simulation_does_not_change_state() -> None:
+    response = client.post(
+        "/api/v1/simulation/queues",
+        json={
+            "duration": 700,
+            "arrival_rates": {"NS": 360, "EW": 360},
+            "intersection_ids": ["default", "unknown"],
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["missing"] == ["unknown"]
+    assert body["summary"]["arrivals"] == 140
+    assert body["summary"]["steps"] == 40
+    assert body["items"][0]["max_queue"] > 0
+
+    state = client.get("/api/v1/intersections/default/state").json()
+    assert state["elapsed_in_phase"] == 0
+
+    response = client.post(
+        "/api/v1/simulation/queues",
+        json={"arrival_rates": {"NS": -1}},
+    )
+    assert response.status_code == 422
+
+
+def test_simulation_run_reports_intervals() -> None:
+    response = client.post(
+        "/api/v1/simulation/run",
+        json={
+            "duration": 1400,
+            "demand": [
+                {"at": 0, "arrival_rates": {"NS": 360}},
+                {"at": 700, "arrival_rates": {"NS": 720, "EW": 360}},
+            ],
+            "report_interval": 700,
+            "include_items": False,
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["transitions"] == 80
+    assert [i["arrivals"] for i in body["intervals"]] == [70, 210]
+    assert body["items"] == []
+
+    state = client.get("/api/v1/intersections/default/state").json()
+    assert state["elapsed_in_phase"] == 0
+
+    response = client.post(
+        "/api/v1/simulation/run",
+        json={"duration": 100, "demand": [{"at": 100, "arrival_rates": {}}]},
+    )
+    assert response.status_code == 400
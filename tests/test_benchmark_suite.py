@@ -0,0 +1,36 @@
+import json
+
+from benchmarks.suite.runner import compare, main
+
+
+def test_run_writes_results_and_compares_with_baseline(tmp_path, capsys) -> None:
+    output = tmp_path / "latest.json"
+    args = ["--groups", "domain", "-k", "tick[seconds=60]", "--quick", "--repeat", "1"]
+
+    assert main([*args, "--output", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert list(results["results"]) == ["domain.tick[seconds=60]"]
+    assert results["results"]["domain.tick[seconds=60]"]["ops_per_sec"] > 0
+
+    # Базовая линия в 10 раз быстрее текущего запуска — регрессия.
+    baseline = json.loads(output.read_text())
+    baseline["results"]["domain.tick[seconds=60]"]["median"] /= 10
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline))
+    assert main(["compare", str(baseline_path), str(output)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert main(["compare", str(output), str(output)]) == 0
+
+
+def test_compare_uses_threshold_and_skips_new_cases() -> None:
+    baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    current = {
+        "results": {"a": {"median": 1.1}, "b": {"median": 1.3}, "c": {"median": 1.0}},
+    }
+
+    rows = compare(baseline, current, threshold=0.2)
+
+    assert [(row["name"], row["regression"]) for row in rows] == [
+        ("a", False),
+        ("b", True),
+    ]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.core.corridor import (
+    apply_offsets,
+    cycle_position,
+    optimize_offsets,
+    plan_corridor,
+)
+from app.core.exceptions import InvalidCorridor
+from tests.helpers import create_controller
+
+
+def test_alternating_offsets_give_full_two_way_band() -> None:
+    # 300 м при 36 км/ч — 30 с, ровно полцикла: идеальная двусторонняя волна.
+    controllers = [create_controller(f"c{n}", (30, 30)) for n in range(6)]
+    plan = plan_corridor(controllers, [300] * 5, 36)
+
+    assert plan.travel_times == [0, 30, 60, 90, 120, 150]
+    assert plan.bandwidth_outbound == 30
+    assert plan.bandwidth_inbound == 30
+    assert plan.offsets[0] == 0
+
+
+def test_optimizer_beats_unsynchronized_offsets() -> None:
+    rng = np.random.default_rng(7)
+    cycle, count = 90, 40
+    greens = np.zeros((count, cycle), dtype=bool)
+    for i in range(count):
+        greens[i, : rng.integers(40, 55)] = True
+    travel = np.concatenate(([0], np.cumsum(rng.integers(15, 40, count - 1))))
+
+    offsets, outbound, inbound = optimize_offsets(greens, travel)
+
+    moments = np.arange(cycle)
+    rows = [greens[i][(offsets[i] + moments + travel[i]) % cycle] for i in range(count)]
+    assert outbound == int(np.all(rows, axis=0).sum())
+    assert outbound + inbound >= 40
+
+
+def test_apply_offsets_shifts_positions_relative_to_first() -> None:
+    controllers = [create_controller(f"c{n}", (30, 30)) for n in range(4)]
+    controllers[0].tick(7)
+    controllers[2].tick(50)
+    plan = plan_corridor(controllers, [150, 420, 200], 50)
+
+    apply_offsets(controllers, plan)
+
+    reference = cycle_position(controllers[0])
+    assert reference == 7
+    for controller, offset in zip(controllers, plan.offsets):
+        assert cycle_position(controller) == (reference + offset) % 60
+
+
+def test_corridor_requires_common_cycle() -> None:
+    controllers = [
+        create_controller("a", (30, 30)),
+        create_controller("b", (20, 30)),
+    ]
+    with pytest.raises(InvalidCorridor):
+        plan_corridor(controllers, [100], 50)
+    with pytest.raises(InvalidCorridor):
+        plan_corridor([create_controller("a", (30, 30))] * 2, [100], 50)
@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.discrete_event import DiscreteEventSimulation
+from app.core.domain import Direction
+from app.core.exceptions import InvalidSimulation
+from app.core.fleet import FleetEngine
+from app.core.traffic import per_direction, simulate_queues
+from tests.helpers import create_controller
+
+
+def create_fleet() -> list:
+    controllers = [create_controller(f"c{n}", (20 + n % 3, 30)) for n in range(12)]
+    for n, controller in enumerate(controllers):
+        controller.tick(n * 7)
+    return controllers
+
+
+def test_constant_demand_matches_phase_stepping() -> None:
+    rates = per_direction({Direction.NS: 500, Direction.EW: 700})
+    expected = simulate_queues(
+        FleetEngine.from_controllers(create_fleet()), 7200, rates
+    )
+
+    simulation = DiscreteEventSimulation(FleetEngine.from_controllers(create_fleet()))
+    simulation.schedule_demand(0, rates)
+    result = simulation.run(7200)
+
+    assert result.queues.total_delay.tolist() == pytest.approx(
+        expected.total_delay.tolist()
+    )
+    assert result.queues.max_queue.tolist() == pytest.approx(
+        expected.max_queue.tolist()
+    )
+    assert result.queues.departures.tolist() == pytest.approx(
+        expected.departures.tolist()
+    )
+
+
+def test_aligned_intersections_share_transition_events() -> None:
+    controllers = [create_controller(f"c{n}", (30, 30)) for n in range(10)]
+    engine = FleetEngine.from_controllers(controllers)
+
+    result = DiscreteEventSimulation(engine).run(7 * 24 * 3600)
+
+    # Переход каждые 30 с; все 10 перекрёстков — одно событие на момент.
+    assert result.transitions == 10 * 7 * 24 * 120
+    assert result.events == 7 * 24 * 120
+    assert engine.state_snapshot("c0")["elapsed_in_phase"] == 0
+    assert controllers[0].current_index == 0
+
+
+def test_demand_profile_and_report_intervals() -> None:
+    engine = FleetEngine.from_controllers([create_controller("a", (30, 30))])
+    simulation = DiscreteEventSimulation(engine, per_direction({}, 3600))
+    simulation.schedule_demand(60, per_direction({Direction.NS: 360}))
+    simulation.schedule_demand(180, per_direction({}))
+
+    result = simulation.run(240, report_interval=60)
+
+    assert [i["start"] for i in result.intervals] == [0, 60, 120, 180]
+    assert [i["arrivals"] for i in result.intervals] == pytest.approx([0, 6, 6, 0])
+    # 0.1 авт/с, разъезд 1 авт/с: как в замкнутой форме из test_traffic.
+    assert [i["total_delay"] for i in result.intervals] == pytest.approx(
+        [0, 45, 50, 4.5]
+    )
+    assert result.intervals[-1]["queued"] == pytest.approx(0)
+    assert result.queues.arrivals.tolist() == pytest.approx([12])
+    assert result.queues.departures.tolist() == pytest.approx([12])
+
+
+def test_invalid_runs_are_rejected() -> None:
+    simulation = DiscreteEventSimulation(
+        FleetEngine.from_controllers([create_controller("a", (30, 30))])
+    )
+    with pytest.raises(InvalidSimulation):
+        simulation.schedule_demand(-1, per_direction({}))
+    simulation.schedule_demand(100, per_direction({}))
+    with pytest.raises(InvalidSimulation):
+        simulation.run(100)
+    with pytest.raises(InvalidSimulation):
+        simulation.run(8 * 24 * 3600)
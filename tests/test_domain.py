@@ -1,6 +1,20 @@
+import gc
+import json
+import tracemalloc
+
 import pytest
 
-from app.core.domain import Direction, Phase, SignalColor, TrafficController
+from app.core.domain import (
+    DEFAULT_CONFLICTS,
+    ConflictMatrix,
+    Direction,
+    Phase,
+    PhasePlan,
+    SignalColor,
+    TrafficController,
+    WallClockTrafficController,
+    plan_registry,
+)
 from app.core.exceptions import InvalidPhaseConfiguration
 
 
@@ -77,3 +91,283 @@ def test_multiple_phase_transitions() -> None:
     controller.tick(12)
     assert controller.current_phase.name == "P1"
     assert controller.elapsed_in_phase == 2
+
+
+def _loop_tick(controller: TrafficController, seconds: int) -> tuple[int, int]:
+    """
+    Эталонная пошаговая реализация tick (как до перехода на арифметику
+    по модулю цикла). Возвращает (current_index, elapsed_in_phase).
+    """
+    index = controller.current_index
+    elapsed = controller.elapsed_in_phase
+    remaining = seconds
+    while remaining > 0:
+        time_left = controller.phases[index].duration - elapsed
+        if remaining < time_left:
+            elapsed += remaining
+            remaining = 0
+        else:
+            remaining -= time_left
+            index = (index + 1) % len(controller.phases)
+            elapsed = 0
+    return index, elapsed
+
+
+def _uneven_controller() -> TrafficController:
+    phases = [
+        Phase(
+            name=f"P{i}",
+            duration=duration,
+            states={Direction.NS: SignalColor.RED, Direction.EW: SignalColor.RED},
+        )
+        for i, duration in enumerate([30, 5, 1, 42, 7])
+    ]
+    return TrafficController("id", "name", phases)
+
+
+def test_tick_matches_loop_implementation() -> None:
+    controller = _uneven_controller()
+    for seconds in [0, 1, 4, 29, 30, 31, 84, 85, 86, 1000, 12345]:
+        expected = _loop_tick(controller, seconds)
+        controller.tick(seconds)
+        assert (controller.current_index, controller.elapsed_in_phase) == expected
+
+
+def test_tick_one_year_in_single_call() -> None:
+    year = 365 * 24 * 60 * 60
+    controller = _uneven_controller()
+    controller.tick(3)
+
+    expected = _loop_tick(controller, year)
+    controller.tick(year)
+
+    assert (controller.current_index, controller.elapsed_in_phase) == expected
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_wall_clock_controller_follows_clock() -> None:
+    clock = FakeClock()
+    phases = _uneven_controller().phases
+    controller = WallClockTrafficController("id", "name", phases, clock=clock)
+    reference = TrafficController("id", "name", phases)
+
+    assert controller.state_snapshot() == reference.state_snapshot()
+
+    for step in [3, 30, 50, 1000]:
+        clock.now += step
+        reference.tick(step)
+        assert controller.state_snapshot() == reference.state_snapshot()
+
+
+def test_wall_clock_tick_is_offset_and_reset_reanchors() -> None:
+    clock = FakeClock()
+    phases = _uneven_controller().phases
+    controller = WallClockTrafficController("id", "name", phases, clock=clock)
+
+    clock.now += 10
+    controller.tick(22)
+    assert controller.current_phase.name == "P1"
+    assert controller.elapsed_in_phase == 2
+
+    clock.now += 7
+    controller.reset()
+    assert controller.current_index == 0
+    assert controller.elapsed_in_phase == 0
+
+    clock.now += 2.5
+    assert controller.elapsed_in_phase == 2
+
+
+def test_state_json_matches_snapshot() -> None:
+    phases = [
+        Phase(
+            name='P "1"',
+            duration=5,
+            states={Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
+        ),
+        Phase(
+            name="P2",
+            duration=5,
+            states={Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+        ),
+    ]
+    controller = TrafficController("id", "Главный перекрёсток", phases)
+
+    for seconds in [0, 3, 4, 7]:
+        controller.tick(seconds)
+        assert json.loads(controller.state_json()) == controller.state_snapshot()
+
+
+def test_equal_configurations_share_one_plan() -> None:
+    def phases(green: int) -> list:
+        return [
+            Phase(
+                name="P1",
+                duration=green,
+                states={Direction.EW: SignalColor.RED, Direction.NS: SignalColor.GREEN},
+            ),
+            Phase(
+                name="P2",
+                duration=10,
+                states={Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
+            ),
+        ]
+
+    first = TrafficController("a", "A", phases(10))
+    second = WallClockTrafficController("b", "B", phases(10))
+    other = TrafficController("c", "C", phases(15))
+
+    assert first.plan is second.plan
+    assert first.plan is not other.plan
+    assert list(first.plan.offsets) == [0, 10]
+    assert other.cycle_length == 25
+
+    first.tick(12)
+    assert second.current_index == 0
+    assert json.loads(first.state_json()) == first.state_snapshot()
+
+
+def _retained_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = build()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return current
+
+
+class _UnslottedController:
+    """
+    Те же поля, что у TrafficController, но в `__dict__` экземпляра; план
+    так же общий (интернированный).
+    """
+
+    def __init__(self, intersection_id: str, name: str, plan: PhasePlan) -> None:
+        self.id = intersection_id
+        self.name = name
+        self.plan = plan
+        self.current_index = 0
+        self.elapsed_in_phase = 0
+
+
+def test_fleet_memory_is_compact() -> None:
+    plan = plan_registry.intern(
+        [
+            Phase(
+                name=f"P{n}",
+                duration=10,
+                states={
+                    Direction.NS: SignalColor.GREEN if n % 2 else SignalColor.RED,
+                    Direction.EW: SignalColor.RED if n % 2 else SignalColor.GREEN,
+                },
+            )
+            for n in range(4)
+        ],
+    )
+    count = 5000
+    # id и названия создаются заранее: они одинаковы в обоих вариантах,
+    # сравнивается только то, что хранит сам объект контроллера.
+    ids = [f"i{n}" for n in range(count)]
+    names = [f"I {n}" for n in range(count)]
+
+    unslotted = _retained_bytes(
+        lambda: [_UnslottedController(ids[n], names[n], plan) for n in range(count)],
+    )
+    fleet = _retained_bytes(
+        lambda: [TrafficController(ids[n], names[n], plan) for n in range(count)],
+    )
+
+    assert not hasattr(TrafficController("x", "X", plan), "__dict__")
+    assert fleet * 5 <= unslotted * 4
+
+
+def test_conflict_matrix_covers_turns_and_pedestrians() -> None:
+    def plan(**states: SignalColor) -> list:
+        base = {Direction.NS: SignalColor.RED, Direction.EW: SignalColor.RED}
+        base.update({Direction(key): color for key, color in states.items()})
+        return [Phase(name="P", duration=10, states=base)]
+
+    # пешеходы вдоль NS идут вместе с прямым NS
+    TrafficController("a", "A", plan(NS=SignalColor.GREEN, NS_PED=SignalColor.GREEN))
+    # защищённые левые повороты с обеих сторон оси NS
+    TrafficController("b", "B", plan(NS_LEFT=SignalColor.GREEN))
+
+    with pytest.raises(InvalidPhaseConfiguration, match="NS/NS_LEFT"):
+        TrafficController(
+            "c",
+            "C",
+            plan(NS=SignalColor.GREEN, NS_LEFT=SignalColor.GREEN),
+        )
+    with pytest.raises(InvalidPhaseConfiguration, match="EW_LEFT/EW_PED"):
+        TrafficController(
+            "d",
+            "D",
+            plan(EW_LEFT=SignalColor.GREEN, EW_PED=SignalColor.GREEN),
+        )
+
+
+def test_custom_conflict_matrix_is_part_of_the_plan() -> None:
+    phases = [
+        Phase(
+            name="ALL",
+            duration=10,
+            states={
+                Direction.NS: SignalColor.GREEN,
+                Direction.NS_LEFT: SignalColor.GREEN,
+                Direction.EW: SignalColor.RED,
+            },
+        ),
+    ]
+    matrix = ConflictMatrix([(Direction.EW, Direction.NS)])
+
+    plan = plan_registry.intern(phases, matrix)
+    assert plan.conflicts == ConflictMatrix([(Direction.NS, Direction.EW)])
+    assert plan_registry.intern(phases, ConflictMatrix(matrix.pairs)) is plan
+    with pytest.raises(InvalidPhaseConfiguration):
+        plan_registry.intern(phases, DEFAULT_CONFLICTS)
+
+    controller = TrafficController("id", "name", plan)
+    assert controller.state_snapshot()["signals"] == {
+        "NS": "GREEN",
+        "EW": "RED",
+        "NS_LEFT": "GREEN",
+    }
+
+
+def test_conflict_masks_match_pairwise_check() -> None:
+    directions = list(Direction)
+    for green in range(1 << len(directions)):
+        expected = 0
+        for first, second in DEFAULT_CONFLICTS.pairs:
+            first_bit = 1 << directions.index(first)
+            second_bit = 1 << directions.index(second)
+            if green & first_bit and green & second_bit:
+                expected |= first_bit | second_bit
+        assert DEFAULT_CONFLICTS.conflicting(green) == expected
+
+
+def test_plan_counts_transitions() -> None:
+    controller = _uneven_controller()
+    plan = controller.plan
+    for index, elapsed in [(0, 0), (0, 29), (2, 0), (3, 41), (4, 6)]:
+        for seconds in [0, 1, 7, 30, 85, 86, 1000]:
+            # Перебор по секундам: переход — смена фазы после шага.
+            expected, position = 0, (index, elapsed)
+            for _ in range(seconds):
+                following = (position[0], position[1] + 1)
+                if following[1] == plan.durations[position[0]]:
+                    following = ((position[0] + 1) % len(plan), 0)
+                    expected += 1
+                position = following
+            assert plan.transitions(index, elapsed, seconds) == expected
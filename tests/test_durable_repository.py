@@ -0,0 +1,98 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.core.durable_repository import DurableIntersectionRepository
+from app.core.exceptions import IntersectionNotFound, StorageError
+from tests.helpers import create_controller
+
+
+@pytest.mark.parametrize("durability", ["none", "batch", "sync"])
+def test_state_survives_reopen(tmp_path, durability: str) -> None:
+    path = str(tmp_path / "log")
+    repo = DurableIntersectionRepository(path, durability=durability)
+    repo.add(create_controller("a", name="Перекрёсток"))
+    repo.add(create_controller("b"))
+    repo.add(create_controller("gone"))
+    for _ in range(7):
+        with repo.locked("a") as controller:
+            controller.tick(1)
+    repo.delete("gone")
+    repo.close()
+
+    reopened = DurableIntersectionRepository(path, durability=durability)
+    try:
+        assert {c.id for c in reopened.list()} == {"a", "b"}
+        restored = reopened.get("a")
+        assert restored.name == "Перекрёсток"
+        assert restored.current_phase.name == "P2"
+        assert restored.elapsed_in_phase == 2
+        with pytest.raises(IntersectionNotFound):
+            reopened.get("gone")
+    finally:
+        reopened.close()
+
+
+def test_state_writes_are_coalesced_and_log_compacted(tmp_path) -> None:
+    path = tmp_path / "log"
+    repo = DurableIntersectionRepository(str(path), flush_interval=0.5)
+    repo.add(create_controller("a"))
+    for _ in range(100):
+        with repo.locked("a") as controller:
+            controller.tick(1)
+    repo.flush()
+
+    # config + одна схлопнутая запись состояния (группы могут разбиться на
+    # границе интервала, поэтому допускаем несколько)
+    assert len(path.read_bytes().splitlines()) < 10
+    repo.close()
+
+    DurableIntersectionRepository(str(path)).close()
+    assert len(path.read_bytes().splitlines()) == 1
+
+
+def test_write_failure_reaches_waiters_and_fails_fast(tmp_path, monkeypatch) -> None:
+    repo = DurableIntersectionRepository(str(tmp_path / "log"), durability="sync")
+    repo.add(create_controller("a"))
+
+    def broken_fsync(fd: int) -> None:
+        raise OSError("disk is gone")
+
+    monkeypatch.setattr("app.core.durable_repository.os.fsync", broken_fsync)
+    with pytest.raises(StorageError, match="disk is gone"):
+        with repo.locked("a") as controller:
+            controller.tick(1)
+
+    # Писатель жив, последующие изменения не ждут его, а сразу падают.
+    assert repo._writer.is_alive()
+    with pytest.raises(StorageError):
+        repo.add(create_controller("b"))
+    with pytest.raises(StorageError):
+        with repo.locked("a") as controller:
+            controller.tick(1)
+    with pytest.raises(StorageError):
+        repo.flush()
+    assert {c.id for c in repo.list()} == {"a"}
+    assert repo.get("a").elapsed_in_phase == 1
+    repo.close()
+
+
+def test_corrupt_tail_is_skipped(tmp_path) -> None:
+    path = tmp_path / "log"
+    repo = DurableIntersectionRepository(str(path))
+    repo.add(create_controller("a"))
+    repo.close()
+    with open(path, "ab") as log:
+        log.write(b'{"op":"state","id":"a","ind')
+
+    reopened = DurableIntersectionRepository(str(path))
+    assert reopened.get("a").elapsed_in_phase == 0
+    reopened.close()
+
+
+@pytest.mark.parametrize("backend", ["durable", "shared_memory"])
+def test_settings_reject_wall_clock_with_persistent_backends(backend: str) -> None:
+    with pytest.raises(ValidationError, match="CONTROLLER_MODE=wall_clock"):
+        Settings(repository_backend=backend, controller_mode="wall_clock")
+
+    assert Settings(repository_backend="memory", controller_mode="wall_clock")
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.core.events import PhaseEventBroker, broker
+from app.core.repository import create_default_intersection, repo
+from app.core.services import (
+    reset_intersection_service,
+    tick_intersection_service,
+)
+
+
+def setup_function() -> None:
+    repo.clear()
+    create_default_intersection()
+
+
+def test_broker_fans_out_only_to_matching_subscribers() -> None:
+    async def scenario() -> None:
+        local = PhaseEventBroker()
+        first = local.subscribe(["a"])
+        everything = local.subscribe()
+        other = local.subscribe(["b"])
+
+        await asyncio.to_thread(local.publish, "phase", "a", {"x": 1})
+        await asyncio.sleep(0)
+
+        assert b"event: phase" in first.queue.get_nowait()
+        assert b'"intersection_id":"a"' in everything.queue.get_nowait()
+        assert other.queue.empty()
+
+        local.unsubscribe(first)
+        local.unsubscribe(everything)
+        local.unsubscribe(other)
+        assert not local.has_subscribers()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_drops_oldest_events() -> None:
+    async def scenario() -> None:
+        local = PhaseEventBroker(queue_size=2)
+        subscription = local.subscribe(["a"])
+        for i in range(5):
+            local.publish("phase", "a", {"i": i})
+        await asyncio.sleep(0)
+
+        assert subscription.dropped == 3
+        assert b'"i":3' in subscription.queue.get_nowait()
+
+    asyncio.run(scenario())
+
+
+def test_services_publish_only_on_phase_boundary() -> None:
+    async def scenario() -> None:
+        subscription = broker.subscribe(["default"])
+        try:
+            await asyncio.to_thread(tick_intersection_service, "default", 10)
+            await asyncio.sleep(0)
+            assert subscription.queue.empty()
+
+            await asyncio.to_thread(tick_intersection_service, "default", 20)
+            await asyncio.sleep(0)
+            assert b"NS_YELLOW" in subscription.queue.get_nowait()
+
+            await asyncio.to_thread(reset_intersection_service, "default")
+            await asyncio.sleep(0)
+            assert b"event: reset" in subscription.queue.get_nowait()
+        finally:
+            broker.unsubscribe(subscription)
+
+    asyncio.run(scenario())
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from app.core.domain import WallClockTrafficController
+from app.core.exceptions import IntersectionNotFound
+from app.core.fleet import FleetEngine
+from tests.helpers import create_controller
+
+
+def test_advance_matches_controllers() -> None:
+    controllers = [
+        create_controller("a", [5, 5]),
+        create_controller("b", [30, 5, 30, 5]),
+        create_controller("c", [7, 1, 3]),
+    ]
+    engine = FleetEngine.from_controllers(controllers)
+
+    for seconds in [1, 4, 9, 100, 3601]:
+        engine.advance(seconds)
+        for controller in controllers:
+            controller.tick(seconds)
+            assert engine.state_snapshot(controller.id) == controller.state_snapshot()
+
+
+def test_advance_with_mask_only_touches_selected() -> None:
+    a = create_controller("a", [5, 5])
+    b = create_controller("b", [5, 5])
+    engine = FleetEngine.from_controllers([a, b])
+
+    engine.advance(7, mask=engine.mask_for(["b"]))
+
+    assert engine.view("a").elapsed_in_phase == 0
+    assert engine.view("b").current_phase.name == "P2"
+    assert engine.view("b").elapsed_in_phase == 2
+
+
+def test_per_row_seconds_and_growth() -> None:
+    engine = FleetEngine(capacity=1, max_phases=1)
+    controllers = [create_controller(str(i), [3, 4, 5]) for i in range(10)]
+    for controller in controllers:
+        engine.add(controller)
+
+    seconds = np.arange(10)
+    engine.advance(seconds)
+    for controller, step in zip(controllers, seconds):
+        controller.tick(int(step))
+        assert engine.state_snapshot(controller.id) == controller.state_snapshot()
+
+
+def test_remove_and_write_back() -> None:
+    controllers = [create_controller(str(i), [5, 5]) for i in range(3)]
+    engine = FleetEngine.from_controllers(controllers)
+
+    engine.remove("0")
+    assert "0" not in engine
+    with pytest.raises(IntersectionNotFound):
+        engine.state_snapshot("0")
+
+    engine.advance(6)
+    engine.write_back(controllers[1:])
+    assert controllers[2].current_phase.name == "P2"
+    assert controllers[2].elapsed_in_phase == 1
+
+
+def test_write_back_shifts_wall_clock_controllers() -> None:
+    now = [1000.0]
+    phases = create_controller("w", [5, 5]).phases
+    controller = WallClockTrafficController("w", "name-w", phases, clock=lambda: now[0])
+    now[0] += 2
+    engine = FleetEngine.from_controllers([controller])
+
+    engine.advance(4)
+    now[0] += 1
+    engine.write_back([controller])
+
+    assert controller.current_phase.name == "P2"
+    assert controller.elapsed_in_phase == 2
+
+    engine.write_back([controller])
+    assert controller.elapsed_in_phase == 2
+
+
+def test_add_reads_wall_clock_position_once() -> None:
+    now = [1000.0]
+    ticking = [False]
+
+    def clock() -> float:
+        # Каждое чтение часов после включения сдвигает время на секунду.
+        value = now[0]
+        if ticking[0]:
+            now[0] += 1
+        return value
+
+    phases = create_controller("w", [5, 5]).phases
+    controller = WallClockTrafficController("w", "name-w", phases, clock=clock)
+    now[0] += 4
+    ticking[0] = True
+    engine = FleetEngine.from_controllers([controller])
+
+    # Пара (фаза, время в фазе) берётся из одного чтения часов, поэтому
+    # переход к следующей секунде между чтениями её не разрывает.
+    assert engine.current_index.tolist() == [0]
+    assert engine.elapsed_in_phase.tolist() == [4]
+
+
+def test_add_reuses_plan_offsets() -> None:
+    controller = create_controller("a", [7, 1, 3])
+    engine = FleetEngine.from_controllers([controller])
+
+    assert engine.offsets[0].tolist() == list(controller.plan.offsets)
+    assert engine.durations[0].tolist() == list(controller.plan.durations)
+    assert engine.cycle_length.tolist() == [controller.plan.cycle_length]
+    assert engine.phases[0] is controller.plan.phases
@@ -0,0 +1,40 @@
+import json
+
+from app.core.bulk_import import commit_validated, validate_config_lines
+from app.core.repository import InMemoryIntersectionRepository
+from benchmarks.load.city import generate_city, generate_records, ndjson_chunks
+from benchmarks.load.driver import parse_mix, percentile, saturation
+
+
+def test_city_is_deterministic_and_valid() -> None:
+    records = list(generate_records(500, seed=7, variants=20))
+    assert records == list(generate_records(500, seed=7, variants=20))
+    assert records != list(generate_records(500, seed=8, variants=20))
+
+    lines = [(n, json.dumps(record).encode()) for n, record in enumerate(records)]
+    repository = InMemoryIntersectionRepository()
+    imported, errors = commit_validated(validate_config_lines(lines), repository)
+    assert (imported, errors) == (500, [])
+
+    # Несколько типовых планов: разное число фаз, ограниченное число планов.
+    assert {len(record["phases"]) for record in records} == {4, 6, 8}
+    plans = {json.dumps(record["phases"], sort_keys=True) for record in records}
+    assert len(plans) <= 20
+
+    assert [config.id for config in generate_city(3)] == ["city-0", "city-1", "city-2"]
+    chunks = list(ndjson_chunks(25, chunk_size=10))
+    assert [len(chunk.splitlines()) for chunk in chunks] == [10, 10, 5]
+
+
+def test_driver_helpers() -> None:
+    assert parse_mix("state=80, tick=20") == {"state": 80, "tick": 20}
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
+
+    stages = [
+        {"concurrency": 1, "throughput": 100.0},
+        {"concurrency": 4, "throughput": 300.0},
+        {"concurrency": 16, "throughput": 310.0},
+    ]
+    assert saturation(stages)["concurrency"] == 4
+    assert saturation(stages[:2]) is None
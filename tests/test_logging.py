@@ -0,0 +1,69 @@
+import io
+import json
+import logging
+
+from app.config import Settings
+from app.utils.logging import (
+    RateLimitFilter,
+    configure_logging,
+    request_context,
+    shutdown_logging,
+)
+
+
+def _record(msg: str, created: float, *args: object) -> logging.LogRecord:
+    record = logging.LogRecord("app", logging.WARNING, __file__, 1, msg, args, None)
+    record.created = created
+    return record
+
+
+def test_rate_limit_is_per_message_template() -> None:
+    limit = RateLimitFilter(rate=2, window=1.0)
+    passed = [
+        limit.filter(_record("Intersection not found: %s", 0.1 * n, f"id{n}"))
+        for n in range(5)
+    ]
+    assert passed == [True, True, False, False, False]
+    # Другой шаблон — свой лимит.
+    assert limit.filter(_record("Domain error on tick: %s", 0.5, "x"))
+
+    following = _record("Intersection not found: %s", 1.2, "id")
+    assert limit.filter(following)
+    assert following.suppressed == 3
+
+    sampled = RateLimitFilter(rate=1, window=1.0, sample_every=2)
+    passed = [sampled.filter(_record("flood", 0.0)) for _ in range(6)]
+    assert passed == [True, False, True, False, True, False]
+
+
+def test_queue_pipeline_writes_json_with_request_context() -> None:
+    stream = io.StringIO()
+    configure_logging(Settings(log_level="INFO", log_rate_limit=3), stream)
+    logger = logging.getLogger("app.test")
+    token = request_context.set({"request_id": "r-1", "path": "/x"})
+    try:
+        for n in range(10):
+            logger.warning("Intersection not found: %s", n)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+    finally:
+        request_context.reset(token)
+    logger.info("outside")
+    # Дописывает очередь и снимает обработчик.
+    shutdown_logging()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [entry["message"] for entry in entries] == [
+        "Intersection not found: 0",
+        "Intersection not found: 1",
+        "Intersection not found: 2",
+        "Failed",
+        "outside",
+    ]
+    assert entries[0]["request_id"] == "r-1"
+    assert entries[0]["path"] == "/x"
+    assert entries[0]["level"] == "WARNING"
+    assert "ValueError: boom" in entries[3]["exc"]
+    assert "request_id" not in entries[4]
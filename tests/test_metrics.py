@@ -0,0 +1,82 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Counter, Histogram, MetricsRegistry
+from app.core.repository import create_default_intersection, repo
+from app.main import create_app
+
+client = TestClient(create_app())
+
+
+def _sample(text: str, prefix: str) -> float:
+    lines = [line for line in text.splitlines() if line.startswith(prefix)]
+    assert len(lines) <= 1, lines
+    return float(lines[0].rsplit(" ", 1)[1]) if lines else 0.0
+
+
+def test_per_thread_counters_are_summed() -> None:
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("ops_total", "Ops.", ("kind",)))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)),
+    )
+
+    def work() -> None:
+        for _ in range(1000):
+            counter.inc(labels=("read",))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    histogram.observe(3.0)
+
+    text = registry.render()
+    assert "# TYPE ops_total counter" in text
+    assert _sample(text, 'ops_total{kind="read"}') == 4000
+    assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 4
+    assert _sample(text, 'latency_seconds_bucket{le="1"}') == 8
+    assert _sample(text, 'latency_seconds_bucket{le="+Inf"}') == 9
+    assert _sample(text, "latency_seconds_count") == 9
+    assert _sample(text, "latency_seconds_sum") == 5.2
+
+
+def test_metrics_endpoint_exports_routes_and_ticks() -> None:
+    repo.clear()
+    create_default_intersection()
+
+    def scrape() -> str:
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        return response.text
+
+    before = scrape()
+    # Дефолтный план 30/5/30/5: за 75 секунд — полный цикл, четыре перехода.
+    client.post("/api/v1/intersections/default/tick", json={"seconds": 75})
+    client.get("/api/v1/intersections/default/state")
+    client.get("/no/such/path")
+    after = scrape()
+
+    def delta(prefix: str) -> float:
+        return _sample(after, prefix) - _sample(before, prefix)
+
+    assert delta("traffic_ticks_total") == 1
+    assert delta("traffic_simulated_seconds_total") == 75
+    assert delta("traffic_phase_transitions_total") == 4
+    assert _sample(after, "traffic_repository_intersections") == 1
+    assert 'threadpool_tasks{state="capacity"}' in after
+    state = (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/intersections/{intersection_id}/state",status="200"}'
+    )
+    assert delta(state) == 1
+    unmatched = (
+        'http_request_duration_seconds_count{method="GET",route="unmatched",'
+        'status="404"}'
+    )
+    assert _sample(after, unmatched) >= 1
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.core.profiling import SamplingProfiler, profiler
+from app.core.repository import create_default_intersection, repo
+from app.main import app, create_app
+
+
+@pytest.fixture
+def admin_client(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("ADMIN_ENABLED", "true")
+    get_settings.cache_clear()
+    try:
+        yield TestClient(create_app())
+    finally:
+        profiler.stop()
+        get_settings.cache_clear()
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_collects_collapsed_stacks() -> None:
+    sampler = SamplingProfiler()
+    sampler.start(sample_every=1, interval=0.001)
+
+    def work() -> None:
+        sampler.enter_thread()
+        _spin(0.2)
+        sampler.leave_thread()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1] == "tests.test_profiling:_spin"
+    assert sampler.status()["stack_samples"] == sum(
+        int(line.rsplit(" ", 1)[1]) for line in lines
+    )
+
+
+def test_admin_endpoints_time_request_stages(admin_client: TestClient) -> None:
+    repo.clear()
+    create_default_intersection()
+    state = "/api/v1/intersections/default/state"
+
+    admin_client.get(state)
+    assert profiler.status()["requests"] == 0
+    # Без ADMIN_ENABLED служебных эндпоинтов нет.
+    assert TestClient(app).get("/admin/profiling").status_code == 404
+
+    response = admin_client.post(
+        "/admin/profiling/start",
+        json={"sample_every": 2, "interval": 0.001},
+    )
+    assert response.status_code == 200
+    assert response.json()["enabled"] is True
+
+    for _ in range(3):
+        admin_client.get(state)
+        admin_client.post(
+            "/api/v1/intersections/default/tick",
+            json={"seconds": 5},
+        )
+
+    status = admin_client.post("/admin/profiling/stop").json()
+    assert status["enabled"] is False
+    # Сам запрос start не считается: профилировщик включается внутри него.
+    assert status["requests"] == 7
+    assert status["sampled_requests"] == 3
+    stages = status["stages"]
+    assert set(stages) == {
+        "validation",
+        "service",
+        "domain",
+        "serialization",
+        "request",
+    }
+    assert stages["request"]["count"] == 3
+    assert stages["service"]["count"] == 3
+    assert stages["domain"]["count"] == 3
+    assert stages["request"]["total_ms"] >= stages["service"]["total_ms"]
+
+    stacks = admin_client.get("/admin/profiling/stacks")
+    assert stacks.status_code == 200
+    assert stacks.headers["content-type"].startswith("text/plain")
@@ -1,24 +1,27 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import List
+
 import pytest
 
-from app.core.domain import Direction, Phase, SignalColor, TrafficController
+from app.config import Settings
+from app.core.domain import TrafficController, WallClockTrafficController
 from app.core.exceptions import IntersectionNotFound
-from app.core.repository import InMemoryIntersectionRepository
-
-
-def create_controller(id_: str = "id") -> TrafficController:
-    phases = [
-        Phase(
-            name="P1",
-            duration=5,
-            states={Direction.NS: SignalColor.GREEN, Direction.EW: SignalColor.RED},
-        ),
-        Phase(
-            name="P2",
-            duration=5,
-            states={Direction.NS: SignalColor.RED, Direction.EW: SignalColor.GREEN},
-        ),
-    ]
-    return TrafficController(id_, "name", phases)
+from app.core.repository import (
+    InMemoryIntersectionRepository,
+    build_controller,
+    create_repository,
+)
+from app.core.repository import repo as shared_repo
+from app.core.services import (
+    get_intersection_state_service,
+    tick_intersection_service,
+)
+from tests.helpers import create_controller
 
 
 def test_add_and_get() -> None:
@@ -44,3 +47,127 @@ def test_delete() -> None:
     repo.delete("abc")
     with pytest.raises(IntersectionNotFound):
         repo.get("abc")
+
+
+def test_build_controller_modes() -> None:
+    phases = create_controller().phases
+
+    simulated = build_controller("a", "name", phases, mode="simulated")
+    wall_clock = build_controller("b", "name", phases, mode="wall_clock")
+
+    assert type(simulated) is TrafficController
+    assert isinstance(wall_clock, WallClockTrafficController)
+    with pytest.raises(ValueError):
+        build_controller("c", "name", phases, mode="unknown")
+
+
+BACKENDS = {
+    "memory": "InMemoryIntersectionRepository",
+    "shared_memory": "SharedMemoryIntersectionRepository",
+    "durable": "DurableIntersectionRepository",
+}
+
+
+def _backend_env(backend: str, tmp_path: Path) -> dict:
+    return {
+        "REPOSITORY_BACKEND": backend,
+        "SHM_PATH": str(tmp_path / "fleet.shm"),
+        "SHM_CAPACITY": "64",
+        "SHM_PLAN_TABLE_BYTES": "65536",
+        "DURABLE_LOG_PATH": str(tmp_path / "fleet.log"),
+    }
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_create_repository_builds_every_backend(
+    backend: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for name, value in _backend_env(backend, tmp_path).items():
+        monkeypatch.setenv(name, value)
+
+    repo = create_repository(Settings())
+    try:
+        assert type(repo).__name__ == BACKENDS[backend]
+        repo.add(create_controller("abc"))
+        assert repo.get("abc").id == "abc"
+    finally:
+        repo.close()
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_repository_module_imports_with_every_backend(
+    backend: str, tmp_path: Path
+) -> None:
+    # Отдельный процесс: модуль `repository` создаёт `repo` при импорте,
+    # а в этом процессе он уже загружен.
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from app.core.repository import repo; print(type(repo).__name__)",
+        ],
+        cwd=Path(__file__).resolve().parents[1],
+        env={**os.environ, **_backend_env(backend, tmp_path)},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == BACKENDS[backend]
+
+
+def test_concurrent_tick_and_state_keep_invariants() -> None:
+    ids = [f"i{n}" for n in range(8)]
+    shared_repo.clear()
+    for id_ in ids:
+        shared_repo.add(create_controller(id_))
+
+    ticked = {id_: 0 for id_ in ids}
+    ticked_lock = threading.Lock()
+    errors: List[str] = []
+
+    def worker(seed: int) -> None:
+        rnd = random.Random(seed)
+        for _ in range(2000):
+            id_ = rnd.choice(ids)
+            if rnd.random() < 0.5:
+                seconds = rnd.randint(1, 7)
+                tick_intersection_service(id_, seconds)
+                with ticked_lock:
+                    ticked[id_] += seconds
+            else:
+                snapshot = get_intersection_state_service(id_)
+                if not 0 <= snapshot["elapsed_in_phase"] < snapshot["phase_duration"]:
+                    errors.append(f"torn snapshot: {snapshot}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for id_ in ids:
+        with shared_repo.locked(id_) as controller:
+            index, elapsed = controller.locate()
+            position = sum(p.duration for p in controller.phases[:index]) + elapsed
+            assert position == ticked[id_] % controller.cycle_length
+    shared_repo.clear()
+
+
+def test_locked_many_handles_ids_sharing_a_lock_stripe() -> None:
+    repository = InMemoryIntersectionRepository(lock_stripes=1)
+    for id_ in ["b", "a", "c"]:
+        repository.add(create_controller(id_))
+
+    with repository.locked_many(["c", "a", "b"]) as controllers:
+        assert sorted(controllers) == ["a", "b", "c"]
+        for controller in controllers.values():
+            controller.tick(1)
+
+    with pytest.raises(IntersectionNotFound):
+        with repository.locked_many(["a", "missing"]):
+            pass
+    with repository.locked("a") as controller:
+        assert controller.elapsed_in_phase == 1
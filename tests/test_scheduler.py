@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from app.core.domain import TrafficController
+from app.core.repository import InMemoryIntersectionRepository
+from app.core.scheduler import TransitionScheduler
+from tests.helpers import create_controller
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_with_scheduler(scenario) -> None:
+    async def main() -> None:
+        repository = InMemoryIntersectionRepository()
+        clock = FakeClock()
+        scheduler = TransitionScheduler(repository, clock=clock)
+        scheduler.start()
+        try:
+            scenario(repository, scheduler, clock)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_fires_only_due_transitions_in_batches() -> None:
+    def scenario(repository, scheduler, clock) -> None:
+        fast = create_controller("fast", [5, 5])
+        slow = create_controller("slow", [30, 5])
+        repository.add(fast)
+        repository.add(slow)
+        assert scheduler.next_deadline() == 5
+
+        clock.now = 4.9
+        assert scheduler.fire_due() == 0
+
+        clock.now = 5
+        assert scheduler.fire_due() == 1
+        assert fast.current_phase.name == "P2"
+        assert slow.elapsed_in_phase == 0
+        assert scheduler.next_deadline() == 10
+
+        clock.now = 30
+        # fast: 10, 15, 20, 25, 30 (догоняет по одному за вызов), slow: 30
+        assert scheduler.fire_due() == 2
+        assert slow.current_phase.name == "P2"
+
+    run_with_scheduler(scenario)
+
+
+def test_repository_changes_update_schedule_incrementally() -> None:
+    def scenario(repository, scheduler, clock) -> None:
+        repository.add(create_controller("a", [10, 10]))
+        assert scheduler.next_deadline() == 10
+
+        repository.add(create_controller("a", [3, 10]))
+        assert len(scheduler) == 1
+        assert scheduler.next_deadline() == 3
+
+        repository.delete("a")
+        assert len(scheduler) == 0
+        assert scheduler.next_deadline() is None
+
+        clock.now = 100
+        assert scheduler.fire_due() == 0
+
+    run_with_scheduler(scenario)
+
+
+def test_background_task_fires_off_the_event_loop() -> None:
+    threads = []
+
+    class RecordingController(TrafficController):
+        __slots__ = ()
+
+        def tick(self, seconds: int) -> None:
+            threads.append(threading.get_ident())
+            super().tick(seconds)
+
+    async def main() -> None:
+        repository = InMemoryIntersectionRepository()
+        clock = FakeClock()
+        scheduler = TransitionScheduler(repository, clock=clock)
+        scheduler.start()
+        try:
+            controller = create_controller("a", [5, 5])
+            repository.add(
+                RecordingController("a", "name", controller.phases),
+            )
+            clock.now = 5
+            scheduler._wake()
+            for _ in range(100):
+                if threads:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(main())
+    assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,187 @@
+import multiprocessing
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.core.exceptions import IntersectionNotFound, StorageError
+from app.core.shm_repository import _DELETED_SLOTS, SharedMemoryIntersectionRepository
+from tests.helpers import create_controller
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "fleet.shm")
+
+
+def test_state_is_shared_between_instances(path: str) -> None:
+    first = SharedMemoryIntersectionRepository(path, capacity=8, plan_table_bytes=4096)
+    second = SharedMemoryIntersectionRepository(path)
+    try:
+        first.add(create_controller("a"))
+        with first.locked("a") as controller:
+            controller.tick(7)
+
+        fetched = second.get("a")
+        assert fetched.current_phase.name == "P2"
+        assert fetched.elapsed_in_phase == 2
+        assert second.capacity == 8
+
+        first.add(create_controller("a", (9, 5)))
+        assert second.get("a").phases[0].duration == 9
+
+        second.delete("a")
+        with pytest.raises(IntersectionNotFound):
+            first.get("a")
+    finally:
+        first.close()
+        second.close()
+
+
+def test_plans_are_interned_and_capacity_enforced(path: str) -> None:
+    repo = SharedMemoryIntersectionRepository(path, capacity=2, plan_table_bytes=4096)
+    try:
+        repo.add(create_controller("a"))
+        used = repo._plans_used()
+        repo.add(create_controller("b"))
+        assert repo._plans_used() == used
+        assert {c.id for c in repo.list()} == {"a", "b"}
+
+        with pytest.raises(StorageError):
+            repo.add(create_controller("c"))
+
+        repo.delete("a")
+        repo.add(create_controller("c"))
+        assert {c.id for c in repo.list()} == {"b", "c"}
+    finally:
+        repo.close()
+
+
+def test_len_and_list_follow_used_slot_index(path: str) -> None:
+    repo = SharedMemoryIntersectionRepository(path, capacity=8, plan_table_bytes=4096)
+    try:
+        for id_ in "abcd":
+            repo.add(create_controller(id_))
+        repo.add(create_controller("b", (9, 5)))
+        assert len(repo) == 4
+
+        repo.delete("a")
+        repo.delete("d")
+        assert len(repo) == 2
+        assert sorted(c.id for c in repo.list()) == ["b", "c"]
+
+        repo.add(create_controller("e"))
+        assert sorted(c.id for c in repo.list()) == ["b", "c", "e"]
+
+        repo.clear()
+        assert len(repo) == 0
+        assert repo.list() == []
+    finally:
+        repo.close()
+
+
+def test_plan_lookup_uses_the_shared_index(path: str) -> None:
+    first = SharedMemoryIntersectionRepository(
+        path, capacity=512, plan_table_bytes=65536
+    )
+    second = SharedMemoryIntersectionRepository(path)
+    try:
+        for number in range(300):
+            first.add(create_controller(f"a{number}", (5 + number, 5)))
+        used = first._plans_used()
+
+        reads = 0
+        plan_bytes = second._plan_bytes
+
+        def counting_plan_bytes(offset: int) -> bytes:
+            nonlocal reads
+            reads += 1
+            return plan_bytes(offset)
+
+        second._plan_bytes = counting_plan_bytes  # type: ignore[method-assign]
+        # Известный план находится по индексу, новый добавляется без
+        # обхода уже записанных.
+        second.add(create_controller("b", (5 + 299, 5)))
+        second.add(create_controller("c", (1000, 5)))
+
+        assert second._plans_used() > used
+        assert reads <= 4
+        assert first.get("b").plan is first.get("a299").plan
+        assert first.get("c").phases[0].duration == 1000
+    finally:
+        first.close()
+        second.close()
+
+
+def test_deleted_slots_are_reclaimed_by_rehash(path: str) -> None:
+    first = SharedMemoryIntersectionRepository(path, capacity=16, plan_table_bytes=4096)
+    second = SharedMemoryIntersectionRepository(path)
+    try:
+        for id_ in "abc":
+            first.add(create_controller(id_, (100, 5)))
+        with second.locked("b") as controller:
+            controller.tick(7)
+
+        for number in range(200):
+            first.add(create_controller(f"tmp{number}"))
+            first.delete(f"tmp{number}")
+            assert first._header(_DELETED_SLOTS) * 4 < first.capacity
+
+        assert len(second) == 3
+        assert sorted(c.id for c in second.list()) == ["a", "b", "c"]
+        with second.locked("b") as controller:
+            assert controller.elapsed_in_phase == 7
+            controller.tick(1)
+        assert first.get("b").elapsed_in_phase == 8
+        with pytest.raises(IntersectionNotFound):
+            second.get("tmp0")
+    finally:
+        first.close()
+        second.close()
+
+
+def test_reads_do_not_touch_controllers_being_ticked(path: str) -> None:
+    repo = SharedMemoryIntersectionRepository(path, capacity=8, plan_table_bytes=4096)
+    try:
+        repo.add(create_controller("a", (100, 5)))
+        with repo.locked("a") as controller:
+            controller.tick(3)
+            # Чтение из другого потока посреди изменения видит записанное
+            # состояние и не сбрасывает объект, который сейчас меняется.
+            assert repo.list()[0].elapsed_in_phase == 0
+            assert repo.get("a").elapsed_in_phase == 0
+            assert controller.elapsed_in_phase == 3
+
+        assert repo.get("a").elapsed_in_phase == 3
+    finally:
+        repo.close()
+
+
+def _tick_worker(path: str, count: int) -> None:
+    repo = SharedMemoryIntersectionRepository(path)
+    for _ in range(count):
+        with repo.locked("a") as controller:
+            controller.tick(1)
+    repo.close()
+
+
+def test_ticks_from_many_processes_are_not_lost(path: str) -> None:
+    repo = SharedMemoryIntersectionRepository(path, capacity=8, plan_table_bytes=4096)
+    repo.add(create_controller("a", (1000, 5)))
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_tick_worker, args=(path, 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert repo.get("a").elapsed_in_phase == 800
+    repo.close()
+
+
+def test_settings_reject_scheduler_with_shared_memory() -> None:
+    with pytest.raises(ValidationError, match="SCHEDULER_ENABLED"):
+        Settings(repository_backend="shared_memory", scheduler_enabled=True)
+
+    assert Settings(repository_backend="memory", scheduler_enabled=True)
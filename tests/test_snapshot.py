@@ -0,0 +1,103 @@
+import pytest
+
+from app.core.domain import (
+    DEFAULT_CONFLICTS,
+    ConflictMatrix,
+    Direction,
+    TrafficController,
+    WallClockTrafficController,
+    plan_registry,
+)
+from app.core.exceptions import IntersectionNotFound, StorageError
+from app.core.repository import InMemoryIntersectionRepository
+from app.core.snapshot import FleetSnapshot, load_fleet_snapshot, write_snapshot
+from tests.helpers import create_controller
+
+
+def test_snapshot_round_trip(tmp_path) -> None:
+    controllers = [
+        create_controller(f"c{n}", (5 + n % 3, 5), f"Перекрёсток {n}")
+        for n in range(50)
+    ]
+    for n, controller in enumerate(controllers):
+        controller.tick(n)
+    path = str(tmp_path / "fleet.bin")
+
+    assert write_snapshot(reversed(controllers), path) == 50
+
+    snapshot = FleetSnapshot(path)
+    assert len(snapshot) == 50
+    assert snapshot.find("missing") is None
+    for controller in controllers:
+        restored = snapshot.controller(snapshot.find(controller.id))
+        assert restored.state_snapshot() == controller.state_snapshot()
+
+    # одинаковые планы разделяют один список фаз
+    first = snapshot.controller(snapshot.find("c0"))
+    second = snapshot.controller(snapshot.find("c3"))
+    assert first.phases is second.phases
+    snapshot.close()
+
+
+def test_repository_materializes_snapshot_lazily(tmp_path) -> None:
+    path = str(tmp_path / "fleet.bin")
+    write_snapshot([create_controller(f"c{n}") for n in range(10)], path)
+
+    repo = InMemoryIntersectionRepository()
+    assert load_fleet_snapshot(repo, path)
+    assert len(repo) == 10
+    assert repo._items == {}
+
+    with repo.locked("c3") as controller:
+        controller.tick(6)
+    assert list(repo._items) == ["c3"]
+
+    repo.delete("c4")
+    repo.add(create_controller("c5", (9, 5)))
+    repo.add(create_controller("new"))
+    assert len(repo) == 10
+    with pytest.raises(IntersectionNotFound):
+        repo.get("c4")
+
+    controllers = {c.id: c for c in repo.list()}
+    assert len(controllers) == 10
+    assert controllers["c3"].current_phase.name == "P2"
+    assert controllers["c5"].phases[0].duration == 9
+    assert repo._snapshot is None
+
+
+def test_unsupported_snapshot_is_rejected(tmp_path) -> None:
+    path = tmp_path / "fleet.bin"
+    path.write_bytes(b"JUNK" + b"\0" * 60)
+
+    with pytest.raises(StorageError):
+        FleetSnapshot(str(path))
+    assert not load_fleet_snapshot(InMemoryIntersectionRepository(), str(path))
+
+
+def test_snapshot_keeps_custom_conflict_matrix(tmp_path) -> None:
+    matrix = ConflictMatrix([(Direction.NS, Direction.EW_LEFT)])
+    controller = TrafficController(
+        "c", "C", plan_registry.intern(create_controller("c").phases, matrix)
+    )
+    path = str(tmp_path / "fleet.bin")
+    write_snapshot([controller, create_controller("d")], path)
+
+    snapshot = FleetSnapshot(path)
+    assert snapshot.controller(snapshot.find("c")).plan is controller.plan
+    assert snapshot.controller(snapshot.find("d")).plan.conflicts == DEFAULT_CONFLICTS
+    snapshot.close()
+
+
+def test_snapshot_restores_in_configured_mode(tmp_path) -> None:
+    controller = create_controller("c")
+    controller.tick(7)
+    path = str(tmp_path / "fleet.bin")
+    write_snapshot([controller], path)
+
+    repo = InMemoryIntersectionRepository()
+    assert load_fleet_snapshot(repo, path, mode="wall_clock")
+    restored = repo.get("c")
+    assert isinstance(restored, WallClockTrafficController)
+    assert restored.locate() in [(1, 2), (1, 3)]
+    repo.clear()
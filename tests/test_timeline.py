@@ -0,0 +1,63 @@
+import copy
+
+import pytest
+
+from app.core.exceptions import TimelineTooLarge
+from app.core.timeline import states_at, timeline_entry, transitions_between
+from tests.helpers import create_controller
+
+
+def _fleet() -> list:
+    controllers = [
+        create_controller(f"c{n}", (4 + n % 3, 3, 6 + n % 3)) for n in range(9)
+    ]
+    for n, controller in enumerate(controllers):
+        controller.tick(n * 5)
+    return controllers
+
+
+def test_states_at_matches_ticking_and_does_not_mutate() -> None:
+    controllers = _fleet()
+    before = [c.locate() for c in controllers]
+    entries = [timeline_entry(c) for c in controllers]
+
+    for offset in [0, 1, 7, 40, 1000]:
+        predicted = states_at(entries, offset)
+        for controller, state in zip(controllers, predicted):
+            reference = copy.copy(controller)
+            reference.tick(offset)
+            assert state == reference.state_snapshot()
+
+    assert [c.locate() for c in controllers] == before
+
+
+def test_transitions_match_step_by_step_simulation() -> None:
+    controllers = _fleet()
+    entries = [timeline_entry(c) for c in controllers]
+    start, end = 3, 60
+
+    transitions = transitions_between(entries, start, end)
+    for controller, item in zip(controllers, transitions):
+        expected_at, expected_names = [], []
+        reference = copy.copy(controller)
+        reference.tick(start - 1)
+        for moment in range(start, end + 1):
+            previous = reference.current_index
+            reference.tick(1)
+            if reference.current_index != previous:
+                expected_at.append(moment)
+                expected_names.append(reference.current_phase.name)
+
+        assert item["intersection_id"] == controller.id
+        assert item["at"] == expected_at
+        assert item["phase_name"] == expected_names
+
+
+def test_transitions_reject_windows_over_the_limit() -> None:
+    entries = [timeline_entry(c) for c in _fleet()]
+    # 9 перекрёстков по 3 фазы, окно короче любого цикла: не больше
+    # одного перехода в каждую фазу.
+    assert transitions_between(entries, 0, 5, max_transitions=27)
+
+    with pytest.raises(TimelineTooLarge):
+        transitions_between(entries, 0, 5, max_transitions=26)
@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.domain import Direction
+from app.core.fleet import FleetEngine
+from app.core.traffic import per_direction, simulate_queues
+from tests.helpers import create_controller
+
+
+def test_undersaturated_queue_matches_closed_form() -> None:
+    controller = create_controller("a", (30, 30))
+    engine = FleetEngine.from_controllers([controller])
+
+    # 0.1 авт/с на NS, разъезд 1 авт/с: за красные 30 с очередь 3 авт.
+    # (площадь 45), на зелёном рассасывается за 3 / 0.9 с (площадь 5).
+    result = simulate_queues(
+        engine,
+        120,
+        per_direction({Direction.NS: 360}),
+        per_direction({}, 3600),
+    )
+
+    assert result.arrivals.tolist() == pytest.approx([12])
+    assert result.total_delay.tolist() == pytest.approx([95])
+    assert result.max_queue.tolist() == pytest.approx([3])
+    assert result.final_queue.tolist() == pytest.approx([3])
+    assert result.departures.tolist() == pytest.approx([9])
+    assert result.steps == 4
+    assert controller.current_index == 0
+    assert engine.state_snapshot("a")["elapsed_in_phase"] == 0
+
+
+def test_oversaturated_queue_grows_and_throughput_is_capped() -> None:
+    engine = FleetEngine.from_controllers([create_controller("a", (10, 50))])
+
+    result = simulate_queues(
+        engine,
+        600,
+        per_direction({Direction.NS: 1800, Direction.EW: 0}),
+        per_direction({}, 1800),
+    )
+
+    # 10 циклов по 10 с зелёного при 0.5 авт/с.
+    assert result.departures.tolist() == pytest.approx([50])
+    assert result.final_queue.tolist() == pytest.approx([250])
+    assert result.summary()["throughput"] == pytest.approx(50)
+
+
+def test_fleet_is_simulated_in_one_batch_from_current_positions() -> None:
+    controllers = [
+        create_controller("a", (30, 30)),
+        create_controller("b", (20, 40)),
+    ]
+    controllers[1].tick(25)
+    engine = FleetEngine.from_controllers(controllers)
+
+    # NS_LEFT не сигнализируется ни одним перекрёстком — не моделируется.
+    result = simulate_queues(
+        engine,
+        3600,
+        per_direction({Direction.NS: 300, Direction.NS_LEFT: 500}),
+    )
+
+    assert result.arrivals.tolist() == pytest.approx([300, 300])
+    items = result.items()
+    assert [item["intersection_id"] for item in items] == ["a", "b"]
+    assert items[1]["average_delay"] > items[0]["average_delay"]
+    assert engine.state_snapshot("b")["elapsed_in_phase"] == 5
+    assert controllers[1].elapsed_in_phase == 5